@@ -1,133 +1,862 @@
-from flask import Flask, render_template, request, jsonify
-from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
+from cache import CacheLRU, chiave_simulazione
+from sweep import esegui_sweep
+from catalogo import catalogo_predefinito
+from eventi import MAX_MTTR_ORE, MAX_SETUP_ORE, CalendarioTurni, SimulazioneEventiNonValida, simula_eventi
+from pianificatore import PianificatoreLotti
+from capacita import MAX_SCADENZA_ORE, quantita_massime
+from stocastico import distribuzione_durata_lotto
+from archivio import ArchivioScenari, DIMENSIONE_TRANSAZIONE, crea_record
+from lavori import CodaLavori, CodaPiena
+from strumentazione import REGISTRO, profila, span
+from risposte import (
+    SOGLIA_COMPRESSIONE,
+    calcola_etag,
+    compatta,
+    comprimi,
+    comprimi_flusso,
+    formatta_risultati_json,
+    scegli_codifica,
+    serializza,
+)
+from validazione import FUORI_RANGE, Campo, ErroreValidazione, SchemaValidazione, converti_decimale, converti_intero, schema_da_catalogo
+from parallelo import esegui_scenari_paralleli
+from assegnazione import METODI_ASSEGNAZIONE
+from models import Impianto
 from produzione import (
     genera_parametri_configurabili,
     assegna_linee_a_prodotti,
     calcola_tempo_produzione_lotto,
+    calcola_tempo_produzione_lotto_frazionato,
+    crea_rng,
 )
 
 app = Flask(__name__)
 
-PRODOTTI = [
-    GiaccaInvernale(),
-    TShirt(),
-    Felpa(),
-    Pantalone()
-]
+# Profilazione con cProfile di singole richieste (?profilo=1), da abilitare esplicitamente
+app.config['PROFILAZIONE'] = os.environ.get('PROFILAZIONE') == '1'
+
+# Catalogo di prodotti e linee, caricato una sola volta all'avvio
+CATALOGO = catalogo_predefinito()
+
+PRODOTTI = CATALOGO.prodotti
+
+# Campi del form associati a prodotti e linee
+CAMPI_QUANTITA = {prodotto.campo_quantita: prodotto for prodotto in CATALOGO.prodotti}
+CAMPI_COEFFICIENTI = {linea.campo_coefficiente: linea for linea in CATALOGO.linee}
+
+# Schemi di validazione compilati dal catalogo all'avvio: scenario completo,
+# solo impianto (coefficienti e seed) e solo lotto (quantità)
+SCHEMA_SCENARIO = schema_da_catalogo(CATALOGO)
+SCHEMA_IMPIANTO = schema_da_catalogo(CATALOGO, quantita=False)
+SCHEMA_LOTTO = schema_da_catalogo(CATALOGO, coefficienti=False, seed=False)
+
+# Numero massimo di punti valutati da una singola richiesta di sweep
+MAX_PUNTI_SWEEP = 100_000
+
+# Cache dei risultati di assegnazione e calcolo del lotto
+CACHE_SIMULAZIONI = CacheLRU(dimensione_massima=1024, ttl_secondi=600)
+
+# Lavori in background (sweep e scenari): pool limitato e coda di attesa con lunghezza massima
+CODA_LAVORI = CodaLavori(n_worker=2, lunghezza_massima=32)
+MAX_SCENARI_LAVORO = 10_000_000
+# Processi e dimensione dei chunk di un lavoro di scenari: oltre le CPU i processi non accelerano
+MAX_WORKER_LAVORO = os.cpu_count() or 1
+MAX_CHUNK_LAVORO = 100_000
+
+# Pianificatori multi-lotto attivi, indicizzati per id; oltre il limite si scarta il meno recente
+PIANI: "OrderedDict[str, PianificatoreLotti]" = OrderedDict()
+MAX_PIANI = 100
+# Lotti massimi in coda per piano: ogni aggiunta o variazione ricalcola il calendario dei lotti
+MAX_LOTTI_PIANO = 500
+LOCK_PIANI = threading.Lock()
+
+# Stato del processo per il controllo di prontezza: il server lo disattiva durante l'arresto.
+# worker è il numero di processi che servono lo stesso socket (server.py --worker)
+STATO_PROCESSO = {'pronto': True, 'avviato': time.time(), 'worker': 1}
+
+# Route con stato in memoria nel processo (piani e lavori): con più worker una richiesta
+# successiva può arrivare a un processo che non conosce il piano o il lavoro creato
+ROUTE_PROCESSO_UNICO = ('/api/piani', '/api/jobs')
+
+# Endpoint POST che sono calcoli puri sul corpo della richiesta: come per GET e HEAD,
+# una richiesta ripetuta con If-None-Match può ricevere 304. Le altre POST modificano lo stato
+ENDPOINT_CALCOLO = frozenset({'simula', 'sweep', 'capacita'})
+
+# Prodotti indicizzati per id, per mix e minimi del calcolo di capacità
+PRODOTTI_PER_ID = {prodotto.id: prodotto for prodotto in CATALOGO.prodotti}
+LINEE_PER_ID = {linea.id: linea for linea in CATALOGO.linee}
+
+# Pesi del mix e quantità minime oltre questo valore non sono accettati
+MAX_VALORE_PER_PRODOTTO = 1_000_000
+
+# Archivio SQLite degli scenari simulati, abilitato indicando il file in ARCHIVIO_SCENARI
+ARCHIVIO = ArchivioScenari(os.environ['ARCHIVIO_SCENARI']) if os.environ.get('ARCHIVIO_SCENARI') else None
+
+# Filtri numerici della ricerca negli scenari archiviati, tutti facoltativi
+SCHEMA_RICERCA = SchemaValidazione([
+    Campo(nome, converti, 0, float('inf'), '', messaggio, messaggio, obbligatorio=False)
+    for nome, converti, messaggio in (
+        ('coefficiente_minimo', converti_decimale, "Il coefficiente minimo deve essere un numero non negativo"),
+        ('coefficiente_massimo', converti_decimale, "Il coefficiente massimo deve essere un numero non negativo"),
+        ('quantita_minima', converti_intero, "La quantità minima deve essere un intero non negativo"),
+        ('quantita_massima', converti_intero, "La quantità massima deve essere un intero non negativo"),
+        ('durata_minima_ore', converti_decimale, "La durata minima deve essere un numero non negativo"),
+        ('durata_massima_ore', converti_decimale, "La durata massima deve essere un numero non negativo"),
+        ('limite', converti_intero, "Il limite deve essere un intero non negativo")
+    )
+])
 
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template('index.html', catalogo=CATALOGO)
 
 
 @app.route('/api/simula', methods=['POST'])
 def simula():
     try:
-        data = request.get_json()
+        with span('richiesta_simula'):
+            data = request.get_json()
+            
+            with span('validazione'):
+                errori = _valida_scenario(data)
+            if errori:
+                return _risposta_errori(errori)
+            
+            # L'archiviazione è rinviata a _negozia_risposta, che la salta se la risposta diventa 304
+            g.da_archiviare = []
+            if app.config['PROFILAZIONE'] and request.args.get('profilo') == '1':
+                risposta, profilo = profila(lambda: _risposta_simulazione(data, g.da_archiviare))
+                risposta['profilo'] = profilo
+            else:
+                risposta = _risposta_simulazione(data, g.da_archiviare)
+            
+            with span('serializzazione_json'):
+                return _risposta_json(risposta)
         
-        errori = valida_input_utente(data)
+    except SimulazioneEventiNonValida as e:
+        return jsonify({'errore': [str(e)]}), 400
+    except Exception as e:
+        return jsonify({'errore': f'Errore durante la simulazione: {str(e)}'}), 500
+
+
+# Simulazione di più scenari: accetta un oggetto {"scenari": [...]} oppure un corpo NDJSON
+# (uno scenario per riga) e restituisce i risultati in NDJSON man mano che vengono calcolati
+@app.route('/api/simula/batch', methods=['POST'])
+def simula_batch():
+    if request.mimetype == 'application/x-ndjson':
+        # Lettura riga per riga: la memoria resta costante al crescere del batch
+        scenari = (json.loads(riga) for riga in request.stream if riga.strip())
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('scenari'), list):
+            return jsonify({'errore': "Il campo scenari deve essere una lista"}), 400
+        scenari = iter(data['scenari'])
+    
+    compatto = request.args.get('formato') == 'compatto'
+    
+    def genera_righe():
+        # Scenari da archiviare, inseriti a blocchi in un'unica transazione
+        da_archiviare = [] if ARCHIVIO is not None else None
+        indice = 0
+        try:
+            while True:
+                try:
+                    scenario = next(scenari)
+                except StopIteration:
+                    return
+                except ValueError as e:
+                    yield json.dumps({'indice': indice, 'errore': f'Scenario non valido: {str(e)}'}) + '\n'
+                    return
+                
+                risultato = _simula_scenario_batch(indice, scenario, da_archiviare)
+                yield json.dumps(compatta(risultato) if compatto else risultato) + '\n'
+                indice += 1
+                
+                if da_archiviare is not None and len(da_archiviare) >= DIMENSIONE_TRANSAZIONE:
+                    _archivia(da_archiviare)
+                    da_archiviare.clear()
+        finally:
+            if da_archiviare:
+                _archivia(da_archiviare)
+    
+    # Con gzip accettato il flusso è compresso in modo incrementale
+    if 'gzip' in request.accept_encodings:
+        risposta = Response(stream_with_context(comprimi_flusso(genera_righe())), mimetype='application/x-ndjson')
+        risposta.headers['Content-Encoding'] = 'gzip'
+        risposta.vary.add('Accept-Encoding')
+        return risposta
+    
+    return Response(stream_with_context(genera_righe()), mimetype='application/x-ndjson')
+
+
+def _simula_scenario_batch(indice: int, scenario, da_archiviare: Optional[list] = None) -> dict:
+    if not isinstance(scenario, dict):
+        return {'indice': indice, 'errore': ['Lo scenario deve essere un oggetto JSON']}
+    
+    errori = _valida_scenario(scenario)
+    if errori:
+        return {
+            'indice': indice,
+            'errore': [errore.messaggio for errore in errori],
+            'errori': [errore.in_dizionario() for errore in errori]
+        }
+    
+    try:
+        return {'indice': indice, **_risposta_simulazione(scenario, da_archiviare)}
+    except Exception as e:
+        return {'indice': indice, 'errore': f'Errore durante la simulazione: {str(e)}'}
+
+
+# Risultati JSON di uno scenario già validato; con il campo eventi il lotto viene
+# simulato anche a eventi discreti, con turni, attrezzaggi e guasti.
+# Con l'archivio abilitato uno scenario già archiviato non viene ricalcolato e quelli nuovi
+# sono archiviati subito, oppure aggiunti a da_archiviare per l'inserimento a blocchi
+def _risposta_simulazione(data: dict, da_archiviare: Optional[list] = None) -> dict:
+    parametri = _parametri_simulazione(data)
+    eventi = data.get('eventi')
+    
+    if ARCHIVIO is not None and not eventi:
+        with span('archivio_lettura'):
+            salvata = ARCHIVIO.risultato_salvato(*parametri)
+        if salvata is not None:
+            return _aggiungi_stocastico(data, parametri, salvata)
+    
+    risultati = esegui_simulazione(data, parametri)
+    with span('formattazione_json'):
+        output = formatta_risultati_json(risultati)
+    
+    if ARCHIVIO is not None:
+        _, _, impianto, modalita = parametri
+        record = crea_record(risultati, impianto, modalita, data.get('seed'), output)
+        if da_archiviare is not None:
+            da_archiviare.append(record)
+        else:
+            with span('archivio_scrittura'):
+                _archivia([record])
+    
+    if eventi:
+        with span('simulazione_eventi'):
+            output['eventi'] = simula_eventi(
+                risultati,
+                turni=eventi.get('turni', [[0, risultati['ore_per_giorno']]]),
+                tempo_setup=eventi.get('setup_ore', 0.0),
+                mtbf_ore=eventi.get('mtbf_ore'),
+                mttr_ore=eventi.get('mttr_ore'),
+                rng=crea_rng(data.get('seed'))
+            )
+    
+    return _aggiungi_stocastico(data, parametri, output)
+
+
+# Con il campo stocastico la risposta include la distribuzione analitica della durata del lotto,
+# con tempi unitari uniformi sui range dei prodotti e linee assegnate sui tempi medi
+def _aggiungi_stocastico(data: dict, parametri: tuple, output: dict) -> dict:
+    if data.get('stocastico'):
+        quantita, _, impianto, _ = parametri
+        with span('modello_stocastico'):
+            output['stocastico'] = distribuzione_durata_lotto(PRODOTTI, quantita, impianto).riepilogo()
+    return output
+
+
+# Scrittura nell'archivio dal percorso delle richieste: un errore del database (ad esempio
+# bloccato da un altro processo oltre il timeout) viene registrato senza far fallire la risposta
+def _archivia(record: list) -> None:
+    try:
+        ARCHIVIO.inserisci_molti(record)
+    except sqlite3.Error:
+        app.logger.exception("Archiviazione di %d scenari non riuscita", len(record))
+
+
+# Quantità e impianto di uno scenario già validato, dai valori convertiti dallo schema
+def _costruisci_scenario(data: dict) -> tuple:
+    valori, _ = SCHEMA_SCENARIO.valida(data)
+    
+    # Quantità inserite dall'utente
+    quantita = {prodotto: valori[campo] for campo, prodotto in CAMPI_QUANTITA.items()}
+    
+    # Coefficienti linee inseriti dall'utente
+    linee = [specifica.crea_linea(valori[campo]) for campo, specifica in CAMPI_COEFFICIENTI.items()]
+    
+    return quantita, Impianto(linee)
+
+
+# Quantità, tempi, impianto e modalità (intero o frazionato) di uno scenario già validato
+def _parametri_simulazione(data: dict) -> tuple:
+    quantita, impianto = _costruisci_scenario(data)
+    
+    # Tempi di produzione generati automaticamente (riproducibili se è indicato un seed)
+    with span('generazione_parametri'):
+        tempo_per_unita, _ = genera_parametri_configurabili(PRODOTTI, crea_rng(data.get('seed')))
+    
+    # Con il lotto frazionato ogni prodotto può essere ripartito su più linee
+    modalita = 'frazionato' if data.get('frazionato') else 'intero'
+    
+    return quantita, tempo_per_unita, impianto, modalita
+
+
+# Esegue la simulazione di uno scenario già validato
+def esegui_simulazione(data: dict, parametri: Optional[tuple] = None) -> dict:
+    quantita, tempo_per_unita, impianto, modalita = parametri or _parametri_simulazione(data)
+    
+    def calcola():
+        if modalita == 'frazionato':
+            with span('calcolo_lotto'):
+                return calcola_tempo_produzione_lotto_frazionato(quantita, tempo_per_unita, impianto)
+        with span('assegnazione'):
+            assegnazioni_linee = assegna_linee_a_prodotti(PRODOTTI, quantita, tempo_per_unita, impianto)
+        with span('calcolo_lotto'):
+            return calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni_linee)
+    
+    chiave = chiave_simulazione(quantita, tempo_per_unita, impianto, modalita)
+    return CACHE_SIMULAZIONI.ottieni_o_calcola(chiave, calcola)
+
+
+# Sweep dei parametri: {"base": scenario, "dimensioni": {campo: [valori]}, "metodo": "griglia" | "lhs"}.
+# Il risultato è in forma colonnare, una lista di valori per parametro e per durata
+@app.route('/api/sweep', methods=['POST'])
+def sweep():
+    try:
+        data = request.get_json(silent=True)
+        errori = _valida_sweep(data)
         if errori:
             return jsonify({'errore': errori}), 400
         
-        # Quantità inserite dall'utente
-        quantita = {
-            PRODOTTI[0]: int(data['quantita_giacche']),
-            PRODOTTI[1]: int(data['quantita_tshirt']),
-            PRODOTTI[2]: int(data['quantita_felpe']),
-            PRODOTTI[3]: int(data['quantita_pantaloni'])
-        }
-        
-        # Tempi di produzione generati automaticamente
-        tempo_per_unita, _ = genera_parametri_configurabili(PRODOTTI)
-        
-        # Coefficienti linee inseriti dall'utente
-        linee = [
-            LineaProduttiva('A', float(data['coeff_linea_a'])),
-            LineaProduttiva('B', float(data['coeff_linea_b'])),
-            LineaProduttiva('C', float(data['coeff_linea_c'])),
-            LineaProduttiva('D', float(data['coeff_linea_d']))
-        ]
-        impianto = Impianto(linee)
-        
-        assegnazioni_linee = assegna_linee_a_prodotti(PRODOTTI, quantita, tempo_per_unita, impianto)
-        risultati = calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni_linee)
-        
-        return jsonify(formatta_risultati_json(risultati))
+        return _risposta_json(_esegui_sweep(data))
         
     except Exception as e:
-        return jsonify({'errore': f'Errore durante la simulazione: {str(e)}'}), 500
+        return jsonify({'errore': f'Errore durante lo sweep: {str(e)}'}), 500
 
 
-def valida_input_utente(data: dict) -> list:
+def _valida_sweep(data) -> list:
+    if not isinstance(data, dict):
+        return ["Il corpo della richiesta deve essere un oggetto JSON"]
+    
+    base = data.get('base') or {}
+    return valida_input_utente(dict(base, seed=data.get('seed'))) + _valida_dimensioni_sweep(data)
+
+
+# Esegue lo sweep di una richiesta già validata
+def _esegui_sweep(data: dict, avanzamento=None) -> dict:
+    base = data.get('base') or {}
+    quantita, impianto = _costruisci_scenario(base)
+    tempo_per_unita, _ = genera_parametri_configurabili(PRODOTTI, crea_rng(data.get('seed')))
+    linee_per_nome = {linea.nome: linea for linea in impianto.linee}
+    
+    dimensioni = {}
+    for campo, valori in data['dimensioni'].items():
+        if campo in CAMPI_QUANTITA:
+            dimensioni[campo] = (CAMPI_QUANTITA[campo], [int(v) for v in valori])
+        else:
+            dimensioni[campo] = (linee_per_nome[CAMPI_COEFFICIENTI[campo].nome], [float(v) for v in valori])
+    
+    return esegui_sweep(
+        PRODOTTI, quantita, tempo_per_unita, impianto, dimensioni,
+        metodo=data.get('metodo', 'griglia'),
+        n_campioni=int(data.get('n_campioni', 100)),
+        seed=data.get('seed'),
+        avanzamento=avanzamento
+    )
+
+
+def _valida_dimensioni_sweep(data: dict) -> list:
     errori = []
     
-    campi_quantita = {
-        'quantita_giacche': ('Giacche Invernali', 30, 120),
-        'quantita_tshirt': ('T-Shirts', 100, 250),
-        'quantita_felpe': ('Felpe', 65, 190),
-        'quantita_pantaloni': ('Pantaloni', 50, 170)
-    }
+    dimensioni = data.get('dimensioni')
+    if not isinstance(dimensioni, dict) or not dimensioni:
+        return ["Il campo dimensioni deve contenere almeno un parametro"]
     
-    for campo, (nome, min_val, max_val) in campi_quantita.items():
-        if campo not in data or not data[campo] or data[campo] == '':
-            errori.append(f"La quantità di {nome} è obbligatoria")
-            continue
-        
-        try:
-            valore = int(data[campo])
-            if valore < min_val or valore > max_val:
-                errori.append(f"La quantità di {nome} deve essere tra {min_val} e {max_val}")
-        except (ValueError, TypeError):
-            errori.append(f"La quantità di {nome} deve essere un numero intero")
+    n_punti = 1
+    for campo, valori in dimensioni.items():
+        if campo not in CAMPI_QUANTITA and campo not in CAMPI_COEFFICIENTI:
+            errori.append(f"Il parametro {campo} non può essere variato")
+        elif not isinstance(valori, list) or not valori:
+            errori.append(f"I valori di {campo} devono essere una lista non vuota")
+        elif not all(isinstance(v, (int, float)) and not isinstance(v, bool) and v > 0 for v in valori):
+            errori.append(f"I valori di {campo} devono essere numeri maggiori di 0")
+        elif campo in CAMPI_COEFFICIENTI and max(valori) > 2:
+            errori.append(f"I valori di {campo} non possono superare 2.0")
+        else:
+            n_punti *= len(valori)
+    
+    metodo = data.get('metodo', 'griglia')
+    if metodo not in ('griglia', 'lhs'):
+        errori.append("Il metodo deve essere griglia oppure lhs")
+    elif metodo == 'lhs':
+        n_punti = data.get('n_campioni', 100)
+        if not isinstance(n_punti, int) or n_punti <= 0:
+            errori.append("Il numero di campioni deve essere un intero maggiore di 0")
+            return errori
+    
+    if n_punti > MAX_PUNTI_SWEEP:
+        errori.append(f"Lo sweep non può superare {MAX_PUNTI_SWEEP} punti")
+    
+    return errori
+
+
+# Sottomette un lavoro in background: {"tipo": "sweep", ...parametri di /api/sweep}
+# oppure {"tipo": "scenari", "n_scenari": 100000, "seed": 0, "worker": 1, "dimensione_chunk": 1000}
+@app.route('/api/jobs', methods=['POST'])
+def sottometti_lavoro():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'errore': ["Il corpo della richiesta deve essere un oggetto JSON"]}), 400
+    
+    tipo = data.get('tipo')
+    if tipo == 'sweep':
+        errori = _valida_sweep(data)
+        funzione = lambda lavoro: _esegui_sweep(
+            data, avanzamento=lambda completati, totale: lavoro.aggiorna(completati / totale if totale else 1.0)
+        )
+    elif tipo == 'scenari':
+        errori = _valida_lavoro_scenari(data)
+        funzione = lambda lavoro: _esegui_lavoro_scenari(lavoro, data)
+    else:
+        errori = ["Il tipo di lavoro deve essere sweep oppure scenari"]
+    if errori:
+        return jsonify({'errore': errori}), 400
+    
+    try:
+        lavoro = CODA_LAVORI.sottometti(tipo, funzione)
+    except CodaPiena as e:
+        return jsonify({'errore': str(e)}), 429, {'Retry-After': '5'}
+    
+    return jsonify(lavoro.in_dizionario()), 202, {'Location': f'/api/jobs/{lavoro.id}'}
+
+
+def _valida_lavoro_scenari(data: dict) -> list:
+    errori = []
     
-    campi_coeff = {
-        'coeff_linea_a': 'A',
-        'coeff_linea_b': 'B',
-        'coeff_linea_c': 'C',
-        'coeff_linea_d': 'D'
+    n_scenari = data.get('n_scenari')
+    if not isinstance(n_scenari, int) or isinstance(n_scenari, bool) or not 0 < n_scenari <= MAX_SCENARI_LAVORO:
+        errori.append(f"Il numero di scenari deve essere un intero tra 1 e {MAX_SCENARI_LAVORO}")
+    
+    seed = data.get('seed', 0)
+    if not isinstance(seed, int) or isinstance(seed, bool) or seed < 0:
+        errori.append("Il campo seed deve essere un intero maggiore o uguale a 0")
+    
+    for campo, predefinito, massimo in (('worker', 1, MAX_WORKER_LAVORO), ('dimensione_chunk', 1000, MAX_CHUNK_LAVORO)):
+        valore = data.get(campo, predefinito)
+        if not isinstance(valore, int) or isinstance(valore, bool) or not 1 <= valore <= massimo:
+            errori.append(f"Il campo {campo} deve essere un intero tra 1 e {massimo}")
+    
+    return errori
+
+
+# Scenari casuali aggregati: dopo ogni chunk sono pubblicati avanzamento e riepilogo parziale
+def _esegui_lavoro_scenari(lavoro, data: dict) -> dict:
+    n_scenari = data['n_scenari']
+    
+    def avanzamento(aggregatore):
+        lavoro.aggiorna(aggregatore.n_scenari / n_scenari, aggregatore.riepilogo())
+    
+    aggregatore = esegui_scenari_paralleli(
+        PRODOTTI, n_scenari,
+        seed=data.get('seed', 0),
+        n_worker=data.get('worker', 1),
+        dimensione_chunk=data.get('dimensione_chunk', 1000),
+        avanzamento=avanzamento
+    )
+    return aggregatore.riepilogo()
+
+
+# Stato di un lavoro: avanzamento, riepilogo parziale e, una volta completato, risultato
+@app.route('/api/jobs/<id_lavoro>', methods=['GET'])
+def stato_lavoro(id_lavoro):
+    lavoro = CODA_LAVORI.ottieni(id_lavoro)
+    if lavoro is None:
+        return jsonify({'errore': f"Lavoro {id_lavoro} non trovato"}), 404
+    return _risposta_json(lavoro.in_dizionario())
+
+
+@app.route('/api/jobs/<id_lavoro>', methods=['DELETE'])
+def annulla_lavoro(id_lavoro):
+    lavoro = CODA_LAVORI.annulla(id_lavoro)
+    if lavoro is None:
+        return jsonify({'errore': f"Lavoro {id_lavoro} non trovato"}), 404
+    return jsonify(lavoro.in_dizionario())
+
+
+@app.route('/api/jobs', methods=['GET'])
+def statistiche_lavori():
+    return jsonify(CODA_LAVORI.statistiche())
+
+
+# Durate degli span della pipeline in formato Prometheus (con STRUMENTAZIONE=1)
+@app.route('/metrics', methods=['GET'])
+def metriche():
+    risposta = Response(REGISTRO.formato_prometheus(), mimetype='text/plain; version=0.0.4')
+    # Metriche e cache sono del singolo processo: con più worker l'header indica quale ha risposto
+    risposta.headers['X-Worker-Pid'] = str(os.getpid())
+    return risposta
+
+
+# Ricerca negli scenari archiviati, con filtri facoltativi nella query string. Ad esempio
+# /api/scenari?linea=d&coefficiente_massimo=0.89&durata_minima_ore=120
+# restituisce gli scenari in cui la linea D sotto 0.9 ha portato il lotto oltre 5 giorni
+@app.route('/api/scenari', methods=['GET'])
+def cerca_scenari():
+    if ARCHIVIO is None:
+        return jsonify({'errore': "Archivio degli scenari non configurato (ARCHIVIO_SCENARI)"}), 503
+    
+    filtri, errori = SCHEMA_RICERCA.valida(request.args.to_dict())
+    errori = [errore.messaggio for errore in errori]
+    
+    id_linea, id_prodotto = request.args.get('linea'), request.args.get('prodotto')
+    if id_linea is not None:
+        if id_linea in LINEE_PER_ID:
+            filtri['linea'] = LINEE_PER_ID[id_linea].nome
+        else:
+            errori.append(f"Linea sconosciuta: {id_linea}")
+    if id_prodotto is not None:
+        if id_prodotto in PRODOTTI_PER_ID:
+            filtri['prodotto'] = PRODOTTI_PER_ID[id_prodotto].nome
+        else:
+            errori.append(f"Prodotto sconosciuto: {id_prodotto}")
+    if request.args.get('modalita') is not None:
+        filtri['modalita'] = request.args['modalita']
+    if errori:
+        return jsonify({'errore': errori}), 400
+    
+    try:
+        with span('archivio_ricerca'):
+            scenari = ARCHIVIO.cerca(**filtri)
+    except ValueError as e:
+        return jsonify({'errore': [str(e)]}), 400
+    
+    return _risposta_json({'n_scenari': len(scenari), 'scenari': scenari})
+
+
+# Con più worker le route con stato in memoria non sono disponibili: piani e lavori
+# resterebbero nel solo processo che li ha creati
+@app.before_request
+def _verifica_processo_unico():
+    if STATO_PROCESSO['worker'] > 1 and request.path.startswith(ROUTE_PROCESSO_UNICO):
+        return jsonify({
+            'errore': "Piani e lavori sono conservati in memoria nel processo e richiedono "
+                      "un solo worker (server.py --worker 1)"
+        }), 503
+
+
+# Prontezza del processo: 200 quando accetta richieste, 503 durante l'avvio o l'arresto
+@app.route('/pronto', methods=['GET'])
+def pronto():
+    stato = {
+        'pronto': STATO_PROCESSO['pronto'],
+        'pid': os.getpid(),
+        'worker': STATO_PROCESSO['worker'],
+        'attivo_da_secondi': round(time.time() - STATO_PROCESSO['avviato'], 1)
     }
+    return jsonify(stato), 200 if STATO_PROCESSO['pronto'] else 503
+
+
+@app.route('/api/cache', methods=['GET'])
+def statistiche_cache():
+    risposta = jsonify(CACHE_SIMULAZIONI.statistiche())
+    risposta.headers['X-Worker-Pid'] = str(os.getpid())
+    return risposta
+
+
+# Crea un pianificatore multi-lotto: coefficienti delle linee, seed, metodo e orizzonte
+@app.route('/api/piani', methods=['POST'])
+def crea_piano():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'errore': ["Il corpo della richiesta deve essere un oggetto JSON"]}), 400
+    
+    valori, errori = SCHEMA_IMPIANTO.valida(data)
+    errori = [errore.messaggio for errore in errori]
+    metodo = data.get('metodo', 'greedy')
+    if metodo not in METODI_ASSEGNAZIONE:
+        errori.append(f"Il metodo deve essere uno tra {', '.join(METODI_ASSEGNAZIONE)}")
+    orizzonte = data.get('orizzonte', 5)
+    if not isinstance(orizzonte, int) or isinstance(orizzonte, bool) or orizzonte <= 0:
+        errori.append("L'orizzonte deve essere un intero maggiore di 0")
+    if errori:
+        return jsonify({'errore': errori}), 400
+    
+    linee = [specifica.crea_linea(valori[campo]) for campo, specifica in CAMPI_COEFFICIENTI.items()]
+    tempo_per_unita, _ = genera_parametri_configurabili(PRODOTTI, crea_rng(data.get('seed')))
+    pianificatore = PianificatoreLotti(
+        PRODOTTI, tempo_per_unita, Impianto(linee), metodo=metodo, orizzonte=orizzonte, max_lotti=MAX_LOTTI_PIANO
+    )
     
-    for campo, linea_nome in campi_coeff.items():
-        if campo not in data or not data[campo] or data[campo] == '':
-            errori.append(f"Il coefficiente della Linea {linea_nome} è obbligatorio")
-            continue
+    id_piano = uuid.uuid4().hex
+    with LOCK_PIANI:
+        PIANI[id_piano] = pianificatore
+        while len(PIANI) > MAX_PIANI:
+            PIANI.popitem(last=False)
+        return jsonify({'id': id_piano, **pianificatore.piano()}), 201
+
+
+# Esegue un'operazione sul pianificatore e restituisce il piano aggiornato
+def _operazione_piano(id_piano: str, operazione):
+    with LOCK_PIANI:
+        pianificatore = PIANI.get(id_piano)
+        if pianificatore is None:
+            return jsonify({'errore': f"Piano {id_piano} non trovato"}), 404
+        PIANI.move_to_end(id_piano)
         
         try:
-            valore = float(data[campo])
-            if valore <= 0 or valore > 2:
-                errori.append(f"Il coefficiente della Linea {linea_nome} deve essere tra 0.1 e 2.0")
-        except (ValueError, TypeError):
-            errori.append(f"Il coefficiente della Linea {linea_nome} deve essere un numero valido")
+            operazione(pianificatore)
+        except KeyError as e:
+            return jsonify({'errore': f"Lotto {e.args[0]} non trovato"}), 404
+        except ValueError as e:
+            return jsonify({'errore': str(e)}), 409
+        
+        return jsonify({'id': id_piano, **pianificatore.piano()})
+
+
+@app.route('/api/piani/<id_piano>', methods=['GET'])
+def leggi_piano(id_piano):
+    return _operazione_piano(id_piano, lambda pianificatore: None)
+
+
+# Aggiunge un lotto: quantità dei prodotti, id e posizione facoltativi
+@app.route('/api/piani/<id_piano>/lotti', methods=['POST'])
+def aggiungi_lotto(id_piano):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'errore': ["Il corpo della richiesta deve essere un oggetto JSON"]}), 400
+    
+    valori, errori = SCHEMA_LOTTO.valida(data)
+    errori = [errore.messaggio for errore in errori]
+    posizione = data.get('posizione')
+    if posizione is not None and (not isinstance(posizione, int) or isinstance(posizione, bool) or posizione < 0):
+        errori.append("La posizione deve essere un intero non negativo")
+    if errori:
+        return jsonify({'errore': errori}), 400
+    
+    quantita = {prodotto: valori[campo] for campo, prodotto in CAMPI_QUANTITA.items()}
+    id_lotto = data.get('id')
+    return _operazione_piano(
+        id_piano,
+        lambda pianificatore: pianificatore.aggiungi_lotto(
+            quantita, str(id_lotto) if id_lotto is not None else None, posizione
+        )
+    )
+
+
+@app.route('/api/piani/<id_piano>/lotti/<id_lotto>', methods=['DELETE'])
+def annulla_lotto(id_piano, id_lotto):
+    return _operazione_piano(id_piano, lambda pianificatore: pianificatore.annulla_lotto(id_lotto))
+
+
+# Variazione del coefficiente di una linea del catalogo: {"coefficiente": 1.1}
+@app.route('/api/piani/<id_piano>/linee/<id_linea>', methods=['PUT'])
+def aggiorna_linea_piano(id_piano, id_linea):
+    data = request.get_json(silent=True) or {}
+    specifica = CAMPI_COEFFICIENTI.get(f"coeff_linea_{id_linea}")
+    if specifica is None:
+        return jsonify({'errore': f"Linea {id_linea} non trovata"}), 404
+    
+    coefficiente = data.get('coefficiente')
+    if not isinstance(coefficiente, (int, float)) or isinstance(coefficiente, bool) or not 0 < coefficiente <= 2:
+        return jsonify({'errore': [f"Il coefficiente della Linea {specifica.nome} deve essere tra 0.1 e 2.0"]}), 400
+    
+    return _operazione_piano(
+        id_piano, lambda pianificatore: pianificatore.aggiorna_coefficiente(specifica.nome, float(coefficiente))
+    )
+
+
+# Avanza il tempo corrente del piano: {"tempo_ore": 120}
+@app.route('/api/piani/<id_piano>/avanza', methods=['POST'])
+def avanza_piano(id_piano):
+    data = request.get_json(silent=True) or {}
+    tempo_ore = data.get('tempo_ore')
+    if not isinstance(tempo_ore, (int, float)) or isinstance(tempo_ore, bool) or tempo_ore < 0:
+        return jsonify({'errore': ["Il tempo deve essere un numero non negativo"]}), 400
+    
+    return _operazione_piano(id_piano, lambda pianificatore: pianificatore.avanza(float(tempo_ore)))
+
+
+# Quantità massime producibili entro una scadenza: {"scadenza_giorni": 10 (o "scadenza_ore"),
+# "mix": {"giacche": 1, "tshirt": 3}, "minimi": {"felpe": 50}, "metodo": "greedy", coefficienti e seed}
+@app.route('/api/capacita', methods=['POST'])
+def capacita():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'errore': ["Il corpo della richiesta deve essere un oggetto JSON"]}), 400
+    
+    valori, errori = SCHEMA_IMPIANTO.valida(data)
+    errori = [errore.messaggio for errore in errori]
+    
+    scadenza_ore, scadenza_giorni = data.get('scadenza_ore'), data.get('scadenza_giorni')
+    if (scadenza_ore is None) == (scadenza_giorni is None):
+        errori.append("Indicare uno tra scadenza_ore e scadenza_giorni")
+    elif not _numero_positivo(scadenza_ore if scadenza_ore is not None else scadenza_giorni):
+        errori.append("La scadenza deve essere un numero maggiore di 0")
+    elif (scadenza_ore if scadenza_ore is not None else scadenza_giorni * 24) > MAX_SCADENZA_ORE:
+        errori.append(f"La scadenza può essere al massimo di {MAX_SCADENZA_ORE // 24} giorni")
+    
+    mix = _valori_per_prodotto(data.get('mix'), 'mix', errori, intero=False)
+    minimi = _valori_per_prodotto(data.get('minimi'), 'minimi', errori, intero=True)
+    if mix is not None and not any(mix.values()):
+        errori.append("Il mix deve avere almeno un peso maggiore di 0")
+    
+    metodo = data.get('metodo', 'greedy')
+    if metodo not in METODI_ASSEGNAZIONE:
+        errori.append(f"Il metodo deve essere uno tra {', '.join(METODI_ASSEGNAZIONE)}")
+    if errori:
+        return jsonify({'errore': errori}), 400
+    
+    linee = [specifica.crea_linea(valori[campo]) for campo, specifica in CAMPI_COEFFICIENTI.items()]
+    tempo_per_unita, _ = genera_parametri_configurabili(PRODOTTI, crea_rng(data.get('seed')))
+    if scadenza_ore is None:
+        scadenza_ore = scadenza_giorni * 24
+    
+    try:
+        with span('capacita'):
+            risultato = quantita_massime(
+                PRODOTTI, tempo_per_unita, Impianto(linee), float(scadenza_ore), mix, minimi, metodo
+            )
+    except ValueError as e:
+        return jsonify({'errore': [str(e)]}), 400
+    
+    return _risposta_json({
+        'fattibile': risultato['fattibile'],
+        'scadenza_ore': risultato['scadenza_ore'],
+        'quantita': {prodotto.id: q for prodotto, q in risultato['quantita'].items()},
+        'totale_capi': risultato['totale_capi'],
+        'margine_ore': risultato['margine_ore'],
+        'valutazioni': risultato['valutazioni'],
+        **formatta_risultati_json(risultato['risultati'])
+    })
+
+
+# Valori per id di prodotto (mix o minimi): numeri non negativi fino a MAX_VALORE_PER_PRODOTTO,
+# prodotti del catalogo; None se assenti o non validi
+def _valori_per_prodotto(valori, nome: str, errori: list, intero: bool):
+    if valori is None:
+        return None
+    if not isinstance(valori, dict):
+        errori.append(f"Il campo {nome} deve essere un oggetto JSON")
+        return None
+    
+    tipi = int if intero else (int, float)
+    convertiti = {}
+    for id_prodotto, valore in valori.items():
+        prodotto = PRODOTTI_PER_ID.get(id_prodotto)
+        if prodotto is None:
+            errori.append(f"Prodotto sconosciuto in {nome}: {id_prodotto}")
+        elif not isinstance(valore, tipi) or isinstance(valore, bool) or not 0 <= valore <= MAX_VALORE_PER_PRODOTTO:
+            errori.append(
+                f"I valori di {nome} devono essere {'interi' if intero else 'numeri'} tra 0 e {MAX_VALORE_PER_PRODOTTO}"
+            )
+        else:
+            convertiti[prodotto] = valore
+    return convertiti if len(convertiti) == len(valori) else None
+
+
+def valida_input_utente(data: dict) -> list:
+    return [errore.messaggio for errore in _valida_scenario(data)]
+
+
+# Errori strutturati (campo, codice, messaggio) di uno scenario
+def _valida_scenario(data) -> list:
+    _, errori = SCHEMA_SCENARIO.valida(data)
+    
+    if isinstance(data, dict) and data.get('eventi') is not None:
+        errori += [ErroreValidazione('eventi', FUORI_RANGE, messaggio) for messaggio in _valida_eventi(data['eventi'])]
+    
+    # Il modello stocastico richiede che ogni prodotto sia su una sola linea
+    if isinstance(data, dict) and data.get('stocastico') and data.get('frazionato'):
+        errori.append(ErroreValidazione('stocastico', FUORI_RANGE, "La distribuzione stocastica non è disponibile con il lotto frazionato"))
     
     return errori
 
 
-def formatta_risultati_json(risultati):
-    output = {
-        'risultati_prodotti': [],
-        'capacita_complessiva': risultati['capacita_giornaliera_complessiva'],
-        'durata_lotto_ore': risultati['durata_lotto_ore'],
-        'durata_lotto_giorni': risultati['durata_lotto_giorni']
-    }
+# Risposta JSON senza spazi; con ?formato=compatto numeri arrotondati e liste di oggetti in colonne
+def _risposta_json(dati, stato: int = 200):
+    if request.args.get('formato') == 'compatto':
+        dati = compatta(dati)
+    return app.response_class(serializza(dati), status=stato, mimetype='application/json')
+
+
+# Risposte JSON riuscite: ETag sul contenuto (304 se il client ha già la stessa risposta,
+# solo per GET, HEAD e le POST di calcolo) e compressione br/gzip negoziata con Accept-Encoding.
+# Gli scenari da archiviare della richiesta sono scritti solo se la risposta non è un 304
+@app.after_request
+def _negozia_risposta(risposta):
+    da_archiviare = g.pop('da_archiviare', None)
+    if risposta.status_code != 200 or risposta.mimetype != 'application/json' or risposta.is_streamed:
+        return risposta
     
-    for prodotto, qta in risultati['quantita'].items():
-        linea = risultati['assegnazioni_linee'][prodotto]
-        dati = risultati['risultati_per_prodotto'][prodotto]
-        
-        output['risultati_prodotti'].append({
-            'prodotto': prodotto.nome,
-            'quantita': qta,
-            'tempo_teorico': risultati['tempo_per_unita'][prodotto],
-            'linea': linea.nome,
-            'efficienza': linea.coefficiente_efficienza,
-            'tempo_effettivo': dati['tempo_effettivo'],
-            'capacita_giornaliera': dati['capacita_giornaliera'],
-            'ore_totali': dati['ore_totali'],
-            'giorni_necessari': dati['giorni_necessari']
-        })
+    corpo = risposta.get_data()
+    codifica = scegli_codifica(request.accept_encodings) if len(corpo) >= SOGLIA_COMPRESSIONE else None
+    etag = calcola_etag(corpo, codifica)
+    risposta.set_etag(etag)
+    risposta.vary.add('Accept-Encoding')
     
-    return output
+    sicura = request.method in ('GET', 'HEAD') or request.endpoint in ENDPOINT_CALCOLO
+    if sicura and request.if_none_match.contains(etag):
+        risposta.status_code = 304
+        risposta.set_data(b'')
+        return risposta
+    
+    if da_archiviare:
+        with span('archivio_scrittura'):
+            _archivia(da_archiviare)
+    
+    if codifica is not None:
+        risposta.set_data(comprimi(corpo, codifica))
+        risposta.headers['Content-Encoding'] = codifica
+    return risposta
+
+
+# Risposta 400 con i messaggi (campo errore, usato dal form) e gli errori strutturati
+def _risposta_errori(errori: list):
+    return jsonify({
+        'errore': [errore.messaggio for errore in errori],
+        'errori': [errore.in_dizionario() for errore in errori]
+    }), 400
+
+
+def _numero_positivo(valore) -> bool:
+    return isinstance(valore, (int, float)) and not isinstance(valore, bool) and valore > 0
+
+
+# Parametri della simulazione a eventi: {"turni": [[6, 14], [14, 22]], "setup_ore": 0.5,
+# "mtbf_ore": 200, "mttr_ore": 4}; tutti facoltativi
+def _valida_eventi(eventi) -> list:
+    if not isinstance(eventi, dict):
+        return ["Il campo eventi deve essere un oggetto JSON"]
+    
+    errori = []
+    
+    turni = eventi.get('turni')
+    if turni is not None:
+        try:
+            CalendarioTurni([(inizio, fine) for inizio, fine in turni])
+        except (ValueError, TypeError):
+            errori.append("I turni devono essere intervalli [inizio, fine] con ore tra 0 e 24")
+    
+    # Infinity e NaN, accettati da json.loads, non superano i confronti con i limiti
+    setup = eventi.get('setup_ore', 0)
+    if not isinstance(setup, (int, float)) or isinstance(setup, bool) or not 0 <= setup <= MAX_SETUP_ORE:
+        errori.append(f"Il tempo di setup deve essere un numero tra 0 e {MAX_SETUP_ORE:g} ore")
+    
+    # Il minimo di mtbf_ore dipende dalla durata del lotto ed è verificato da simula_eventi
+    mtbf, mttr = eventi.get('mtbf_ore'), eventi.get('mttr_ore')
+    if (mtbf is None) != (mttr is None):
+        errori.append("mtbf_ore e mttr_ore devono essere indicati insieme")
+    elif mtbf is not None and not (
+        _numero_positivo(mtbf) and math.isfinite(mtbf) and _numero_positivo(mttr) and mttr <= MAX_MTTR_ORE
+    ):
+        errori.append(f"mtbf_ore e mttr_ore devono essere numeri finiti maggiori di 0, mttr_ore al massimo {MAX_MTTR_ORE:g}")
+    
+    return errori
 
 
 if __name__ == '__main__':
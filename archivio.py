@@ -0,0 +1,362 @@
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models import Prodotto, Impianto
+from cache import chiave_simulazione
+from produzione import (
+    genera_quantita_produzione,
+    genera_parametri_configurabili,
+    assegna_linee_a_prodotti,
+    calcola_tempo_produzione_lotto,
+)
+from parallelo import seme_scenario
+
+
+# Scenari inseriti per transazione negli inserimenti massivi
+DIMENSIONE_TRANSAZIONE = 1000
+
+# Righe restituite al massimo da una ricerca
+LIMITE_RICERCA = 1000
+
+# Secondi di attesa quando il database è bloccato da un altro processo (worker del server)
+TIMEOUT_BLOCCO = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenari (
+    id INTEGER PRIMARY KEY,
+    chiave BLOB NOT NULL UNIQUE,
+    modalita TEXT NOT NULL,
+    seed INTEGER,
+    durata_lotto_ore REAL NOT NULL,
+    durata_lotto_giorni REAL NOT NULL,
+    capacita_complessiva INTEGER NOT NULL,
+    creato REAL NOT NULL,
+    risultato TEXT
+);
+CREATE TABLE IF NOT EXISTS scenari_linee (
+    scenario_id INTEGER NOT NULL REFERENCES scenari(id) ON DELETE CASCADE,
+    linea TEXT NOT NULL,
+    coefficiente REAL NOT NULL,
+    carico_ore REAL NOT NULL,
+    PRIMARY KEY (scenario_id, linea)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS scenari_prodotti (
+    scenario_id INTEGER NOT NULL REFERENCES scenari(id) ON DELETE CASCADE,
+    prodotto TEXT NOT NULL,
+    quantita INTEGER NOT NULL,
+    tempo_teorico REAL NOT NULL,
+    linea TEXT NOT NULL,
+    ore_totali REAL NOT NULL,
+    PRIMARY KEY (scenario_id, prodotto)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_scenari_durata ON scenari (durata_lotto_ore);
+CREATE INDEX IF NOT EXISTS idx_linee_coefficiente ON scenari_linee (linea, coefficiente, scenario_id);
+CREATE INDEX IF NOT EXISTS idx_prodotti_quantita ON scenari_prodotti (prodotto, quantita, scenario_id);
+"""
+
+
+# Scenario pronto per l'inserimento: riga di scenari, righe delle linee e righe dei prodotti
+Record = Tuple[tuple, List[tuple], List[tuple]]
+
+
+# Carico in ore di ogni linea: somma delle ore dei prodotti assegnati
+# o, per il lotto frazionato, delle quote prodotte sulla linea
+def _carico_linee(risultati: Dict[str, object]) -> Dict[str, float]:
+    carico: Dict[str, float] = {}
+    for dati in risultati['risultati_per_prodotto'].values():
+        if 'ripartizione' in dati:
+            for quota in dati['ripartizione']:
+                carico[quota['linea'].nome] = carico.get(quota['linea'].nome, 0) + quota['ore_totali']
+        else:
+            nome = dati['linea_assegnata'].nome
+            carico[nome] = carico.get(nome, 0) + dati['ore_totali']
+    return carico
+
+
+# Impronta a 128 bit della chiave della simulazione: l'indice univoco resta compatto
+def _impronta(chiave: tuple) -> bytes:
+    return hashlib.blake2b(repr(chiave).encode(), digest_size=16).digest()
+
+
+# Converte un risultato del lotto in un record; risposta è il JSON restituito al client,
+# conservato per essere riusato senza ricalcolo
+def crea_record(
+    risultati: Dict[str, object],
+    impianto: Impianto,
+    modalita: str = 'intero',
+    seed: Optional[int] = None,
+    risposta: Optional[dict] = None
+) -> Record:
+
+    chiave = _impronta(chiave_simulazione(risultati['quantita'], risultati['tempo_per_unita'], impianto, modalita))
+    scenario = (
+        chiave,
+        modalita,
+        seed,
+        risultati['durata_lotto_ore'],
+        risultati['durata_lotto_giorni'],
+        risultati['capacita_giornaliera_complessiva'],
+        time.time(),
+        json.dumps(risposta, separators=(',', ':')) if risposta is not None else None
+    )
+
+    carico = _carico_linee(risultati)
+    linee = [(linea.nome, linea.coefficiente_efficienza, round(carico.get(linea.nome, 0), 2)) for linea in impianto.linee]
+
+    prodotti = [
+        (
+            prodotto.nome,
+            quantita,
+            risultati['tempo_per_unita'][prodotto],
+            risultati['risultati_per_prodotto'][prodotto]['linea_assegnata'].nome,
+            risultati['risultati_per_prodotto'][prodotto]['ore_totali']
+        )
+        for prodotto, quantita in risultati['quantita'].items()
+    ]
+
+    return scenario, linee, prodotti
+
+
+# Archivio degli scenari simulati su SQLite: ingressi e risultati di ogni scenario, con indici
+# per prodotto, linea, coefficiente e durata. Una sola connessione protetta da un lock,
+# condivisa tra i thread; gli scenari già presenti (stessa chiave) non vengono duplicati
+class ArchivioScenari:
+
+    def __init__(self, percorso: str = ':memory:'):
+        self.percorso = percorso
+        self._connessione = sqlite3.connect(
+            percorso, timeout=TIMEOUT_BLOCCO, check_same_thread=False, isolation_level=None
+        )
+        self._lock = threading.Lock()
+
+        with self._lock:
+            if percorso != ':memory:':
+                self._connessione.execute('PRAGMA journal_mode=WAL')
+                self._connessione.execute('PRAGMA synchronous=NORMAL')
+            self._connessione.execute('PRAGMA foreign_keys=ON')
+            self._connessione.executescript(_SCHEMA)
+
+    def salva(
+        self,
+        risultati: Dict[str, object],
+        impianto: Impianto,
+        modalita: str = 'intero',
+        seed: Optional[int] = None,
+        risposta: Optional[dict] = None
+    ) -> int:
+        return self.inserisci_molti([crea_record(risultati, impianto, modalita, seed, risposta)])
+
+    # Inserisce i record in transazioni da dimensione_transazione scenari; restituisce i nuovi scenari
+    def inserisci_molti(self, record: Iterable[Record], dimensione_transazione: int = DIMENSIONE_TRANSAZIONE) -> int:
+        inseriti = 0
+        blocco = []
+        for elemento in record:
+            blocco.append(elemento)
+            if len(blocco) >= dimensione_transazione:
+                inseriti += self._inserisci_blocco(blocco)
+                blocco = []
+        if blocco:
+            inseriti += self._inserisci_blocco(blocco)
+        return inseriti
+
+    # Un blocco in una transazione: gli scenari già archiviati (o ripetuti nel blocco) sono scartati,
+    # agli altri viene assegnato l'id prima dell'inserimento, così ogni tabella riceve un solo executemany
+    def _inserisci_blocco(self, blocco: List[Record]) -> int:
+        with self._lock:
+            cursore = self._connessione.cursor()
+            # Lock di scrittura preso subito: con BEGIN differito il passaggio dalla lettura
+            # di MAX(id) alla scrittura fallisce senza attesa se un altro processo sta scrivendo
+            cursore.execute('BEGIN IMMEDIATE')
+            try:
+                chiavi = [scenario[0] for scenario, _, _ in blocco]
+                esistenti = set()
+                for inizio in range(0, len(chiavi), 500):
+                    parte = chiavi[inizio:inizio + 500]
+                    esistenti.update(riga[0] for riga in cursore.execute(
+                        f"SELECT chiave FROM scenari WHERE chiave IN ({', '.join('?' * len(parte))})", parte
+                    ))
+
+                id_scenario = cursore.execute('SELECT COALESCE(MAX(id), 0) FROM scenari').fetchone()[0]
+                righe_scenari, righe_linee, righe_prodotti = [], [], []
+                for scenario, linee, prodotti in blocco:
+                    if scenario[0] in esistenti:
+                        continue
+                    esistenti.add(scenario[0])
+                    id_scenario += 1
+                    righe_scenari.append((id_scenario, *scenario))
+                    righe_linee.extend((id_scenario, *linea) for linea in linee)
+                    righe_prodotti.extend((id_scenario, *prodotto) for prodotto in prodotti)
+
+                cursore.executemany('INSERT INTO scenari VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', righe_scenari)
+                cursore.executemany('INSERT INTO scenari_linee VALUES (?, ?, ?, ?)', righe_linee)
+                cursore.executemany('INSERT INTO scenari_prodotti VALUES (?, ?, ?, ?, ?, ?)', righe_prodotti)
+                cursore.execute('COMMIT')
+            except BaseException:
+                cursore.execute('ROLLBACK')
+                raise
+        return len(righe_scenari)
+
+    # Risposta conservata per uno scenario con gli stessi ingressi, se presente
+    def risultato_salvato(
+        self,
+        quantita: Dict[Prodotto, int],
+        tempo_per_unita: Dict[Prodotto, float],
+        impianto: Impianto,
+        modalita: str = 'intero'
+    ) -> Optional[dict]:
+        chiave = _impronta(chiave_simulazione(quantita, tempo_per_unita, impianto, modalita))
+        with self._lock:
+            riga = self._connessione.execute(
+                'SELECT risultato FROM scenari WHERE chiave = ? AND risultato IS NOT NULL', (chiave,)
+            ).fetchone()
+        return json.loads(riga[0]) if riga else None
+
+    # Ricerca per parametri, tutti facoltativi e con estremi inclusi. Ad esempio gli scenari
+    # in cui la linea D sotto 0.9 ha portato il lotto oltre 5 giorni:
+    # cerca(linea='D', coefficiente_massimo=0.89, durata_minima_ore=120)
+    def cerca(
+        self,
+        linea: Optional[str] = None,
+        coefficiente_minimo: Optional[float] = None,
+        coefficiente_massimo: Optional[float] = None,
+        prodotto: Optional[str] = None,
+        quantita_minima: Optional[int] = None,
+        quantita_massima: Optional[int] = None,
+        durata_minima_ore: Optional[float] = None,
+        durata_massima_ore: Optional[float] = None,
+        modalita: Optional[str] = None,
+        limite: int = 100
+    ) -> List[Dict[str, object]]:
+
+        if (coefficiente_minimo is not None or coefficiente_massimo is not None) and linea is None:
+            raise ValueError("Il filtro sul coefficiente richiede la linea")
+        if (quantita_minima is not None or quantita_massima is not None) and prodotto is None:
+            raise ValueError("Il filtro sulla quantità richiede il prodotto")
+
+        condizioni = []
+        parametri: list = []
+
+        def aggiungi(condizione: str, valore) -> None:
+            if valore is not None:
+                condizioni.append(condizione)
+                parametri.append(valore)
+
+        if linea is not None:
+            filtro = ['l.linea = ?']
+            parametri.append(linea)
+            for condizione, valore in (('l.coefficiente >= ?', coefficiente_minimo), ('l.coefficiente <= ?', coefficiente_massimo)):
+                if valore is not None:
+                    filtro.append(condizione)
+                    parametri.append(valore)
+            condizioni.append(
+                f"s.id IN (SELECT l.scenario_id FROM scenari_linee l WHERE {' AND '.join(filtro)})"
+            )
+
+        if prodotto is not None:
+            filtro = ['p.prodotto = ?']
+            parametri.append(prodotto)
+            for condizione, valore in (('p.quantita >= ?', quantita_minima), ('p.quantita <= ?', quantita_massima)):
+                if valore is not None:
+                    filtro.append(condizione)
+                    parametri.append(valore)
+            condizioni.append(
+                f"s.id IN (SELECT p.scenario_id FROM scenari_prodotti p WHERE {' AND '.join(filtro)})"
+            )
+
+        aggiungi('s.durata_lotto_ore >= ?', durata_minima_ore)
+        aggiungi('s.durata_lotto_ore <= ?', durata_massima_ore)
+        aggiungi('s.modalita = ?', modalita)
+
+        dove = f"WHERE {' AND '.join(condizioni)}" if condizioni else ''
+        parametri.append(min(limite, LIMITE_RICERCA))
+
+        with self._lock:
+            scenari = self._connessione.execute(
+                'SELECT s.id, s.modalita, s.seed, s.durata_lotto_ore, s.durata_lotto_giorni, s.capacita_complessiva, '
+                f's.creato FROM scenari s {dove} ORDER BY s.id LIMIT ?',
+                parametri
+            ).fetchall()
+            if not scenari:
+                return []
+
+            segnaposto = ', '.join('?' * len(scenari))
+            id_scenari = [riga[0] for riga in scenari]
+            linee = self._connessione.execute(
+                f'SELECT scenario_id, linea, coefficiente, carico_ore FROM scenari_linee '
+                f'WHERE scenario_id IN ({segnaposto})', id_scenari
+            ).fetchall()
+            prodotti = self._connessione.execute(
+                f'SELECT scenario_id, prodotto, quantita, tempo_teorico, linea, ore_totali FROM scenari_prodotti '
+                f'WHERE scenario_id IN ({segnaposto})', id_scenari
+            ).fetchall()
+
+        risultati = {
+            riga[0]: {
+                'id': riga[0],
+                'modalita': riga[1],
+                'seed': riga[2],
+                'durata_lotto_ore': riga[3],
+                'durata_lotto_giorni': riga[4],
+                'capacita_complessiva': riga[5],
+                'creato': riga[6],
+                'linee': [],
+                'prodotti': []
+            }
+            for riga in scenari
+        }
+        for id_scenario, nome, coefficiente, carico_ore in linee:
+            risultati[id_scenario]['linee'].append({'linea': nome, 'coefficiente': coefficiente, 'carico_ore': carico_ore})
+        for id_scenario, nome, quantita, tempo_teorico, nome_linea, ore_totali in prodotti:
+            risultati[id_scenario]['prodotti'].append({
+                'prodotto': nome,
+                'quantita': quantita,
+                'tempo_teorico': tempo_teorico,
+                'linea': nome_linea,
+                'ore_totali': ore_totali
+            })
+        return list(risultati.values())
+
+    def statistiche(self) -> Dict[str, object]:
+        with self._lock:
+            n_scenari, minima, massima = self._connessione.execute(
+                'SELECT COUNT(*), MIN(durata_lotto_ore), MAX(durata_lotto_ore) FROM scenari'
+            ).fetchone()
+        return {'percorso': self.percorso, 'scenari': n_scenari, 'durata_minima_ore': minima, 'durata_massima_ore': massima}
+
+    def chiudi(self) -> None:
+        with self._lock:
+            self._connessione.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connessione.execute('SELECT COUNT(*) FROM scenari').fetchone()[0]
+
+    def __repr__(self) -> str:
+        return f"<ArchivioScenari {self.percorso}>"
+
+
+# Simula n_scenari scenari casuali e li archivia in transazioni, con gli stessi semi
+# di parallelo.esegui_scenari_paralleli; restituisce il numero di scenari nuovi
+def archivia_scenari(
+    prodotti: List[Prodotto],
+    n_scenari: int,
+    archivio: ArchivioScenari,
+    seed: int = 0,
+    ore_per_giorno: int = 24
+) -> int:
+
+    def record():
+        for indice in range(n_scenari):
+            rng = random.Random(seme_scenario(seed, indice))
+            quantita = genera_quantita_produzione(prodotti, rng)
+            tempo_per_unita, impianto = genera_parametri_configurabili(prodotti, rng)
+            assegnazioni_linee = assegna_linee_a_prodotti(prodotti, quantita, tempo_per_unita, impianto)
+            risultati = calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni_linee, ore_per_giorno)
+            yield crea_record(risultati, impianto)
+
+    return archivio.inserisci_molti(record())
@@ -0,0 +1,334 @@
+from typing import Callable, Dict, List, Optional
+
+from models import Prodotto, LineaProduttiva, Impianto
+from produzione import _arrotonda_tempo_in_minuti
+
+
+# Funzione per calcolare la matrice delle ore totali (prodotti x linee) con lo stesso arrotondamento del lotto
+def matrice_costi(
+    prodotti: List[Prodotto],
+    quantita: Dict[Prodotto, int],
+    tempo_per_unita: Dict[Prodotto, float],
+    linee: List[LineaProduttiva]
+) -> List[List[float]]:
+
+    return [
+        [
+            round(quantita[prodotto] * _arrotonda_tempo_in_minuti(tempo_per_unita[prodotto] / linea.coefficiente_efficienza), 2)
+            for linea in linee
+        ]
+        for prodotto in prodotti
+    ]
+
+
+# Durata del lotto per un'assegnazione espressa come indice di linea per ogni prodotto
+def calcola_makespan(costi: List[List[float]], indici_linee: List[int]) -> float:
+
+    carico_linee = {}
+    for p, l in enumerate(indici_linee):
+        carico_linee[l] = carico_linee.get(l, 0) + costi[p][l]
+    return round(max(carico_linee.values()), 2)
+
+
+# Assegnazione greedy: prodotto con più carico alla linea con efficienza migliore
+def _assegna_greedy(
+    prodotti: List[Prodotto],
+    quantita: Dict[Prodotto, int],
+    tempo_per_unita: Dict[Prodotto, float],
+    linee: List[LineaProduttiva],
+    costi: Optional[List[List[float]]] = None
+) -> List[int]:
+
+    if len(prodotti) > len(linee):
+        raise ValueError("L'assegnazione greedy richiede almeno una linea per prodotto")
+
+    carico_lavoro = [quantita[prodotto] * tempo_per_unita[prodotto] for prodotto in prodotti]
+    prodotti_ordinati = sorted(range(len(prodotti)), key=lambda p: carico_lavoro[p], reverse=True)
+    linee_ordinate = sorted(range(len(linee)), key=lambda l: linee[l].coefficiente_efficienza, reverse=True)
+
+    indici_linee = [0] * len(prodotti)
+    for i, p in enumerate(prodotti_ordinati):
+        indici_linee[p] = linee_ordinate[i]
+    return indici_linee
+
+
+# Cerca un cammino aumentante per il prodotto p tra le linee ammesse (algoritmo di Kuhn).
+# La visita in profondità usa una pila esplicita: con molti prodotti il cammino è lungo
+# quanto l'abbinamento e la ricorsione supererebbe il limite dell'interprete
+def _aumenta(p, adiacenti, linea_di, prodotto_di, visitate) -> bool:
+
+    # Per ogni livello: prodotto e linee ancora da provare; percorso: linee scelte per raggiungere i livelli successivi
+    pila = [(p, iter(adiacenti[p]))]
+    percorso = []
+    while pila:
+        for l in pila[-1][1]:
+            if visitate[l]:
+                continue
+            visitate[l] = True
+            percorso.append(l)
+            if prodotto_di[l] is None:
+                # Cammino trovato: ogni prodotto della pila passa alla linea scelta al suo livello
+                for (q, _), linea in zip(pila, percorso):
+                    linea_di[q] = linea
+                    prodotto_di[linea] = q
+                return True
+            pila.append((prodotto_di[l], iter(adiacenti[prodotto_di[l]])))
+            break
+        else:
+            pila.pop()
+            if percorso:
+                percorso.pop()
+    return False
+
+
+def _abbinamento_completo(costi: List[List[float]], n_linee: int, soglia: float) -> Optional[List[int]]:
+
+    # Linee ammesse per ogni prodotto: solo archi con costo <= soglia
+    adiacenti = [[l for l, costo in enumerate(riga) if costo <= soglia] for riga in costi]
+    linea_di = [None] * len(costi)
+    prodotto_di = [None] * n_linee
+    for p in range(len(costi)):
+        if not _aumenta(p, adiacenti, linea_di, prodotto_di, [False] * n_linee):
+            return None
+    return linea_di
+
+
+# Nodi massimi della ricerca esatta con più prodotti che linee
+MAX_NODI_ESATTA = 200_000
+
+
+# Branch and bound con più prodotti che linee: i prodotti di una linea sono lavorati in sequenza,
+# quindi si minimizza il carico massimo tra le linee. Parte dalla soluzione euristica e
+# interrompe la ricerca oltre max_nodi, perché il problema è NP-difficile
+def _assegna_esatta_condivisa(
+    prodotti: List[Prodotto],
+    quantita: Dict[Prodotto, int],
+    tempo_per_unita: Dict[Prodotto, float],
+    linee: List[LineaProduttiva],
+    costi: List[List[float]],
+    max_nodi: int
+) -> List[int]:
+
+    n_linee = len(linee)
+    migliore = _assegna_euristica(prodotti, quantita, tempo_per_unita, linee, costi)
+    carico_migliore = [0.0] * n_linee
+    for p, l in enumerate(migliore):
+        carico_migliore[l] += costi[p][l]
+    soglia = max(carico_migliore) - 1e-9
+
+    # Prodotti più onerosi per primi; resto[i]: somma dei costi minimi dei prodotti da ordine[i] in poi
+    ordine = sorted(range(len(prodotti)), key=lambda p: min(costi[p]), reverse=True)
+    resto = [0.0] * (len(ordine) + 1)
+    for i in range(len(ordine) - 1, -1, -1):
+        resto[i] = resto[i + 1] + min(costi[ordine[i]])
+
+    carico = [0.0] * n_linee
+    scelta = [None] * len(ordine)
+    totale = 0.0
+    nodi = 0
+    # Per ogni livello, le linee da provare in ordine di carico risultante
+    pila = [iter(sorted(range(n_linee), key=lambda l: costi[ordine[0]][l]))]
+    while pila:
+        i = len(pila) - 1
+        p = ordine[i]
+        if scelta[i] is not None:
+            carico[scelta[i]] -= costi[p][scelta[i]]
+            totale -= costi[p][scelta[i]]
+            scelta[i] = None
+        for l in pila[-1]:
+            # Limiti: la linea supera la migliore durata, oppure il carico medio minimo la supera
+            if carico[l] + costi[p][l] >= soglia or (totale + costi[p][l] + resto[i + 1]) / n_linee >= soglia:
+                continue
+            nodi += 1
+            if nodi > max_nodi:
+                raise ValueError(
+                    "Ricerca esatta troppo estesa con più prodotti che linee: usare il metodo 'euristico'"
+                )
+            if i + 1 == len(ordine):
+                # Soluzione completa migliore della precedente
+                migliore = [0] * len(prodotti)
+                for j, linea in enumerate(scelta[:i]):
+                    migliore[ordine[j]] = linea
+                migliore[p] = l
+                soglia = max(max(carico), carico[l] + costi[p][l]) - 1e-9
+                continue
+            carico[l] += costi[p][l]
+            totale += costi[p][l]
+            scelta[i] = l
+            q = ordine[i + 1]
+            pila.append(iter(sorted(range(n_linee), key=lambda m: carico[m] + costi[q][m])))
+            break
+        else:
+            pila.pop()
+
+    return migliore
+
+
+# Assegnazione esatta: bottleneck assignment, minimizza la durata massima tra i prodotti.
+# Con più prodotti che linee minimizza il carico massimo delle linee con una ricerca limitata
+def _assegna_esatta(
+    prodotti: List[Prodotto],
+    quantita: Dict[Prodotto, int],
+    tempo_per_unita: Dict[Prodotto, float],
+    linee: List[LineaProduttiva],
+    costi: Optional[List[List[float]]] = None,
+    max_nodi: int = MAX_NODI_ESATTA
+) -> List[int]:
+
+    if costi is None:
+        costi = matrice_costi(prodotti, quantita, tempo_per_unita, linee)
+    if len(prodotti) > len(linee):
+        return _assegna_esatta_condivisa(prodotti, quantita, tempo_per_unita, linee, costi, max_nodi)
+
+    # Limiti della ricerca: ogni prodotto richiede almeno il suo costo minimo,
+    # e la soluzione greedy è sempre ammissibile
+    limite_inferiore = max(min(riga) for riga in costi)
+    limite_superiore = calcola_makespan(costi, _assegna_greedy(prodotti, quantita, tempo_per_unita, linee))
+    soglie = sorted({c for riga in costi for c in riga if limite_inferiore <= c <= limite_superiore})
+
+    # Ricerca binaria della soglia minima che ammette un abbinamento completo
+    migliore = None
+    basso, alto = 0, len(soglie) - 1
+    while basso <= alto:
+        medio = (basso + alto) // 2
+        abbinamento = _abbinamento_completo(costi, len(linee), soglie[medio])
+        if abbinamento is not None:
+            migliore = abbinamento
+            alto = medio - 1
+        else:
+            basso = medio + 1
+
+    return migliore
+
+
+# Assegnazione euristica: LPT sulle linee seguita da ricerca locale su spostamenti e scambi.
+# Se i prodotti sono più delle linee, più prodotti condividono la stessa linea in sequenza
+def _assegna_euristica(
+    prodotti: List[Prodotto],
+    quantita: Dict[Prodotto, int],
+    tempo_per_unita: Dict[Prodotto, float],
+    linee: List[LineaProduttiva],
+    costi: Optional[List[List[float]]] = None,
+    max_iterazioni: int = 1000
+) -> List[int]:
+
+    if costi is None:
+        costi = matrice_costi(prodotti, quantita, tempo_per_unita, linee)
+
+    n_linee = len(linee)
+    uno_a_uno = len(prodotti) <= n_linee
+    carico = [0.0] * n_linee
+    indici_linee = [0] * len(prodotti)
+
+    # Fase costruttiva: prodotti più onerosi per primi, ciascuno sulla linea che termina prima
+    for p in sorted(range(len(prodotti)), key=lambda p: min(costi[p]), reverse=True):
+        candidate = [l for l in range(n_linee) if not (uno_a_uno and carico[l] > 0)]
+        l = min(candidate, key=lambda l: carico[l] + costi[p][l])
+        indici_linee[p] = l
+        carico[l] += costi[p][l]
+
+    prodotti_su_linea = [[] for _ in range(n_linee)]
+    for p, l in enumerate(indici_linee):
+        prodotti_su_linea[l].append(p)
+
+    # Ricerca locale: prova a scaricare la linea collo di bottiglia
+    for _ in range(max_iterazioni):
+        collo = max(range(n_linee), key=lambda l: carico[l])
+        durata = carico[collo]
+        migliorato = False
+
+        for p in prodotti_su_linea[collo]:
+            for l in range(n_linee):
+                if l == collo:
+                    continue
+                if not prodotti_su_linea[l] or not uno_a_uno:
+                    # Spostamento del prodotto su un'altra linea
+                    nuovo_carico = carico[l] + costi[p][l]
+                    if nuovo_carico < durata and carico[collo] - costi[p][collo] < durata:
+                        carico[collo] -= costi[p][collo]
+                        carico[l] = nuovo_carico
+                        prodotti_su_linea[collo].remove(p)
+                        prodotti_su_linea[l].append(p)
+                        indici_linee[p] = l
+                        migliorato = True
+                        break
+                for q in prodotti_su_linea[l]:
+                    # Scambio di linea tra due prodotti
+                    carico_collo = carico[collo] - costi[p][collo] + costi[q][collo]
+                    carico_l = carico[l] - costi[q][l] + costi[p][l]
+                    if carico_collo < durata and carico_l < durata:
+                        carico[collo], carico[l] = carico_collo, carico_l
+                        prodotti_su_linea[collo].remove(p)
+                        prodotti_su_linea[collo].append(q)
+                        prodotti_su_linea[l].remove(q)
+                        prodotti_su_linea[l].append(p)
+                        indici_linee[p], indici_linee[q] = l, collo
+                        migliorato = True
+                        break
+                if migliorato:
+                    break
+            if migliorato:
+                break
+
+        if not migliorato:
+            break
+
+    return indici_linee
+
+
+METODI_ASSEGNAZIONE: Dict[str, Callable[..., List[int]]] = {
+    'greedy': _assegna_greedy,
+    'esatto': _assegna_esatta,
+    'euristico': _assegna_euristica,
+}
+
+
+# Funzione per assegnare le linee ai prodotti con il metodo scelto
+def assegna_linee(
+    prodotti: List[Prodotto],
+    quantita: Dict[Prodotto, int],
+    tempo_per_unita: Dict[Prodotto, float],
+    impianto: Impianto,
+    metodo: str = 'greedy'
+) -> Dict[Prodotto, LineaProduttiva]:
+
+    if metodo not in METODI_ASSEGNAZIONE:
+        raise ValueError(f"Metodo di assegnazione sconosciuto: {metodo}")
+
+    indici_linee = METODI_ASSEGNAZIONE[metodo](prodotti, quantita, tempo_per_unita, impianto.linee)
+    return {prodotto: impianto.linee[l] for prodotto, l in zip(prodotti, indici_linee)}
+
+
+# Funzione per confrontare un metodo di assegnazione con il greedy attuale
+def confronta_con_greedy(
+    prodotti: List[Prodotto],
+    quantita: Dict[Prodotto, int],
+    tempo_per_unita: Dict[Prodotto, float],
+    impianto: Impianto,
+    metodo: str = 'esatto'
+) -> Dict[str, object]:
+
+    if metodo not in METODI_ASSEGNAZIONE:
+        raise ValueError(f"Metodo di assegnazione sconosciuto: {metodo}")
+
+    costi = matrice_costi(prodotti, quantita, tempo_per_unita, impianto.linee)
+    indici_linee = METODI_ASSEGNAZIONE[metodo](prodotti, quantita, tempo_per_unita, impianto.linee, costi)
+    makespan = calcola_makespan(costi, indici_linee)
+
+    # Il greedy non è definito con più prodotti che linee: il riferimento diventa l'euristico
+    riferimento = 'greedy' if len(prodotti) <= impianto.numero_linee else 'euristico'
+    makespan_greedy = calcola_makespan(
+        costi, METODI_ASSEGNAZIONE[riferimento](prodotti, quantita, tempo_per_unita, impianto.linee, costi)
+    )
+    miglioramento_ore = round(makespan_greedy - makespan, 2)
+    miglioramento_percentuale = round(100 * miglioramento_ore / makespan_greedy, 2)
+
+    return {
+        'metodo': metodo,
+        'riferimento': riferimento,
+        'assegnazioni_linee': {prodotto: impianto.linee[l] for prodotto, l in zip(prodotti, indici_linee)},
+        'durata_lotto_ore': makespan,
+        'durata_lotto_ore_greedy': makespan_greedy,
+        'miglioramento_ore': miglioramento_ore,
+        'miglioramento_percentuale': miglioramento_percentuale
+    }
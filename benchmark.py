@@ -0,0 +1,237 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from models import Prodotto, LineaProduttiva, Impianto
+from produzione import (
+    genera_quantita_produzione,
+    genera_parametri_configurabili,
+    assegna_linee_a_prodotti,
+    calcola_tempo_produzione_lotto,
+)
+from output import output_simulazione_produzione
+from pianificatore import PianificatoreLotti
+from stocastico import percentile_durata_lotto
+from tabelle import TabellaTempi
+
+
+# Scale dei benchmark: (numero prodotti, numero linee)
+SCALE = [(4, 4), (100, 20), (1000, 100)]
+
+# Baseline accanto allo script, indipendente dalla cartella di lavoro; i tempi dipendono dalla macchina,
+# quindi il file non è versionato
+PERCORSO_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Lotti in coda nei benchmark del pianificatore
+N_LOTTI_PIANIFICATORE = 200
+
+# Peggioramento relativo tollerato rispetto alla baseline (0.25 = 25%)
+SOGLIA_PREDEFINITA = 0.25
+
+
+# Prodotto sintetico per simulare impianti con molti articoli
+class ProdottoSintetico(Prodotto):
+
+    def __init__(self, indice: int):
+        self._nome = f"Articolo {indice:04d}"
+
+    @property
+    def range_tempo_produzione(self) -> Tuple[float, float]:
+        return (0.5, 8.0)
+
+    @property
+    def range_quantita_produzione(self) -> Tuple[int, int]:
+        return (30, 250)
+
+    @property
+    def nome(self) -> str:
+        return self._nome
+
+
+def _scenario(n_prodotti: int, n_linee: int, seed: int = 0):
+    rng = random.Random(seed)
+    prodotti = [ProdottoSintetico(i) for i in range(n_prodotti)]
+    quantita = genera_quantita_produzione(prodotti, rng)
+    tempo_per_unita, _ = genera_parametri_configurabili(prodotti, rng)
+    impianto = Impianto([
+        LineaProduttiva(f"L{i:02d}", round(rng.uniform(0.7, 1.3), 2)) for i in range(n_linee)
+    ])
+    return prodotti, quantita, tempo_per_unita, impianto
+
+
+# Il greedy richiede una linea per prodotto e l'esatto non scala oltre: si usa l'euristico
+def _metodo(n_prodotti: int, n_linee: int) -> str:
+    return 'greedy' if n_prodotti <= n_linee else 'euristico'
+
+
+# Tempo minimo per chiamata (in secondi) su più ripetizioni
+def misura(funzione: Callable[[], object], ripetizioni: int = 5, durata_minima: float = 0.05) -> float:
+
+    # Numero di chiamate per ripetizione, in modo che ciascuna duri almeno durata_minima
+    chiamate = 1
+    while True:
+        inizio = time.perf_counter()
+        for _ in range(chiamate):
+            funzione()
+        trascorso = time.perf_counter() - inizio
+        if trascorso >= durata_minima:
+            break
+        chiamate *= 2
+
+    migliore = trascorso / chiamate
+    for _ in range(ripetizioni - 1):
+        inizio = time.perf_counter()
+        for _ in range(chiamate):
+            funzione()
+        migliore = min(migliore, (time.perf_counter() - inizio) / chiamate)
+    return migliore
+
+
+# Funzioni da misurare, indicizzate per nome del benchmark
+def definisci_benchmark() -> Dict[str, Callable[[], object]]:
+
+    from app import app, formatta_risultati_json
+
+    benchmark = {}
+
+    for n_prodotti, n_linee in SCALE:
+        scala = f"{n_prodotti}x{n_linee}"
+        prodotti, quantita, tempo_per_unita, impianto = _scenario(n_prodotti, n_linee)
+        metodo = _metodo(n_prodotti, n_linee)
+        assegnazioni = assegna_linee_a_prodotti(prodotti, quantita, tempo_per_unita, impianto, metodo)
+        risultati = calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni)
+
+        def stampa(risultati=risultati):
+            with contextlib.redirect_stdout(io.StringIO()):
+                output_simulazione_produzione(risultati)
+
+        benchmark[f"genera_parametri_configurabili[{scala}]"] = (
+            lambda prodotti=prodotti: genera_parametri_configurabili(prodotti, random.Random(0))
+        )
+        benchmark[f"assegna_linee_a_prodotti[{scala}]"] = (
+            lambda a=(prodotti, quantita, tempo_per_unita, impianto, metodo): assegna_linee_a_prodotti(*a)
+        )
+        benchmark[f"calcola_tempo_produzione_lotto[{scala}]"] = (
+            lambda a=(quantita, tempo_per_unita, assegnazioni): calcola_tempo_produzione_lotto(*a)
+        )
+        benchmark[f"calcola_tempo_produzione_lotto_tabella[{scala}]"] = (
+            lambda a=(quantita, tempo_per_unita, assegnazioni, 24, TabellaTempi(prodotti, tempo_per_unita, impianto)):
+            calcola_tempo_produzione_lotto(*a)
+        )
+        benchmark[f"percentile_durata_lotto[{scala}]"] = (
+            lambda a=(prodotti, quantita, impianto, 90, assegnazioni): percentile_durata_lotto(*a)
+        )
+        benchmark[f"formatta_risultati_json[{scala}]"] = lambda r=risultati: formatta_risultati_json(r)
+        benchmark[f"output_simulazione_produzione[{scala}]"] = stampa
+
+    # Aggiornamenti incrementali del pianificatore su una coda di lotti già pianificata
+    n_prodotti, n_linee = SCALE[1]
+    scala = f"{n_prodotti}x{n_linee}"
+    prodotti, quantita, tempo_per_unita, impianto = _scenario(n_prodotti, n_linee)
+    pianificatore = PianificatoreLotti(prodotti, tempo_per_unita, impianto, metodo=_metodo(n_prodotti, n_linee))
+    for _ in range(N_LOTTI_PIANIFICATORE):
+        pianificatore.aggiungi_lotto(quantita)
+    
+    def aggiungi_annulla(pianificatore=pianificatore, quantita=quantita):
+        pianificatore.annulla_lotto(pianificatore.aggiungi_lotto(quantita))
+    
+    def aggiorna_coefficiente(pianificatore=pianificatore, linea=impianto.linee[0]):
+        pianificatore.aggiorna_coefficiente(linea.nome, 2.0 - linea.coefficiente_efficienza)
+    
+    benchmark[f"pianificatore_aggiungi_annulla[{N_LOTTI_PIANIFICATORE}x{scala}]"] = aggiungi_annulla
+    benchmark[f"pianificatore_aggiorna_coefficiente[{N_LOTTI_PIANIFICATORE}x{scala}]"] = aggiorna_coefficiente
+    
+    # La route accetta solo i quattro prodotti e le quattro linee del form
+    client = app.test_client()
+    richiesta = {
+        'quantita_giacche': '50',
+        'quantita_tshirt': '150',
+        'quantita_felpe': '100',
+        'quantita_pantaloni': '80',
+        'coeff_linea_a': '0.95',
+        'coeff_linea_b': '1.10',
+        'coeff_linea_c': '1.05',
+        'coeff_linea_d': '1.25'
+    }
+    benchmark["api_simula[4x4]"] = lambda: client.post('/api/simula', json=richiesta)
+
+    return benchmark
+
+
+def esegui_benchmark(filtro: str = '', ripetizioni: int = 5) -> Dict[str, float]:
+    return {
+        nome: misura(funzione, ripetizioni)
+        for nome, funzione in definisci_benchmark().items()
+        if filtro in nome
+    }
+
+
+# Confronta i risultati con la baseline: restituisce i benchmark peggiorati oltre la soglia
+def confronta_con_baseline(
+    risultati: Dict[str, float],
+    baseline: Dict[str, float],
+    soglia: float = SOGLIA_PREDEFINITA
+) -> List[Tuple[str, float, float]]:
+
+    regressioni = []
+    for nome, secondi in risultati.items():
+        riferimento = baseline.get(nome)
+        if riferimento and secondi > riferimento * (1 + soglia):
+            regressioni.append((nome, riferimento, secondi))
+    return regressioni
+
+
+def _formatta_durata(secondi: float) -> str:
+    if secondi < 1e-3:
+        return f"{secondi * 1e6:9.1f} µs"
+    return f"{secondi * 1e3:9.2f} ms"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark della pipeline di simulazione")
+    parser.add_argument('--baseline', default=PERCORSO_BASELINE, help="file JSON della baseline")
+    parser.add_argument('--salva', action='store_true', help="salva i risultati come nuova baseline")
+    parser.add_argument('--soglia', type=float, default=SOGLIA_PREDEFINITA,
+                        help="peggioramento relativo tollerato (default: 0.25)")
+    parser.add_argument('--filtro', default='', help="esegue solo i benchmark il cui nome contiene il testo")
+    parser.add_argument('--ripetizioni', type=int, default=5, help="ripetizioni per benchmark")
+    argomenti = parser.parse_args()
+
+    risultati = esegui_benchmark(argomenti.filtro, argomenti.ripetizioni)
+
+    baseline = {}
+    if os.path.exists(argomenti.baseline):
+        with open(argomenti.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    for nome, secondi in risultati.items():
+        riga = f"  {nome:50s} {_formatta_durata(secondi)}"
+        if nome in baseline:
+            variazione = (secondi / baseline[nome] - 1) * 100
+            riga += f"  ({variazione:+6.1f}% rispetto alla baseline)"
+        print(riga)
+
+    if argomenti.salva:
+        with open(argomenti.baseline, 'w', encoding='utf-8') as file:
+            json.dump({**baseline, **risultati}, file, indent=2, sort_keys=True)
+        print(f"\n Baseline salvata in {argomenti.baseline}")
+        return 0
+
+    regressioni = confronta_con_baseline(risultati, baseline, argomenti.soglia)
+    if regressioni:
+        print(f"\n Regressioni oltre il {argomenti.soglia:.0%}:")
+        for nome, riferimento, secondi in regressioni:
+            print(f"  - {nome}: {_formatta_durata(riferimento).strip()} -> {_formatta_durata(secondi).strip()}")
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
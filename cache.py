@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+
+from models import Prodotto, Impianto
+
+
+# Cache LRU limitata per numero di elementi e durata (TTL), sicura tra thread
+class CacheLRU:
+    
+    def __init__(
+        self,
+        dimensione_massima: int = 1024,
+        ttl_secondi: float = 600,
+        orologio: Callable[[], float] = time.monotonic
+    ):
+        if dimensione_massima <= 0:
+            raise ValueError("La dimensione massima della cache deve essere maggiore di 0")
+        
+        self.dimensione_massima = dimensione_massima
+        self.ttl_secondi = ttl_secondi
+        self._orologio = orologio
+        self._elementi: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hit = 0
+        self.miss = 0
+        self.rimozioni = 0
+        self.scadenze = 0
+    
+    def __len__(self) -> int:
+        return len(self._elementi)
+    
+    def ottieni_o_calcola(self, chiave: Hashable, calcola: Callable[[], object]) -> object:
+        adesso = self._orologio()
+        
+        with self._lock:
+            elemento = self._elementi.get(chiave)
+            if elemento is not None:
+                scadenza, valore = elemento
+                if scadenza > adesso:
+                    self._elementi.move_to_end(chiave)
+                    self.hit += 1
+                    return valore
+                del self._elementi[chiave]
+                self.scadenze += 1
+            self.miss += 1
+        
+        # Il calcolo avviene fuori dal lock per non serializzare le richieste concorrenti
+        valore = calcola()
+        
+        with self._lock:
+            self._elementi[chiave] = (self._orologio() + self.ttl_secondi, valore)
+            self._elementi.move_to_end(chiave)
+            while len(self._elementi) > self.dimensione_massima:
+                self._elementi.popitem(last=False)
+                self.rimozioni += 1
+        
+        return valore
+    
+    def svuota(self) -> None:
+        with self._lock:
+            self._elementi.clear()
+    
+    def statistiche(self) -> Dict[str, object]:
+        with self._lock:
+            richieste = self.hit + self.miss
+            return {
+                'elementi': len(self._elementi),
+                'dimensione_massima': self.dimensione_massima,
+                'ttl_secondi': self.ttl_secondi,
+                'hit': self.hit,
+                'miss': self.miss,
+                'rimozioni': self.rimozioni,
+                'scadenze': self.scadenze,
+                'hit_rate': round(self.hit / richieste, 4) if richieste else 0.0
+            }
+    
+    def __repr__(self) -> str:
+        return f"<CacheLRU: {len(self._elementi)}/{self.dimensione_massima} elementi>"
+
+
+# Chiave normalizzata della parte deterministica della simulazione
+def chiave_simulazione(
+    quantita: Dict[Prodotto, int],
+    tempo_per_unita: Dict[Prodotto, float],
+    impianto: Impianto,
+    modalita: str = 'intero'
+) -> Tuple:
+    
+    return (
+        modalita,
+        tuple((prodotto.nome, int(qta), float(tempo_per_unita[prodotto])) for prodotto, qta in quantita.items()),
+        tuple((linea.nome, float(linea.coefficiente_efficienza)) for linea in impianto.linee)
+    )
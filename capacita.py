@@ -0,0 +1,139 @@
+import math
+from typing import Dict, List, Optional
+
+from models import Prodotto, Impianto
+from produzione import assegna_linee_a_prodotti, calcola_tempo_produzione_lotto
+from tabelle import TabellaTempi
+
+
+# Scadenza massima accettata, 10 anni di calendario: oltre, livelli e ore perdono precisione
+MAX_SCADENZA_ORE = 3650 * 24
+
+
+# Quantità per un livello n: minimi più la quota n del mix, arrotondata per difetto.
+# Ogni quantità è non decrescente in n
+def _quantita_livello(
+    prodotti: List[Prodotto],
+    minimi: Dict[Prodotto, int],
+    quote: Dict[Prodotto, float],
+    n: int
+) -> Dict[Prodotto, int]:
+    return {prodotto: minimi[prodotto] + math.floor(n * quote[prodotto] + 1e-9) for prodotto in prodotti}
+
+
+# Funzione per calcolare le quantità massime producibili entro una scadenza.
+# Le quantità sono minimi + floor(n * quota) per il mix indicato (normalizzato a somma 1);
+# n è cercato per bisezione tra due limiti in forma chiusa, verificando ogni candidato
+# con l'assegnazione e il calcolo del lotto esistenti
+def quantita_massime(
+    prodotti: List[Prodotto],
+    tempo_per_unita: Dict[Prodotto, float],
+    impianto: Impianto,
+    scadenza_ore: float,
+    mix: Optional[Dict[Prodotto, float]] = None,
+    minimi: Optional[Dict[Prodotto, int]] = None,
+    metodo: str = 'greedy',
+    ore_per_giorno: int = 24
+) -> Dict[str, object]:
+
+    if not math.isfinite(scadenza_ore) or not 0 < scadenza_ore <= MAX_SCADENZA_ORE:
+        raise ValueError(f"La scadenza deve essere maggiore di 0 e al massimo {MAX_SCADENZA_ORE} ore")
+
+    minimi = {prodotto: int((minimi or {}).get(prodotto, 0)) for prodotto in prodotti}
+    if any(valore < 0 for valore in minimi.values()):
+        raise ValueError("Le quantità minime non possono essere negative")
+
+    # Senza mix le quantità crescono in proporzione ai minimi, o in parti uguali
+    if mix is None:
+        mix = minimi if any(minimi.values()) else {prodotto: 1.0 for prodotto in prodotti}
+    pesi = {prodotto: float(mix.get(prodotto, 0.0)) for prodotto in prodotti}
+    if any(not math.isfinite(peso) or peso < 0 for peso in pesi.values()) or not any(pesi.values()):
+        raise ValueError("Il mix deve avere pesi finiti e non negativi con somma maggiore di 0")
+    # Pesi divisi prima per il massimo, così la somma non va in overflow
+    massimo = max(pesi.values())
+    totale = sum(peso / massimo for peso in pesi.values())
+    quote = {prodotto: peso / massimo / totale for prodotto, peso in pesi.items()}
+
+    # Tempi effettivi dell'impianto calcolati una sola volta per tutte le valutazioni
+    tabella = TabellaTempi(prodotti, tempo_per_unita, impianto, ore_per_giorno)
+    valutazioni = 0
+
+    def valuta(n: int) -> Dict[str, object]:
+        nonlocal valutazioni
+        valutazioni += 1
+        quantita = _quantita_livello(prodotti, minimi, quote, n)
+        assegnazioni = assegna_linee_a_prodotti(prodotti, quantita, tempo_per_unita, impianto, metodo)
+        return calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni, ore_per_giorno, tabella)
+
+    def fattibile(risultati: Dict[str, object]) -> bool:
+        return risultati['durata_lotto_ore'] <= scadenza_ore
+
+    # Tempi effettivi arrotondati al minuto sulla linea migliore e peggiore di ogni prodotto
+    coefficienti = [linea.coefficiente_efficienza for linea in impianto.linee]
+    tempo_minimo = {p: tabella.voce(p, max(coefficienti))[1] for p in prodotti}
+    tempo_massimo = {p: tabella.voce(p, min(coefficienti))[1] for p in prodotti}
+
+    # Limite superiore: ogni prodotto occupa una sola linea per almeno quantità * tempo minimo ore
+    # (meno il mezzo centesimo dell'arrotondamento), quindi oltre questo livello un prodotto
+    # supera la scadenza da solo. I prodotti con tempo effettivo nullo non pongono limiti
+    # e con una quota minuscola il limite del prodotto va a infinito
+    limite = min((
+        max(0.0, (scadenza_ore + 0.005) / tempo_minimo[p] + 1 - minimi[p]) / quote[p]
+        for p in prodotti if quote[p] > 0 and tempo_minimo[p] > 0
+    ), default=math.inf)
+    if not math.isfinite(limite):
+        raise ValueError("Con tempi effettivi nulli le quantità non hanno un massimo")
+    n_massimo = math.floor(limite) + 1
+
+    # Limite inferiore: tutti i prodotti in sequenza sulla linea peggiore, con il margine
+    # dell'arrotondamento delle ore al centesimo per ogni prodotto
+    ore_minimi = sum(minimi[p] * tempo_massimo[p] for p in prodotti) + 0.005 * len(prodotti)
+    ore_per_livello = sum(quote[p] * tempo_massimo[p] for p in prodotti)
+    n_minimo = max(0, math.floor((scadenza_ore - ore_minimi) / ore_per_livello))
+    n_minimo = min(n_minimo, n_massimo)
+
+    migliore = valuta(0)
+    if not fattibile(migliore):
+        return _risultato(migliore, scadenza_ore, False, valutazioni, (n_minimo, n_massimo), 0)
+
+    n_migliore = 0
+    risultati = valuta(n_minimo)
+    if fattibile(risultati):
+        migliore, n_migliore = risultati, n_minimo
+        basso = n_minimo
+    else:
+        basso = 0
+    alto = n_massimo
+
+    # Bisezione: basso è sempre fattibile, alto non lo è (o è il limite superiore)
+    while alto - basso > 1:
+        medio = (basso + alto) // 2
+        risultati = valuta(medio)
+        if fattibile(risultati):
+            basso, migliore, n_migliore = medio, risultati, medio
+        else:
+            alto = medio
+
+    return _risultato(migliore, scadenza_ore, True, valutazioni, (n_minimo, n_massimo), n_migliore)
+
+
+def _risultato(
+    risultati: Dict[str, object],
+    scadenza_ore: float,
+    fattibile: bool,
+    valutazioni: int,
+    limiti: tuple,
+    livello: int
+) -> Dict[str, object]:
+    return {
+        'fattibile': fattibile,
+        'scadenza_ore': scadenza_ore,
+        'quantita': risultati['quantita'],
+        'totale_capi': sum(risultati['quantita'].values()),
+        'durata_lotto_ore': risultati['durata_lotto_ore'],
+        'margine_ore': round(scadenza_ore - risultati['durata_lotto_ore'], 2),
+        'livello': livello,
+        'limiti_livello': limiti,
+        'valutazioni': valutazioni,
+        'risultati': risultati
+    }
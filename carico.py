@@ -0,0 +1,142 @@
+import argparse
+import http.client
+import itertools
+import json
+import random
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from catalogo import catalogo_predefinito
+from strumentazione import _quantile
+
+
+# Corpi delle richieste: scenari casuali ma riproducibili, generati prima del test
+# per non misurare il costo della loro costruzione
+def genera_scenari(n: int, seed: int = 0, ripetuti: float = 0.0) -> List[bytes]:
+    rng = random.Random(seed)
+    catalogo = catalogo_predefinito()
+    scenari = []
+    for indice in range(n):
+        if scenari and rng.random() < ripetuti:
+            scenari.append(rng.choice(scenari))
+            continue
+        scenario = {prodotto.campo_quantita: rng.randint(*prodotto.range_quantita_produzione) for prodotto in catalogo.prodotti}
+        scenario.update({linea.campo_coefficiente: round(rng.uniform(0.8, 1.2), 2) for linea in catalogo.linee})
+        scenario['seed'] = indice
+        scenari.append(json.dumps(scenario).encode('utf-8'))
+    return scenari
+
+
+# Client di un thread: una connessione keep-alive riusata per tutte le sue richieste
+def _client(url, scenari: List[bytes], prossima, fine: float, latenze: List[float], errori: Dict[str, int], lock) -> None:
+    connessione = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    intestazioni = {'Content-Type': 'application/json'}
+    locali: List[float] = []
+    while time.perf_counter() < fine:
+        indice = prossima()
+        if indice is None:
+            break
+        inizio = time.perf_counter()
+        try:
+            connessione.request('POST', url.path or '/api/simula', scenari[indice % len(scenari)], intestazioni)
+            risposta = connessione.getresponse()
+            risposta.read()
+            esito = None if risposta.status == 200 else str(risposta.status)
+        except (OSError, http.client.HTTPException) as errore:
+            connessione.close()
+            connessione = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            esito = type(errore).__name__
+        if esito is None:
+            locali.append(time.perf_counter() - inizio)
+        else:
+            with lock:
+                errori[esito] = errori.get(esito, 0) + 1
+    connessione.close()
+    with lock:
+        latenze.extend(locali)
+
+
+# Test di carico su /api/simula: `concorrenza` client in parallelo fino a `richieste`
+# richieste complessive oppure per `durata` secondi; riporta throughput e percentili
+def esegui_carico(url: str, concorrenza: int = 8, richieste: int = 1000, durata: float = 0.0,
+                  seed: int = 0, ripetuti: float = 0.0) -> Dict:
+    if concorrenza <= 0:
+        raise ValueError("La concorrenza deve essere maggiore di 0")
+    indirizzo = urlsplit(url)
+    scenari = genera_scenari(min(richieste, 10_000) if richieste > 0 else 10_000, seed, ripetuti)
+
+    contatore = iter(range(richieste)) if richieste > 0 else itertools.count()
+    lock_contatore = threading.Lock()
+
+    def prossima():
+        with lock_contatore:
+            return next(contatore, None)
+
+    latenze: List[float] = []
+    errori: Dict[str, int] = {}
+    lock = threading.Lock()
+    inizio = time.perf_counter()
+    fine = inizio + durata if durata > 0 else float('inf')
+    thread = [
+        threading.Thread(target=_client, args=(indirizzo, scenari, prossima, fine, latenze, errori, lock))
+        for _ in range(concorrenza)
+    ]
+    for t in thread:
+        t.start()
+    for t in thread:
+        t.join()
+    trascorso = time.perf_counter() - inizio
+
+    ordinate = sorted(latenze)
+    return {
+        'richieste': len(ordinate) + sum(errori.values()),
+        'riuscite': len(ordinate),
+        'errori': errori,
+        'secondi': round(trascorso, 3),
+        'richieste_al_secondo': round(len(ordinate) / trascorso, 1) if trascorso else 0.0,
+        'latenza_ms': {
+            'media': round(1000 * sum(ordinate) / len(ordinate), 2) if ordinate else 0.0,
+            'p50': round(1000 * _quantile(ordinate, 0.50), 2),
+            'p90': round(1000 * _quantile(ordinate, 0.90), 2),
+            'p99': round(1000 * _quantile(ordinate, 0.99), 2),
+            'massima': round(1000 * ordinate[-1], 2) if ordinate else 0.0,
+        },
+    }
+
+
+def _stampa(risultato: Dict, concorrenza: int) -> None:
+    latenza = risultato['latenza_ms']
+    print(f"\n Richieste: {risultato['riuscite']} riuscite su {risultato['richieste']} in {risultato['secondi']:.2f} s"
+          f" ({concorrenza} client)")
+    print(f"  - Throughput: {risultato['richieste_al_secondo']:.1f} richieste/s")
+    print(f"  - Latenza media: {latenza['media']:.2f} ms")
+    print(f"  - Latenza p50 / p90 / p99: {latenza['p50']:.2f} / {latenza['p90']:.2f} / {latenza['p99']:.2f} ms")
+    print(f"  - Latenza massima: {latenza['massima']:.2f} ms")
+    for esito, n in sorted(risultato['errori'].items()):
+        print(f"  - Errori {esito}: {n}")
+
+
+def _leggi_argomenti():
+    parser = argparse.ArgumentParser(description="Test di carico dell'endpoint /api/simula")
+    parser.add_argument('--url', default='http://127.0.0.1:8000/api/simula', help="endpoint da sollecitare")
+    parser.add_argument('--concorrenza', type=int, default=8, help="client in parallelo")
+    parser.add_argument('--richieste', type=int, default=1000, help="richieste complessive (0: illimitate, con --durata)")
+    parser.add_argument('--durata', type=float, default=0.0, help="durata massima del test in secondi")
+    parser.add_argument('--ripetuti', type=float, default=0.0, help="frazione di scenari ripetuti (colpiscono la cache)")
+    parser.add_argument('--seed', type=int, default=0, help="seme degli scenari generati")
+    parser.add_argument('--json', action='store_true', help="stampa il risultato in JSON")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    argomenti = _leggi_argomenti()
+    if argomenti.richieste <= 0 and argomenti.durata <= 0:
+        raise SystemExit("Indicare --richieste o --durata")
+    risultato = esegui_carico(argomenti.url, argomenti.concorrenza, argomenti.richieste, argomenti.durata,
+                              argomenti.seed, argomenti.ripetuti)
+    if argomenti.json:
+        print(json.dumps(risultato, indent=2))
+    else:
+        _stampa(risultato, argomenti.concorrenza)
@@ -0,0 +1,141 @@
+import json
+import os
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from models import Prodotto, LineaProduttiva
+
+
+PERCORSO_CATALOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalogo.json')
+
+
+# Prodotto definito da catalogo: nome e range sono attributi semplici (slot),
+# senza una sottoclasse e una property per ogni articolo
+class ProdottoCatalogo(Prodotto):
+
+    __slots__ = ('id', 'indice', 'nome', 'range_tempo_produzione', 'range_quantita_produzione')
+
+    def __init__(
+        self,
+        id: str,
+        indice: int,
+        nome: str,
+        range_tempo_produzione: Tuple[float, float],
+        range_quantita_produzione: Tuple[int, int]
+    ):
+        self.id = id
+        self.indice = indice
+        self.nome = nome
+        self.range_tempo_produzione = range_tempo_produzione
+        self.range_quantita_produzione = range_quantita_produzione
+
+    @property
+    def campo_quantita(self) -> str:
+        return f"quantita_{self.id}"
+
+    @property
+    def campo_tempo(self) -> str:
+        return f"tempo_{self.id}"
+
+    def __repr__(self) -> str:
+        return f"<Prodotto {self.id}>"
+
+
+# Linea definita da catalogo, con il range del coefficiente di efficienza
+class SpecificaLinea:
+
+    __slots__ = ('id', 'indice', 'nome', 'range_coefficiente')
+
+    def __init__(self, id: str, indice: int, nome: str, range_coefficiente: Tuple[float, float]):
+        self.id = id
+        self.indice = indice
+        self.nome = nome
+        self.range_coefficiente = range_coefficiente
+
+    @property
+    def campo_coefficiente(self) -> str:
+        return f"coeff_linea_{self.id}"
+
+    def crea_linea(self, coefficiente_efficienza: float) -> LineaProduttiva:
+        return LineaProduttiva(self.nome, coefficiente_efficienza)
+
+    def __repr__(self) -> str:
+        return f"<SpecificaLinea {self.id}: {self.range_coefficiente}>"
+
+
+# Registro indicizzato di prodotti e linee, con ricerca per id in O(1)
+class Catalogo:
+
+    def __init__(self, prodotti: List[ProdottoCatalogo], linee: List[SpecificaLinea]):
+        if not prodotti or not linee:
+            raise ValueError("Il catalogo deve contenere almeno un prodotto e una linea")
+
+        self.prodotti = prodotti
+        self.linee = linee
+        self._prodotti_per_id = {prodotto.id: prodotto for prodotto in prodotti}
+        self._linee_per_id = {linea.id: linea for linea in linee}
+
+        if len(self._prodotti_per_id) != len(prodotti) or len(self._linee_per_id) != len(linee):
+            raise ValueError("Gli id di prodotti e linee del catalogo devono essere univoci")
+
+    @classmethod
+    def da_dizionario(cls, dati: dict) -> "Catalogo":
+        try:
+            prodotti = [
+                ProdottoCatalogo(
+                    str(voce['id']),
+                    indice,
+                    voce['nome'],
+                    (float(voce['range_tempo_produzione'][0]), float(voce['range_tempo_produzione'][1])),
+                    (int(voce['range_quantita_produzione'][0]), int(voce['range_quantita_produzione'][1]))
+                )
+                for indice, voce in enumerate(dati['prodotti'])
+            ]
+            linee = [
+                SpecificaLinea(
+                    str(voce['id']),
+                    indice,
+                    voce['nome'],
+                    (float(voce['range_coefficiente'][0]), float(voce['range_coefficiente'][1]))
+                )
+                for indice, voce in enumerate(dati['linee'])
+            ]
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise ValueError(f"Catalogo non valido: {e}") from e
+
+        return cls(prodotti, linee)
+
+    # Carica il catalogo da un file JSON o TOML
+    @classmethod
+    def da_file(cls, percorso: str) -> "Catalogo":
+        if percorso.endswith('.toml'):
+            import tomllib
+            with open(percorso, 'rb') as file:
+                return cls.da_dizionario(tomllib.load(file))
+
+        with open(percorso, encoding='utf-8') as file:
+            return cls.da_dizionario(json.load(file))
+
+    def prodotto(self, id: str) -> ProdottoCatalogo:
+        return self._prodotti_per_id[id]
+
+    def linea(self, id: str) -> SpecificaLinea:
+        return self._linee_per_id[id]
+
+    @property
+    def numero_prodotti(self) -> int:
+        return len(self.prodotti)
+
+    @property
+    def numero_linee(self) -> int:
+        return len(self.linee)
+
+    def __repr__(self) -> str:
+        return f"<Catalogo: {self.numero_prodotti} prodotti, {self.numero_linee} linee>"
+
+
+# Catalogo caricato una sola volta all'avvio; il percorso può essere
+# indicato con la variabile d'ambiente CATALOGO_PRODUZIONE
+@lru_cache(maxsize=None)
+def catalogo_predefinito(percorso: Optional[str] = None) -> Catalogo:
+    return Catalogo.da_file(percorso or os.environ.get('CATALOGO_PRODUZIONE', PERCORSO_CATALOGO))
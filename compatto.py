@@ -0,0 +1,180 @@
+from array import array
+from typing import Dict, List, Optional
+
+from models import Prodotto, LineaProduttiva, Impianto
+from produzione import _tempi_prodotto
+
+
+# Scenario in forma struct-of-arrays: prodotti e linee sono indicizzati da interi
+# e quantità, tempi e coefficienti sono array compatti invece di dizionari per prodotto
+class ScenarioCompatto:
+
+    __slots__ = ('prodotti', 'linee', 'quantita', 'tempi', 'coefficienti')
+
+    def __init__(
+        self,
+        prodotti: List[Prodotto],
+        linee: List[LineaProduttiva],
+        quantita: array,
+        tempi: array,
+        coefficienti: array
+    ):
+        self.prodotti = prodotti
+        self.linee = linee
+        self.quantita = quantita
+        self.tempi = tempi
+        self.coefficienti = coefficienti
+
+    # Con uno scenario da riutilizzare delle stesse dimensioni i suoi array vengono riscritti
+    @classmethod
+    def da_dizionari(
+        cls,
+        quantita: Dict[Prodotto, int],
+        tempo_per_unita: Dict[Prodotto, float],
+        impianto: Impianto,
+        scenario: Optional["ScenarioCompatto"] = None
+    ) -> "ScenarioCompatto":
+        prodotti = list(quantita)
+        if scenario is not None and scenario.prodotti == prodotti and scenario.numero_linee == impianto.numero_linee:
+            for p, prodotto in enumerate(prodotti):
+                scenario.quantita[p] = quantita[prodotto]
+                scenario.tempi[p] = tempo_per_unita[prodotto]
+            for l, linea in enumerate(impianto.linee):
+                scenario.coefficienti[l] = linea.coefficiente_efficienza
+            scenario.linee[:] = impianto.linee
+            return scenario
+        return cls(
+            prodotti,
+            list(impianto.linee),
+            array('q', (quantita[prodotto] for prodotto in prodotti)),
+            array('d', (tempo_per_unita[prodotto] for prodotto in prodotti)),
+            array('d', (linea.coefficiente_efficienza for linea in impianto.linee))
+        )
+
+    @property
+    def numero_prodotti(self) -> int:
+        return len(self.prodotti)
+
+    @property
+    def numero_linee(self) -> int:
+        return len(self.linee)
+
+    def __repr__(self) -> str:
+        return f"<ScenarioCompatto: {self.numero_prodotti} prodotti, {self.numero_linee} linee>"
+
+
+# Risultati per prodotto in array paralleli, indicizzati come i prodotti dello scenario
+class RisultatiCompatti:
+
+    __slots__ = (
+        'scenario', 'assegnazioni', 'tempo_effettivo', 'capacita_giornaliera', 'ore_totali',
+        'giorni_necessari', 'capacita_giornaliera_complessiva', 'durata_lotto_ore',
+        'durata_lotto_giorni', 'ore_per_giorno'
+    )
+
+    def __init__(self, n_prodotti: int):
+        self.scenario = None
+        self.assegnazioni = array('q', [0]) * n_prodotti
+        self.tempo_effettivo = array('d', [0.0]) * n_prodotti
+        self.capacita_giornaliera = array('q', [0]) * n_prodotti
+        self.ore_totali = array('d', [0.0]) * n_prodotti
+        self.giorni_necessari = array('d', [0.0]) * n_prodotti
+        self.capacita_giornaliera_complessiva = 0
+        self.durata_lotto_ore = 0.0
+        self.durata_lotto_giorni = 0.0
+        self.ore_per_giorno = 24
+
+    # Conversione nella forma a dizionari usata da output.py e app.py
+    def in_dizionario(self) -> Dict[str, object]:
+        scenario = self.scenario
+        prodotti = scenario.prodotti
+        assegnazioni_linee = {
+            prodotto: scenario.linee[self.assegnazioni[p]] for p, prodotto in enumerate(prodotti)
+        }
+
+        return {
+            'quantita': {prodotto: scenario.quantita[p] for p, prodotto in enumerate(prodotti)},
+            'tempo_per_unita': {prodotto: scenario.tempi[p] for p, prodotto in enumerate(prodotti)},
+            'assegnazioni_linee': assegnazioni_linee,
+            'risultati_per_prodotto': {
+                prodotto: {
+                    'linea_assegnata': assegnazioni_linee[prodotto],
+                    'tempo_effettivo': self.tempo_effettivo[p],
+                    'capacita_giornaliera': self.capacita_giornaliera[p],
+                    'ore_totali': self.ore_totali[p],
+                    'giorni_necessari': self.giorni_necessari[p]
+                }
+                for p, prodotto in enumerate(prodotti)
+            },
+            'capacita_giornaliera_complessiva': self.capacita_giornaliera_complessiva,
+            'durata_lotto_ore': self.durata_lotto_ore,
+            'durata_lotto_giorni': self.durata_lotto_giorni,
+            'ore_per_giorno': self.ore_per_giorno
+        }
+
+    def __repr__(self) -> str:
+        return f"<RisultatiCompatti: durata {self.durata_lotto_ore} ore>"
+
+
+# Assegnazione greedy sugli indici, come produzione.assegna_linee_a_prodotti
+def assegna_linee_compatto(scenario: ScenarioCompatto, assegnazioni: Optional[array] = None) -> array:
+
+    quantita, tempi, coefficienti = scenario.quantita, scenario.tempi, scenario.coefficienti
+    n_prodotti = scenario.numero_prodotti
+    if n_prodotti > scenario.numero_linee:
+        raise ValueError("L'assegnazione greedy richiede almeno una linea per prodotto")
+
+    prodotti_ordinati = sorted(range(n_prodotti), key=lambda p: quantita[p] * tempi[p], reverse=True)
+    linee_ordinate = sorted(range(scenario.numero_linee), key=coefficienti.__getitem__, reverse=True)
+
+    if assegnazioni is None:
+        assegnazioni = array('q', [0]) * n_prodotti
+    for i, p in enumerate(prodotti_ordinati):
+        assegnazioni[p] = linee_ordinate[i]
+    return assegnazioni
+
+
+# Calcolo del lotto in forma compatta, usato da produzione.calcola_tempo_produzione_lotto con uno
+# ScenarioCompatto: stesse tempistiche per prodotto (_tempi_prodotto), scritte in array.
+# Passando un RisultatiCompatti già allocato i suoi array vengono riutilizzati tra scenari
+def calcola_tempo_produzione_lotto_compatto(
+    scenario: ScenarioCompatto,
+    assegnazioni: Optional[array] = None,
+    ore_per_giorno: int = 24,
+    risultati: Optional[RisultatiCompatti] = None
+) -> RisultatiCompatti:
+
+    n_prodotti = scenario.numero_prodotti
+    if risultati is None or len(risultati.ore_totali) != n_prodotti:
+        risultati = RisultatiCompatti(n_prodotti)
+    if assegnazioni is None:
+        assegnazioni = assegna_linee_compatto(scenario, risultati.assegnazioni)
+    elif assegnazioni is not risultati.assegnazioni:
+        risultati.assegnazioni[:] = assegnazioni
+
+    quantita, tempi, coefficienti = scenario.quantita, scenario.tempi, scenario.coefficienti
+    carico_linee = [0.0] * scenario.numero_linee
+    capacita_complessiva = 0
+
+    for p in range(n_prodotti):
+        l = assegnazioni[p]
+        tempo_effettivo, capacita, ore_totali, giorni_necessari = _tempi_prodotto(
+            quantita[p], tempi[p], coefficienti[l], ore_per_giorno
+        )
+
+        risultati.tempo_effettivo[p] = tempo_effettivo
+        risultati.capacita_giornaliera[p] = capacita
+        risultati.ore_totali[p] = ore_totali
+        risultati.giorni_necessari[p] = giorni_necessari
+
+        carico_linee[l] += ore_totali
+        capacita_complessiva += capacita
+
+    durata_ore = max(carico_linee)
+
+    risultati.scenario = scenario
+    risultati.capacita_giornaliera_complessiva = capacita_complessiva
+    risultati.durata_lotto_ore = round(durata_ore, 2)
+    risultati.durata_lotto_giorni = round(durata_ore / ore_per_giorno, 3)
+    risultati.ore_per_giorno = ore_per_giorno
+    return risultati
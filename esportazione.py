@@ -0,0 +1,190 @@
+import csv
+import random
+from typing import Dict, Iterator, List, TextIO, Tuple, Union
+
+from models import Prodotto
+from produzione import (
+    genera_quantita_produzione,
+    genera_parametri_configurabili,
+    assegna_linee_a_prodotti,
+    calcola_tempo_produzione_lotto,
+)
+from parallelo import seme_scenario
+
+
+# Colonne dell'export: una riga per scenario e prodotto
+COLONNE = (
+    'scenario', 'prodotto', 'quantita', 'tempo_teorico', 'linea', 'efficienza',
+    'tempo_effettivo', 'capacita_giornaliera', 'ore_totali', 'giorni_necessari', 'durata_lotto_ore'
+)
+
+# Righe accumulate per ogni record batch Arrow/Parquet
+DIMENSIONE_BATCH = 65_536
+
+
+# Righe di un risultato (come restituito da calcola_tempo_produzione_lotto), nell'ordine di COLONNE
+def righe_risultati(risultati: Dict[str, object], scenario: int = 0) -> Iterator[Tuple]:
+
+    durata_ore = risultati['durata_lotto_ore']
+    for prodotto, quantita in risultati['quantita'].items():
+        linea = risultati['assegnazioni_linee'][prodotto]
+        dati = risultati['risultati_per_prodotto'][prodotto]
+        yield (
+            scenario,
+            prodotto.nome,
+            quantita,
+            risultati['tempo_per_unita'][prodotto],
+            linea.nome,
+            linea.coefficiente_efficienza,
+            dati['tempo_effettivo'],
+            dati['capacita_giornaliera'],
+            dati['ore_totali'],
+            dati['giorni_necessari'],
+            durata_ore
+        )
+
+
+# Scrittore CSV incrementale: l'intestazione è scritta una sola volta,
+# ogni risultato è scritto subito e non resta in memoria
+class ScrittoreCSV:
+
+    def __init__(self, destinazione: Union[str, TextIO]):
+        if isinstance(destinazione, str):
+            self._file = open(destinazione, 'w', encoding='utf-8', newline='')
+            self._da_chiudere = True
+        else:
+            self._file = destinazione
+            self._da_chiudere = False
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLONNE)
+        self.righe_scritte = 0
+
+    def scrivi(self, risultati: Dict[str, object], scenario: int = 0) -> None:
+        righe = list(righe_risultati(risultati, scenario))
+        self._writer.writerows(righe)
+        self.righe_scritte += len(righe)
+
+    def chiudi(self) -> None:
+        if self._da_chiudere:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self) -> "ScrittoreCSV":
+        return self
+
+    def __exit__(self, *eccezione) -> None:
+        self.chiudi()
+
+
+# Scrittore Parquet o Arrow IPC (richiede pyarrow): le righe sono accumulate per colonna
+# e scritte come record batch da dimensione_batch righe
+class ScrittoreArrow:
+
+    def __init__(self, percorso: str, formato: str = 'parquet', dimensione_batch: int = DIMENSIONE_BATCH):
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise RuntimeError("L'export Parquet/Arrow richiede il pacchetto pyarrow") from e
+
+        if formato not in ('parquet', 'arrow'):
+            raise ValueError(f"Formato di export sconosciuto: {formato}")
+
+        self._pa = pa
+        self.schema = pa.schema([
+            ('scenario', pa.int64()),
+            ('prodotto', pa.string()),
+            ('quantita', pa.int64()),
+            ('tempo_teorico', pa.float64()),
+            ('linea', pa.string()),
+            ('efficienza', pa.float64()),
+            ('tempo_effettivo', pa.float64()),
+            ('capacita_giornaliera', pa.int64()),
+            ('ore_totali', pa.float64()),
+            ('giorni_necessari', pa.float64()),
+            ('durata_lotto_ore', pa.float64())
+        ])
+
+        if formato == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(percorso, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(percorso, self.schema)
+
+        self.dimensione_batch = dimensione_batch
+        self._colonne: List[list] = [[] for _ in COLONNE]
+        self._righe_in_buffer = 0
+        self.righe_scritte = 0
+
+    def scrivi(self, risultati: Dict[str, object], scenario: int = 0) -> None:
+        colonne = self._colonne
+        for riga in righe_risultati(risultati, scenario):
+            for colonna, valore in zip(colonne, riga):
+                colonna.append(valore)
+            self._righe_in_buffer += 1
+
+        if self._righe_in_buffer >= self.dimensione_batch:
+            self._svuota()
+
+    def _svuota(self) -> None:
+        if not self._righe_in_buffer:
+            return
+        batch = self._pa.RecordBatch.from_arrays(
+            [self._pa.array(colonna, type=campo.type) for colonna, campo in zip(self._colonne, self.schema)],
+            schema=self.schema
+        )
+        self._writer.write_batch(batch)
+
+        self.righe_scritte += self._righe_in_buffer
+        self._colonne = [[] for _ in COLONNE]
+        self._righe_in_buffer = 0
+
+    def chiudi(self) -> None:
+        self._svuota()
+        self._writer.close()
+
+    def __enter__(self) -> "ScrittoreArrow":
+        return self
+
+    def __exit__(self, *eccezione) -> None:
+        self.chiudi()
+
+
+# Scrittore scelto dall'estensione del file: .csv, .parquet, .arrow o .feather
+def crea_scrittore(percorso: str) -> Union[ScrittoreCSV, ScrittoreArrow]:
+    if percorso.endswith('.csv'):
+        return ScrittoreCSV(percorso)
+    if percorso.endswith('.parquet'):
+        return ScrittoreArrow(percorso, 'parquet')
+    if percorso.endswith(('.arrow', '.feather')):
+        return ScrittoreArrow(percorso, 'arrow')
+    raise ValueError(f"Estensione non supportata per l'export: {percorso}")
+
+
+# Legge un file Arrow IPC con memory mapping: le colonne non vengono copiate in memoria
+def leggi_arrow(percorso: str):
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(percorso, 'r')).read_all()
+
+
+# Simula n_scenari scenari casuali e li esporta uno alla volta, senza conservarli in memoria.
+# I semi sono quelli di parallelo.esegui_scenari_paralleli, quindi gli scenari coincidono
+def esporta_scenari(
+    prodotti: List[Prodotto],
+    n_scenari: int,
+    percorso: str,
+    seed: int = 0,
+    ore_per_giorno: int = 24
+) -> int:
+
+    with crea_scrittore(percorso) as scrittore:
+        for indice in range(n_scenari):
+            rng = random.Random(seme_scenario(seed, indice))
+            quantita = genera_quantita_produzione(prodotti, rng)
+            tempo_per_unita, impianto = genera_parametri_configurabili(prodotti, rng)
+            assegnazioni_linee = assegna_linee_a_prodotti(prodotti, quantita, tempo_per_unita, impianto)
+            risultati = calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni_linee, ore_per_giorno)
+            scrittore.scrivi(risultati, indice)
+
+    return scrittore.righe_scritte
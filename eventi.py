@@ -0,0 +1,278 @@
+import heapq
+import math
+import random
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from produzione import crea_rng
+
+
+# Limiti dei parametri: oltre questi valori una sola simulazione elaborerebbe milioni di eventi
+MAX_SETUP_ORE = 24.0
+MAX_MTTR_ORE = 168.0
+# Guasti attesi per linea nella durata del lotto: fissa il minimo di mtbf_ore rispetto alla durata
+MAX_GUASTI_ATTESI = 1000
+# Eventi elaborati da una simulazione oltre i quali viene interrotta
+MAX_EVENTI = 200_000
+
+
+# Parametri fuori limite o simulazione interrotta per aver superato MAX_EVENTI
+class SimulazioneEventiNonValida(ValueError):
+    pass
+
+
+# Calendario dei turni giornalieri di una linea: intervalli (inizio, fine) in ore del giorno.
+# Intervalli contigui, anche a cavallo della mezzanotte, sono trattati come un unico periodo di lavoro
+class CalendarioTurni:
+
+    def __init__(self, turni: Sequence[Tuple[float, float]] = ((0, 24),), ore_per_giorno: int = 24):
+        intervalli = sorted((float(inizio), float(fine)) for inizio, fine in turni)
+        if not intervalli:
+            raise ValueError("Il calendario deve contenere almeno un turno")
+        for inizio, fine in intervalli:
+            if not 0 <= inizio < fine <= ore_per_giorno:
+                raise ValueError(f"Turno non valido: {inizio}-{fine}")
+
+        # Unione degli intervalli sovrapposti o contigui
+        uniti = [list(intervalli[0])]
+        for inizio, fine in intervalli[1:]:
+            if inizio <= uniti[-1][1]:
+                uniti[-1][1] = max(uniti[-1][1], fine)
+            else:
+                uniti.append([inizio, fine])
+
+        self.ore_per_giorno = ore_per_giorno
+        self.intervalli = [tuple(intervallo) for intervallo in uniti]
+        self.sempre_attivo = self.intervalli == [(0.0, float(ore_per_giorno))]
+
+    # Restituisce (inizio, fine) del periodo di lavoro in corso all'istante t o del successivo
+    def periodo(self, t: float) -> Tuple[float, float]:
+        if self.sempre_attivo:
+            return t, math.inf
+
+        giorno = math.floor(t / self.ore_per_giorno)
+        while True:
+            base = giorno * self.ore_per_giorno
+            for inizio, fine in self.intervalli:
+                inizio, fine = base + inizio, base + fine
+                if t < fine:
+                    # Un turno che termina a mezzanotte prosegue in quello che inizia a mezzanotte
+                    if fine - base == self.ore_per_giorno and self.intervalli[0][0] == 0:
+                        fine += self.intervalli[0][1]
+                    return max(inizio, t), fine
+            giorno += 1
+
+    @property
+    def ore_giornaliere(self) -> float:
+        return sum(fine - inizio for inizio, fine in self.intervalli)
+
+    def __repr__(self) -> str:
+        return f"<CalendarioTurni: {self.ore_giornaliere:g} ore/giorno>"
+
+
+# Stato di una linea durante la simulazione
+class _StatoLinea:
+
+    __slots__ = (
+        'nome', 'calendario', 'attivita', 'rimanente', 'in_turno', 'guasta', 'in_lavorazione',
+        'inizio_segmento', 'versione', 'completamento', 'ore_produzione', 'ore_setup', 'ore_guasto',
+        'guasti', 'inizio_guasto'
+    )
+
+    def __init__(self, nome: str, calendario: CalendarioTurni, attivita: List[Tuple[str, float]]):
+        self.nome = nome
+        self.calendario = calendario
+        self.attivita = attivita
+        self.rimanente = attivita[0][1] if attivita else 0.0
+        self.in_turno = False
+        self.guasta = False
+        self.in_lavorazione = False
+        self.inizio_segmento = 0.0
+        self.versione = 0
+        self.completamento = 0.0 if not attivita else None
+        self.ore_produzione = 0.0
+        self.ore_setup = 0.0
+        self.ore_guasto = 0.0
+        self.guasti = 0
+        self.inizio_guasto = 0.0
+
+
+# Sequenza di attività (setup e produzione) di ogni linea, ricavata dai risultati del lotto.
+# Con il lotto frazionato ogni quota diventa un lavoro sulla rispettiva linea
+def _attivita_per_linea(
+    risultati: Dict[str, object],
+    tempo_setup: Union[float, Dict[Tuple[str, str], float]]
+) -> Dict[str, List[Tuple[str, float]]]:
+
+    lavori: Dict[str, List[Tuple[str, float]]] = {}
+    for prodotto, dati in risultati['risultati_per_prodotto'].items():
+        quote = dati.get('ripartizione') or [{'linea': dati['linea_assegnata'], 'ore_totali': dati['ore_totali']}]
+        for quota in quote:
+            lavori.setdefault(quota['linea'].nome, []).append((prodotto.nome, quota['ore_totali']))
+
+    attivita = {}
+    for nome_linea, sequenza in lavori.items():
+        attivita[nome_linea] = []
+        precedente = None
+        for nome_prodotto, ore in sequenza:
+            # Attrezzaggio al cambio di prodotto sulla stessa linea
+            if precedente is not None:
+                if isinstance(tempo_setup, dict):
+                    setup = tempo_setup.get((precedente, nome_prodotto), 0.0)
+                else:
+                    setup = tempo_setup
+                if setup > 0:
+                    attivita[nome_linea].append(('setup', float(setup)))
+            attivita[nome_linea].append(('produzione', float(ore)))
+            precedente = nome_prodotto
+    return attivita
+
+
+def _verifica_parametri(
+    durata_lotto_ore: float,
+    tempo_setup: Union[float, Dict[Tuple[str, str], float]],
+    mtbf_ore: Optional[float],
+    mttr_ore: Optional[float]
+) -> None:
+
+    setup = tempo_setup.values() if isinstance(tempo_setup, dict) else [tempo_setup]
+    if any(not math.isfinite(valore) or not 0 <= valore <= MAX_SETUP_ORE for valore in setup):
+        raise SimulazioneEventiNonValida(f"Il tempo di setup deve essere un numero tra 0 e {MAX_SETUP_ORE:g} ore")
+
+    if mtbf_ore and mttr_ore:
+        if not math.isfinite(mttr_ore) or not 0 < mttr_ore <= MAX_MTTR_ORE:
+            raise SimulazioneEventiNonValida(f"mttr_ore deve essere un numero tra 0 e {MAX_MTTR_ORE:g}")
+        minimo = durata_lotto_ore / MAX_GUASTI_ATTESI
+        if not math.isfinite(mtbf_ore) or mtbf_ore < minimo:
+            raise SimulazioneEventiNonValida(
+                f"mtbf_ore deve essere almeno {minimo:.2f} ore (la durata del lotto / {MAX_GUASTI_ATTESI})"
+            )
+
+
+# Motore a eventi discreti: simula le linee del lotto con turni, attrezzaggi, guasti e riparazioni.
+# Oltre max_eventi (default MAX_EVENTI) eventi elaborati la simulazione viene interrotta con SimulazioneEventiNonValida
+def simula_eventi(
+    risultati: Dict[str, object],
+    turni: Union[Sequence[Tuple[float, float]], Dict[str, Sequence[Tuple[float, float]]]] = ((0, 24),),
+    tempo_setup: Union[float, Dict[Tuple[str, str], float]] = 0.0,
+    mtbf_ore: Optional[float] = None,
+    mttr_ore: Optional[float] = None,
+    rng: Optional[random.Random] = None,
+    max_eventi: Optional[int] = None
+) -> Dict[str, object]:
+
+    max_eventi = max_eventi or MAX_EVENTI
+    _verifica_parametri(risultati['durata_lotto_ore'], tempo_setup, mtbf_ore, mttr_ore)
+    rng = crea_rng(rng)
+    ore_per_giorno = risultati['ore_per_giorno']
+    guasti_attivi = bool(mtbf_ore and mttr_ore)
+
+    linee = {}
+    for nome, attivita in _attivita_per_linea(risultati, tempo_setup).items():
+        turni_linea = turni.get(nome, ((0, ore_per_giorno),)) if isinstance(turni, dict) else turni
+        linee[nome] = _StatoLinea(nome, CalendarioTurni(turni_linea, ore_per_giorno), attivita)
+
+    coda = []
+    sequenza = 0
+
+    def pianifica(t: float, tipo: str, linea: _StatoLinea, versione: int = 0) -> None:
+        nonlocal sequenza
+        sequenza += 1
+        # A parità di istante il completamento di un'attività precede fine turno e guasti
+        priorita = 0 if tipo == 'fine_attivita' else 1
+        heapq.heappush(coda, (t, priorita, sequenza, tipo, linea.nome, versione))
+
+    def ferma(linea: _StatoLinea, t: float) -> None:
+        if linea.in_lavorazione:
+            trascorso = t - linea.inizio_segmento
+            linea.rimanente -= trascorso
+            if linea.attivita[0][0] == 'setup':
+                linea.ore_setup += trascorso
+            else:
+                linea.ore_produzione += trascorso
+            linea.in_lavorazione = False
+            linea.versione += 1
+
+    def avvia(linea: _StatoLinea, t: float) -> None:
+        if linea.in_turno and not linea.guasta and linea.attivita and not linea.in_lavorazione:
+            linea.in_lavorazione = True
+            linea.inizio_segmento = t
+            pianifica(t + linea.rimanente, 'fine_attivita', linea, linea.versione)
+
+    for linea in linee.values():
+        if linea.completamento is not None:
+            continue
+        inizio, _ = linea.calendario.periodo(0.0)
+        pianifica(inizio, 'inizio_turno', linea)
+        if guasti_attivi:
+            pianifica(rng.expovariate(1 / mtbf_ore), 'guasto', linea)
+
+    eventi_elaborati = 0
+    while coda:
+        t, _, _, tipo, nome, versione = heapq.heappop(coda)
+        linea = linee[nome]
+        if linea.completamento is not None:
+            continue
+        eventi_elaborati += 1
+        if eventi_elaborati > max_eventi:
+            raise SimulazioneEventiNonValida(
+                f"La simulazione supera {max_eventi} eventi: ridurre guasti, turni o tempi di setup"
+            )
+
+        if tipo == 'fine_attivita':
+            if versione != linea.versione:
+                continue
+            ferma(linea, t)
+            linea.attivita.pop(0)
+            if linea.attivita:
+                linea.rimanente = linea.attivita[0][1]
+                avvia(linea, t)
+            else:
+                linea.completamento = t
+                if linea.guasta:
+                    linea.ore_guasto += t - linea.inizio_guasto
+
+        elif tipo == 'inizio_turno':
+            linea.in_turno = True
+            _, fine = linea.calendario.periodo(t)
+            if fine != math.inf:
+                pianifica(fine, 'fine_turno', linea)
+            avvia(linea, t)
+
+        elif tipo == 'fine_turno':
+            ferma(linea, t)
+            linea.in_turno = False
+            inizio, _ = linea.calendario.periodo(t)
+            pianifica(inizio, 'inizio_turno', linea)
+
+        elif tipo == 'guasto':
+            ferma(linea, t)
+            linea.guasta = True
+            linea.guasti += 1
+            linea.inizio_guasto = t
+            pianifica(t + rng.expovariate(1 / mttr_ore), 'riparazione', linea)
+
+        elif tipo == 'riparazione':
+            linea.guasta = False
+            linea.ore_guasto += t - linea.inizio_guasto
+            pianifica(t + rng.expovariate(1 / mtbf_ore), 'guasto', linea)
+            avvia(linea, t)
+
+    durata_ore = max(linea.completamento for linea in linee.values())
+
+    return {
+        'durata_lotto_ore': round(durata_ore, 2),
+        'durata_lotto_giorni': round(durata_ore / ore_per_giorno, 3),
+        'linee': [
+            {
+                'linea': linea.nome,
+                'completamento_ore': round(linea.completamento, 2),
+                'ore_produzione': round(linea.ore_produzione, 2),
+                'ore_setup': round(linea.ore_setup, 2),
+                'ore_guasto': round(linea.ore_guasto, 2),
+                'guasti': linea.guasti,
+                'utilizzo': round(linea.ore_produzione / durata_ore, 4) if durata_ore else 0.0
+            }
+            for linea in linee.values()
+        ],
+        'eventi_elaborati': eventi_elaborati
+    }
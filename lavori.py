@@ -0,0 +1,176 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+
+class CodaPiena(Exception):
+    pass
+
+
+class LavoroAnnullato(Exception):
+    pass
+
+
+STATI_FINALI = ('completato', 'annullato', 'errore')
+
+
+# Lavoro in background: stato, avanzamento (tra 0 e 1), risultato parziale e finale.
+# La funzione eseguita riceve il lavoro e chiama aggiorna(); l'annullamento è cooperativo
+# e interrompe il lavoro al primo aggiornamento successivo alla richiesta
+class Lavoro:
+
+    def __init__(self, id: str, tipo: str):
+        self.id = id
+        self.tipo = tipo
+        self.stato = 'in_coda'
+        self.avanzamento = 0.0
+        self.parziale = None
+        self.risultato = None
+        self.errore: Optional[str] = None
+        self.creato = time.time()
+        self.avviato: Optional[float] = None
+        self.terminato: Optional[float] = None
+        self.futuro = None
+        self._richiesta_annullamento = threading.Event()
+
+    @property
+    def annullamento_richiesto(self) -> bool:
+        return self._richiesta_annullamento.is_set()
+
+    def aggiorna(self, avanzamento: float, parziale=None) -> None:
+        if self.annullamento_richiesto:
+            raise LavoroAnnullato(self.id)
+        self.avanzamento = min(max(avanzamento, 0.0), 1.0)
+        if parziale is not None:
+            self.parziale = parziale
+
+    def in_dizionario(self) -> Dict[str, object]:
+        dati = {
+            'id': self.id,
+            'tipo': self.tipo,
+            'stato': self.stato,
+            'avanzamento': round(self.avanzamento, 4),
+            'creato': self.creato,
+            'avviato': self.avviato,
+            'terminato': self.terminato
+        }
+        if self.stato == 'completato':
+            dati['risultato'] = self.risultato
+        elif self.parziale is not None:
+            dati['parziale'] = self.parziale
+        if self.errore is not None:
+            dati['errore'] = self.errore
+        return dati
+
+    def __repr__(self) -> str:
+        return f"<Lavoro {self.id} ({self.tipo}): {self.stato}>"
+
+
+# Coda di lavori eseguiti da un pool limitato di thread nel processo corrente.
+# Oltre lunghezza_massima lavori in attesa le nuove richieste sono rifiutate (CodaPiena);
+# dei lavori terminati sono conservati solo i più recenti
+class CodaLavori:
+
+    def __init__(self, n_worker: int = 2, lunghezza_massima: int = 32, lavori_conservati: int = 1000):
+        if n_worker <= 0 or lunghezza_massima <= 0:
+            raise ValueError("Il numero di worker e la lunghezza della coda devono essere maggiori di 0")
+
+        self.n_worker = n_worker
+        self.lunghezza_massima = lunghezza_massima
+        self.lavori_conservati = lavori_conservati
+        self._executor = ThreadPoolExecutor(max_workers=n_worker, thread_name_prefix='lavoro')
+        self._lavori: "OrderedDict[str, Lavoro]" = OrderedDict()
+        self._contatore = itertools.count(1)
+        self._lock = threading.Lock()
+        self._rifiutati = 0
+
+    def _in_attesa(self) -> int:
+        return sum(1 for lavoro in self._lavori.values() if lavoro.stato == 'in_coda')
+
+    def _rimuovi_terminati(self) -> None:
+        terminati = [id for id, lavoro in self._lavori.items() if lavoro.stato in STATI_FINALI]
+        for id in terminati[:max(0, len(terminati) - self.lavori_conservati)]:
+            del self._lavori[id]
+
+    def sottometti(self, tipo: str, funzione: Callable[[Lavoro], object]) -> Lavoro:
+        with self._lock:
+            if self._in_attesa() >= self.lunghezza_massima:
+                self._rifiutati += 1
+                raise CodaPiena(f"Coda piena: {self.lunghezza_massima} lavori già in attesa")
+
+            lavoro = Lavoro(f"{next(self._contatore):06d}", tipo)
+            self._lavori[lavoro.id] = lavoro
+            self._rimuovi_terminati()
+            lavoro.futuro = self._executor.submit(self._esegui, lavoro, funzione)
+            return lavoro
+
+    def _esegui(self, lavoro: Lavoro, funzione: Callable[[Lavoro], object]) -> None:
+        with self._lock:
+            if lavoro.annullamento_richiesto:
+                lavoro.stato = 'annullato'
+                lavoro.terminato = time.time()
+                return
+            lavoro.stato = 'in_esecuzione'
+            lavoro.avviato = time.time()
+
+        try:
+            risultato = funzione(lavoro)
+        except LavoroAnnullato:
+            stato, risultato = 'annullato', None
+        except Exception as e:
+            stato, risultato = 'errore', None
+            lavoro.errore = str(e)
+        else:
+            stato = 'completato'
+            lavoro.avanzamento = 1.0
+
+        with self._lock:
+            lavoro.risultato = risultato
+            lavoro.stato = stato
+            lavoro.terminato = time.time()
+
+    def ottieni(self, id: str) -> Optional[Lavoro]:
+        with self._lock:
+            return self._lavori.get(id)
+
+    # Annulla un lavoro: se è ancora in coda non verrà eseguito,
+    # se è in esecuzione si interrompe al prossimo aggiornamento dell'avanzamento
+    def annulla(self, id: str) -> Optional[Lavoro]:
+        with self._lock:
+            lavoro = self._lavori.get(id)
+            if lavoro is None or lavoro.stato in STATI_FINALI:
+                return lavoro
+
+            lavoro._richiesta_annullamento.set()
+            if lavoro.stato == 'in_coda' and lavoro.futuro.cancel():
+                lavoro.stato = 'annullato'
+                lavoro.terminato = time.time()
+            return lavoro
+
+    def statistiche(self) -> Dict[str, object]:
+        with self._lock:
+            per_stato: Dict[str, int] = {}
+            for lavoro in self._lavori.values():
+                per_stato[lavoro.stato] = per_stato.get(lavoro.stato, 0) + 1
+            return {
+                'n_worker': self.n_worker,
+                'lunghezza_massima': self.lunghezza_massima,
+                'lavori': per_stato,
+                'rifiutati': self._rifiutati
+            }
+
+    def chiudi(self) -> None:
+        with self._lock:
+            for lavoro in self._lavori.values():
+                if lavoro.stato not in STATI_FINALI:
+                    lavoro._richiesta_annullamento.set()
+                    if lavoro.stato == 'in_coda' and lavoro.futuro.cancel():
+                        lavoro.stato = 'annullato'
+                        lavoro.terminato = time.time()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __repr__(self) -> str:
+        return f"<CodaLavori: {len(self._lavori)} lavori, {self.n_worker} worker>"
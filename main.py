@@ -1,27 +1,52 @@
-from models import GiaccaInvernale, TShirt, Felpa, Pantalone
+import argparse
+import importlib
+import json
+import sys
+import time
+from typing import Dict, Iterable, TextIO
+
+# Tempi di importazione dei moduli (secondi), riportati con --tempi-import.
+# Solo il calcolo è importato all'avvio: output, export, parallelismo e archivio
+# sono importati al primo uso, e Flask e NumPy non sono mai importati da questo modulo
+TEMPI_IMPORT: Dict[str, float] = {}
+
+_inizio_import = time.perf_counter()
+from cache import CacheLRU
+from catalogo import catalogo_predefinito
+from models import Impianto
 from produzione import (
     genera_quantita_produzione,
     genera_parametri_configurabili,
     assegna_linee_a_prodotti,
     calcola_tempo_produzione_lotto,
+    calcola_tempo_produzione_lotto_frazionato,
+    crea_rng,
 )
-from output import output_simulazione_produzione
+from validazione import schema_da_catalogo
+TEMPI_IMPORT['catalogo, produzione'] = time.perf_counter() - _inizio_import
+
 
+# Importa un modulo al primo uso registrandone il tempo di importazione
+def _importa(nome: str):
+    if nome not in sys.modules:
+        inizio = time.perf_counter()
+        importlib.import_module(nome)
+        TEMPI_IMPORT[nome] = time.perf_counter() - inizio
+    return sys.modules[nome]
 
-def main():
-    # Definizione dei 4 prodotti
-    prodotti = [
-        GiaccaInvernale(),
-        TShirt(),
-        Felpa(),
-        Pantalone()
-    ]
+
+def main(seed=None, modalita_report=None, file_report=None, file_esportazione=None):
+    # Generatore casuale, riproducibile se è indicato un seme
+    rng = crea_rng(seed)
+    
+    # Prodotti definiti nel catalogo
+    prodotti = catalogo_predefinito().prodotti
     
     # Richiamo la funzione per generare randomicamente le quantità da produrre
-    quantita = genera_quantita_produzione(prodotti)
+    quantita = genera_quantita_produzione(prodotti, rng)
     
     # Richiamo la funzione per generare i parametri configurabili
-    tempo_per_unita, impianto = genera_parametri_configurabili(prodotti)
+    tempo_per_unita, impianto = genera_parametri_configurabili(prodotti, rng)
     
     # Richiamo la funzione per assegnare le linee ai prodotti
     assegnazioni_linee = assegna_linee_a_prodotti(
@@ -39,9 +64,165 @@ def main():
         ore_per_giorno=24
     )
     
-    # Richiamo funzione per stampa dell'output in console
-    output_simulazione_produzione(risultati)
+    # Richiamo funzione per stampa dell'output in console (o su file)
+    _importa('output').output_simulazione_produzione(risultati, modalita_report, file_report)
+    
+    # Export dei risultati in formato colonnare (CSV, Parquet o Arrow)
+    if file_esportazione:
+        with _importa('esportazione').crea_scrittore(file_esportazione) as scrittore:
+            scrittore.scrivi(risultati)
+
+
+# Simulazione di molti scenari su un pool di processi, con riepilogo delle durate
+def main_scenari(n_scenari: int, n_worker: int, dimensione_chunk: int, seed: int):
+    prodotti = catalogo_predefinito().prodotti
+    
+    aggregatore = _importa('parallelo').esegui_scenari_paralleli(
+        prodotti,
+        n_scenari,
+        seed=seed,
+        n_worker=n_worker,
+        dimensione_chunk=dimensione_chunk
+    )
+    riepilogo = aggregatore.riepilogo()
+    
+    print(f"\n Scenari simulati: {riepilogo['n_scenari']}")
+    print(f"  - Durata media del lotto: {riepilogo['media_ore']:.2f} ore")
+    print(f"  - Durata minima / massima: {riepilogo['minimo_ore']:.2f} / {riepilogo['massimo_ore']:.2f} ore")
+    for nome, valore in riepilogo['percentili_ore'].items():
+        print(f"  - {nome}: {valore:.2f} ore")
+
+
+# Simulazione di molti scenari in un solo processo: uno scenario JSON per riga
+# (gli stessi campi di /api/simula) letto da sorgente, un risultato NDJSON per riga
+# scritto su destinazione. Gli scenari ripetuti con lo stesso seed sono calcolati una sola volta,
+# finché restano tra gli ultimi dimensione_cache scenari distinti: la memoria non cresce con l'input
+def main_batch(sorgente: Iterable[str], destinazione: TextIO, dimensione_cache: int = 4096) -> Dict[str, int]:
+    risposte = _importa('risposte')
+    
+    catalogo = catalogo_predefinito()
+    prodotti = catalogo.prodotti
+    schema = schema_da_catalogo(catalogo)
+    calcolati = CacheLRU(dimensione_massima=dimensione_cache, ttl_secondi=float('inf'))
+    conteggi = {'scenari': 0, 'errori': 0, 'ripetuti': 0}
+    
+    for indice, riga in enumerate(riga for riga in sorgente if riga.strip()):
+        conteggi['scenari'] += 1
+        try:
+            data = json.loads(riga)
+        except ValueError as e:
+            errori = [f'Scenario non valido: {str(e)}']
+        else:
+            valori, errori = schema.valida(data)
+            errori = [errore.messaggio for errore in errori]
+            if not errori and data.get('eventi') is not None:
+                errori = ["La simulazione a eventi non è disponibile nel batch da riga di comando"]
+            if not errori and data.get('stocastico') and data.get('frazionato'):
+                errori = ["La distribuzione stocastica non è disponibile con il lotto frazionato"]
+        
+        if errori:
+            conteggi['errori'] += 1
+            destinazione.write(risposte.serializza({'indice': indice, 'errore': errori}).decode('utf-8') + '\n')
+            continue
+        
+        quantita = {prodotto: valori[prodotto.campo_quantita] for prodotto in prodotti}
+        coefficienti = tuple(valori[linea.campo_coefficiente] for linea in catalogo.linee)
+        frazionato = bool(data.get('frazionato'))
+        stocastico = bool(data.get('stocastico'))
+        seed = valori.get('seed')
+        chiave = (tuple(quantita.values()), coefficienti, seed, frazionato, stocastico) if seed is not None else None
+        
+        def calcola() -> dict:
+            tempo_per_unita, _ = genera_parametri_configurabili(prodotti, crea_rng(seed))
+            impianto = Impianto([linea.crea_linea(coefficiente) for linea, coefficiente in zip(catalogo.linee, coefficienti)])
+            if frazionato:
+                risultati = calcola_tempo_produzione_lotto_frazionato(quantita, tempo_per_unita, impianto)
+            else:
+                assegnazioni_linee = assegna_linee_a_prodotti(prodotti, quantita, tempo_per_unita, impianto)
+                risultati = calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni_linee)
+            risultato = risposte.formatta_risultati_json(risultati)
+            # Come in /api/simula, distribuzione analitica della durata con le linee assegnate sui tempi medi
+            if stocastico:
+                distribuzione = _importa('stocastico').distribuzione_durata_lotto(prodotti, quantita, impianto)
+                risultato['stocastico'] = distribuzione.riepilogo()
+            return risultato
+        
+        # Senza seed i tempi sono casuali a ogni scenario e il risultato non è riusabile
+        risultato = calcola() if chiave is None else calcolati.ottieni_o_calcola(chiave, calcola)
+        destinazione.write(risposte.serializza({'indice': indice, **risultato}).decode('utf-8') + '\n')
+    
+    conteggi['ripetuti'] = calcolati.hit
+    return conteggi
+
+
+# Tempi di importazione per gruppo di moduli e tempo complessivo del processo
+def _stampa_tempi_import(tempo_totale: float, file: TextIO = sys.stderr) -> None:
+    print(f"\n Tempi di importazione ({1000 * sum(TEMPI_IMPORT.values()):.1f} ms su {1000 * tempo_totale:.1f} ms di esecuzione):", file=file)
+    for nome, secondi in sorted(TEMPI_IMPORT.items(), key=lambda voce: -voce[1]):
+        print(f"  - {nome}: {1000 * secondi:.1f} ms", file=file)
+    pesanti = [nome for nome in ('flask', 'numpy', 'pyarrow') if nome in sys.modules]
+    print(f"  - Moduli pesanti importati: {', '.join(pesanti) if pesanti else 'nessuno'}", file=file)
+
+
+def _leggi_argomenti():
+    parser = argparse.ArgumentParser(description="Simulazione lotto di produzione")
+    parser.add_argument('--scenari', type=int, default=0,
+                        help="numero di scenari da simulare in parallelo (default: una sola simulazione)")
+    parser.add_argument('--worker', type=int, default=None,
+                        help="numero di processi worker (default: numero di CPU)")
+    parser.add_argument('--chunk', type=int, default=1000,
+                        help="scenari per chunk inviato a ciascun worker")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seme per la riproducibilità della simulazione o degli scenari")
+    parser.add_argument('--esporta', default=None,
+                        help="file .csv, .parquet o .arrow su cui esportare i risultati (con --scenari, uno per scenario)")
+    parser.add_argument('--archivio', default=None,
+                        help="database SQLite in cui archiviare gli scenari simulati (con --scenari)")
+    parser.add_argument('--batch', default=None,
+                        help="file con uno scenario JSON per riga da simulare in un solo processo ('-' per lo stdin)")
+    parser.add_argument('--report', default=None,
+                        help="dettaglio del report: completo, compatto o riepilogo (default: compatto oltre 50 prodotti, altrimenti completo)")
+    parser.add_argument('--output', default=None,
+                        help="file su cui scrivere il report o, con --batch, i risultati (default: console)")
+    parser.add_argument('--tempi-import', action='store_true',
+                        help="riporta su stderr i tempi di importazione dei moduli")
+    argomenti = parser.parse_args()
+    
+    # Il modulo di output è importato solo per validare il report richiesto
+    if argomenti.report is not None and argomenti.report not in _importa('output').MODALITA_REPORT:
+        parser.error(f"argument --report: invalid choice: '{argomenti.report}'")
+    return argomenti
 
 
 if __name__ == "__main__":
-    main()
+    argomenti = _leggi_argomenti()
+    if argomenti.batch:
+        sorgente = sys.stdin if argomenti.batch == '-' else open(argomenti.batch, encoding='utf-8')
+        destinazione = open(argomenti.output, 'w', encoding='utf-8') if argomenti.output else sys.stdout
+        try:
+            conteggi = main_batch(sorgente, destinazione)
+        finally:
+            for file in (sorgente, destinazione):
+                if file not in (sys.stdin, sys.stdout):
+                    file.close()
+        print(f"\n Scenari simulati: {conteggi['scenari']} ({conteggi['errori']} con errori, {conteggi['ripetuti']} ripetuti)",
+              file=sys.stderr)
+    elif argomenti.scenari > 0 and argomenti.esporta:
+        seed = argomenti.seed if argomenti.seed is not None else 0
+        righe = _importa('esportazione').esporta_scenari(catalogo_predefinito().prodotti, argomenti.scenari, argomenti.esporta, seed)
+        print(f"\n Esportate {righe} righe in {argomenti.esporta}")
+    elif argomenti.scenari > 0 and argomenti.archivio:
+        archivio_scenari = _importa('archivio')
+        seed = argomenti.seed if argomenti.seed is not None else 0
+        archivio = archivio_scenari.ArchivioScenari(argomenti.archivio)
+        nuovi = archivio_scenari.archivia_scenari(catalogo_predefinito().prodotti, argomenti.scenari, archivio, seed)
+        print(f"\n Archiviati {nuovi} scenari nuovi in {argomenti.archivio} ({len(archivio)} in totale)")
+        archivio.chiudi()
+    elif argomenti.scenari > 0:
+        seed = argomenti.seed if argomenti.seed is not None else 0
+        main_scenari(argomenti.scenari, argomenti.worker, argomenti.chunk, seed)
+    else:
+        main(argomenti.seed, argomenti.report, argomenti.output, argomenti.esporta)
+    
+    if argomenti.tempi_import:
+        _stampa_tempi_import(time.perf_counter() - _inizio_import)
@@ -96,6 +96,12 @@ class Pantalone(Prodotto):
         return "Pantaloni"
 
 
+# Capi prodotti in un giorno da una linea con il coefficiente dato
+def capacita_giornaliera(tempo_per_unita: float, coefficiente_efficienza: float, ore_giornaliere: int = 24) -> int:
+    capacita = (ore_giornaliere * coefficiente_efficienza) / tempo_per_unita
+    return int(capacita)
+
+
 class LineaProduttiva:
     
     def __init__(self, nome: str, coefficiente_efficienza: float):
@@ -103,8 +109,7 @@ class LineaProduttiva:
         self.coefficiente_efficienza = coefficiente_efficienza
     
     def calcola_capacita_giornaliera(self, tempo_per_unita: float, ore_giornaliere: int = 24) -> int:
-        capacita = (ore_giornaliere * self.coefficiente_efficienza) / tempo_per_unita
-        return int(capacita)
+        return capacita_giornaliera(tempo_per_unita, self.coefficiente_efficienza, ore_giornaliere)
     
     def __repr__(self) -> str:
         return f"<Linea {self.nome}: efficienza {self.coefficiente_efficienza:.2f}>"
@@ -0,0 +1,166 @@
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from models import Prodotto, Impianto
+from catalogo import Catalogo, catalogo_predefinito
+
+
+# Numero di scenari elaborati per blocco, per limitare la memoria occupata
+DIMENSIONE_BLOCCO = 100_000
+
+
+# Arrotondamento vettoriale identico a round() di Python: np.round lavora su x * 10**cifre,
+# quindi i casi a metà strada vengono ricalcolati con round() per non divergere dal percorso scalare
+def _arrotonda(valori: np.ndarray, cifre: int) -> np.ndarray:
+
+    risultato = np.round(valori, cifre)
+    scalati = valori * 10.0 ** cifre
+    ambigui = np.abs(scalati - np.floor(scalati) - 0.5) < 1e-6
+    if ambigui.any():
+        risultato[ambigui] = [round(float(v), cifre) for v in valori[ambigui]]
+    return risultato
+
+
+# Funzione per generare N scenari in forma di matrici (N x prodotti, N x linee)
+def genera_scenari(
+    prodotti: List[Prodotto],
+    n_scenari: int,
+    rng: Union[np.random.Generator, int, None] = None,
+    catalogo: Optional[Catalogo] = None
+) -> Dict[str, np.ndarray]:
+
+    # Accetta un Generator già creato oppure un seme
+    rng = np.random.default_rng(rng)
+    catalogo = catalogo or catalogo_predefinito()
+
+    range_quantita = np.array([prodotto.range_quantita_produzione for prodotto in prodotti])
+    range_tempi = np.array([prodotto.range_tempo_produzione for prodotto in prodotti], dtype=float)
+    range_coeff = np.array([linea.range_coefficiente for linea in catalogo.linee], dtype=float)
+
+    quantita = rng.integers(
+        range_quantita[:, 0], range_quantita[:, 1], size=(n_scenari, len(prodotti)), endpoint=True
+    )
+    tempi = _arrotonda(rng.uniform(range_tempi[:, 0], range_tempi[:, 1], size=(n_scenari, len(prodotti))), 2)
+    coefficienti = _arrotonda(rng.uniform(range_coeff[:, 0], range_coeff[:, 1], size=(n_scenari, len(range_coeff))), 2)
+
+    return {'quantita': quantita, 'tempi': tempi, 'coefficienti': coefficienti}
+
+
+# Versione vettoriale di produzione._arrotonda_tempo_in_minuti
+def _arrotonda_tempo_in_minuti(ore_decimali: np.ndarray) -> np.ndarray:
+
+    ore_intere = np.trunc(ore_decimali)
+    minuti_arrotondati = np.rint((ore_decimali - ore_intere) * 60)
+    return ore_intere + minuti_arrotondati / 60
+
+
+# Versione vettoriale di produzione.assegna_linee_a_prodotti (indice della linea per ogni prodotto)
+def assegna_linee_vettoriale(
+    quantita: np.ndarray,
+    tempi: np.ndarray,
+    coefficienti: np.ndarray
+) -> np.ndarray:
+
+    n_prodotti = quantita.shape[1]
+    if n_prodotti > coefficienti.shape[1]:
+        raise ValueError("Il numero di prodotti non può superare il numero di linee")
+
+    carico_lavoro = quantita * tempi
+
+    # Ordinamenti stabili, come sorted(..., reverse=True) nel percorso scalare
+    prodotti_ordinati = np.argsort(-carico_lavoro, axis=1, kind='stable')
+    linee_ordinate = np.argsort(-coefficienti, axis=1, kind='stable')[:, :n_prodotti]
+
+    assegnazioni = np.empty_like(prodotti_ordinati)
+    np.put_along_axis(assegnazioni, prodotti_ordinati, linee_ordinate, axis=1)
+    return assegnazioni
+
+
+# Versione vettoriale di produzione.calcola_tempo_produzione_lotto su tutti gli scenari.
+# assegnazioni (N x prodotti, indici di linea) è facoltativo: senza, si usa il greedy vettoriale
+def calcola_lotti_vettoriale(
+    quantita: np.ndarray,
+    tempi: np.ndarray,
+    coefficienti: np.ndarray,
+    ore_per_giorno: int = 24,
+    assegnazioni: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+
+    if assegnazioni is None:
+        assegnazioni = assegna_linee_vettoriale(quantita, tempi, coefficienti)
+    coeff_assegnati = np.take_along_axis(coefficienti, assegnazioni, axis=1)
+
+    tempo_effettivo = _arrotonda_tempo_in_minuti(tempi / coeff_assegnati)
+    capacita_giornaliera = np.trunc((ore_per_giorno * coeff_assegnati) / tempi).astype(np.int64)
+    ore_totali_precise = quantita * tempo_effettivo
+    ore_totali = _arrotonda(ore_totali_precise, 2)
+    giorni_necessari = _arrotonda(ore_totali_precise / ore_per_giorno, 3)
+
+    # Come produzione._durata_lotto_ore: i prodotti di una linea sono lavorati in sequenza,
+    # quindi si sommano le ore per linea (bincount sugli indici scenario x linea, più rapido di np.add.at)
+    # e la durata è il carico massimo
+    n_scenari, n_linee = coefficienti.shape
+    indici = assegnazioni + n_linee * np.arange(n_scenari)[:, None]
+    carico_linee = np.bincount(indici.ravel(), weights=ore_totali.ravel(), minlength=n_scenari * n_linee)
+    durata_ore = _arrotonda(carico_linee.reshape(n_scenari, n_linee).max(axis=1), 2)
+
+    return {
+        'assegnazioni_linee': assegnazioni,
+        'tempo_effettivo': tempo_effettivo,
+        'capacita_giornaliera': capacita_giornaliera,
+        'ore_totali': ore_totali,
+        'giorni_necessari': giorni_necessari,
+        'capacita_giornaliera_complessiva': capacita_giornaliera.sum(axis=1),
+        'durata_lotto_ore': durata_ore,
+        'durata_lotto_giorni': _arrotonda(durata_ore / ore_per_giorno, 3)
+    }
+
+
+# Funzione per ricostruire un singolo scenario nella forma usata dal percorso scalare
+def scenario_scalare(
+    prodotti: List[Prodotto],
+    scenari: Dict[str, np.ndarray],
+    indice: int,
+    catalogo: Optional[Catalogo] = None
+) -> Tuple[Dict[Prodotto, int], Dict[Prodotto, float], Impianto]:
+
+    catalogo = catalogo or catalogo_predefinito()
+    quantita = {prodotto: int(q) for prodotto, q in zip(prodotti, scenari['quantita'][indice])}
+    tempo_per_unita = {prodotto: float(t) for prodotto, t in zip(prodotti, scenari['tempi'][indice])}
+    linee = [
+        specifica.crea_linea(float(coeff))
+        for specifica, coeff in zip(catalogo.linee, scenari['coefficienti'][indice])
+    ]
+    return quantita, tempo_per_unita, Impianto(linee)
+
+
+# Funzione per stimare la distribuzione della durata del lotto su N scenari
+def simula_monte_carlo(
+    prodotti: List[Prodotto],
+    n_scenari: int,
+    seed: Union[np.random.Generator, int, None] = None,
+    ore_per_giorno: int = 24,
+    percentili: Sequence[float] = (50, 90, 99),
+    catalogo: Optional[Catalogo] = None
+) -> Dict[str, object]:
+
+    rng = np.random.default_rng(seed)
+    durate = np.empty(n_scenari)
+
+    for inizio in range(0, n_scenari, DIMENSIONE_BLOCCO):
+        fine = min(inizio + DIMENSIONE_BLOCCO, n_scenari)
+        scenari = genera_scenari(prodotti, fine - inizio, rng, catalogo)
+        risultati = calcola_lotti_vettoriale(
+            scenari['quantita'], scenari['tempi'], scenari['coefficienti'], ore_per_giorno
+        )
+        durate[inizio:fine] = risultati['durata_lotto_ore']
+
+    valori = np.percentile(durate, percentili)
+
+    return {
+        'n_scenari': n_scenari,
+        'durata_lotto_ore': durate,
+        'media_ore': round(float(durate.mean()), 2),
+        'percentili_ore': {f"P{p:g}": round(float(v), 2) for p, v in zip(percentili, valori)}
+    }
@@ -1,4 +1,5 @@
-from typing import Dict, Tuple
+import sys
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
 
 # Funzioni per le conversioni e formattazioni
 def _converti_ore_in_ore_minuti(ore_decimali: float) -> Tuple[int, int]:
@@ -49,78 +50,149 @@ def _formatta_tempo_unitario(ore_decimali: float) -> str:
         return f"{ore}h e {minuti}min/capo"
 
 
+# Modalità del report: completo (blocchi per prodotto e tabella), compatto (solo tabella)
+# e riepilogo (solo totali). Senza modalità esplicita, oltre SOGLIA_COMPATTO prodotti
+# il report è compatto
+MODALITA_REPORT = ('completo', 'compatto', 'riepilogo')
+SOGLIA_COMPATTO = 50
+
+# Dimensione minima (in caratteri) dei blocchi scritti sullo stream
+DIMENSIONE_BUFFER = 64 * 1024
+
+
 # Funzione per generare l'output mostrato in console
-def output_simulazione_produzione(risultati: Dict[str, object]) -> None:
-    
+def output_simulazione_produzione(
+    risultati: Dict[str, object],
+    modalita: Optional[str] = None,
+    file: Optional[Union[str, TextIO]] = None
+) -> None:
+    scrivi_report(risultati, file, modalita)
+
+
+# Scrive il report su uno stream (default: stdout) o su un file indicato per percorso,
+# accumulando le righe in blocchi da almeno dimensione_buffer caratteri
+def scrivi_report(
+    risultati: Dict[str, object],
+    destinazione: Optional[Union[str, TextIO]] = None,
+    modalita: Optional[str] = None,
+    dimensione_buffer: int = DIMENSIONE_BUFFER
+) -> None:
+
+    if isinstance(destinazione, str):
+        with open(destinazione, 'w', encoding='utf-8') as file:
+            scrivi_report(risultati, file, modalita, dimensione_buffer)
+        return
+
+    stream = destinazione if destinazione is not None else sys.stdout
+    blocco: List[str] = []
+    caratteri = 0
+
+    for riga in genera_report(risultati, modalita):
+        blocco.append(riga)
+        caratteri += len(riga) + 1
+        if caratteri >= dimensione_buffer:
+            blocco.append('')
+            stream.write('\n'.join(blocco))
+            blocco, caratteri = [], 0
+
+    if blocco:
+        blocco.append('')
+        stream.write('\n'.join(blocco))
+
+
+# Generatore delle righe del report, senza terminatore di riga
+def genera_report(risultati: Dict[str, object], modalita: Optional[str] = None) -> Iterator[str]:
+
+    if modalita is None:
+        modalita = 'completo' if len(risultati['quantita']) <= SOGLIA_COMPATTO else 'compatto'
+    if modalita not in MODALITA_REPORT:
+        raise ValueError(f"Modalità di report sconosciuta: {modalita}")
+
     larghezza = 100
-    ore_per_giorno = risultati['ore_per_giorno']
 
-    print("\n" + "-" * larghezza)
-    print(f" {'SIMULAZIONE LOTTO PRODUZIONE':^{larghezza}}")
-    print("\n" + "-" * larghezza)
-        
+    yield "\n" + "-" * larghezza
+    yield f" {'SIMULAZIONE LOTTO PRODUZIONE':^{larghezza}}"
+    yield "\n" + "-" * larghezza
+
+    if modalita == 'completo':
+        yield from _righe_prodotti(risultati)
+    else:
+        yield "\n [ CONFIGURAZIONE IMPIANTO ]"
+        yield f"  Numero prodotti: {len(risultati['quantita'])}"
+        yield f"  Numero linee produttive: {_numero_linee_produttive(risultati)}"
+
+    # Capacità complessiva
+    yield f"\n  [ CAPACITÀ GIORNALIERA COMPLESSIVA ]"
+    yield f"  - Totale impianto: {risultati['capacita_giornaliera_complessiva']} capi/giorno"
+    yield f"    (somma delle capacità di tutte le linee)"
+
+    # Tabella dettagliata
+    if modalita != 'riepilogo':
+        yield from _righe_tabella_dettaglio(risultati)
+
+    yield from _righe_riepilogo(risultati, larghezza)
+
+
+# Linee distinte che lavorano il lotto: più prodotti possono condividere una linea,
+# e con il lotto frazionato un prodotto occupa tutte le linee della sua ripartizione
+def _numero_linee_produttive(risultati: Dict[str, object]) -> int:
+    linee = set()
+    for prodotto, linea in risultati['assegnazioni_linee'].items():
+        ripartizione = risultati['risultati_per_prodotto'][prodotto].get('ripartizione')
+        if ripartizione:
+            linee.update(quota['linea'] for quota in ripartizione)
+        else:
+            linee.add(linea)
+    return len(linee)
+
+
+def _righe_prodotti(risultati: Dict[str, object]) -> Iterator[str]:
+
     # Quantità prodotte
-    print("\n [ QUANTITÀ DA PRODURRE ]")
+    yield "\n [ QUANTITÀ DA PRODURRE ]"
     for prodotto, quantita in risultati['quantita'].items():
-        print(f"  - {prodotto.nome:25s}: {quantita:4d} capi")
-    
+        yield f"  - {prodotto.nome:25s}: {quantita:4d} capi"
+
     # Tempi unitari di produzione (TEORICI e base)
-    print("\n [ TEMPI UNITARI DI PRODUZIONE (teorici di base) ]")
+    yield "\n [ TEMPI UNITARI DI PRODUZIONE (teorici di base) ]"
     for prodotto, tempo in risultati['tempo_per_unita'].items():
         tempo_formattato = _formatta_tempo_unitario(tempo)
-        print(f"  - {prodotto.nome:25s}: {tempo_formattato}")
-    
+        yield f"  - {prodotto.nome:25s}: {tempo_formattato}"
+
     # Configurazione impianto
-    print("\n [ CONFIGURAZIONE IMPIANTO ]")
-    print(f"  Numero linee produttive: {len(risultati['assegnazioni_linee'])}")
-    
+    yield "\n [ CONFIGURAZIONE IMPIANTO ]"
+    yield f"  Numero linee produttive: {_numero_linee_produttive(risultati)}"
 
-    print("\n [ ASSEGNAZIONE LINEE E CAPACITÀ PRODUTTIVA ]")
+    yield "\n [ ASSEGNAZIONE LINEE E CAPACITÀ PRODUTTIVA ]"
     for prodotto, linea in risultati['assegnazioni_linee'].items():
         dati = risultati['risultati_per_prodotto'][prodotto]
         tempo_teorico = risultati['tempo_per_unita'][prodotto]
         tempo_effettivo = dati['tempo_effettivo']
         carico_ore = risultati['quantita'][prodotto] * tempo_teorico
-        
+
         tempo_teorico_format = _formatta_tempo_unitario(tempo_teorico)
         tempo_effettivo_format = _formatta_tempo_unitario(tempo_effettivo)
         carico_ore_format = _formatta_tempo_ore(carico_ore)
-        
-        print(f"\n  {prodotto.nome}:")
-        print(f"    ├─ Linea assegnata:              {linea.nome} (efficienza: {linea.coefficiente_efficienza:.2f})")
-        print(f"    ├─ Tempo teorico per unità:      {tempo_teorico_format}")
-        print(f"    ├─ Tempo effettivo sulla linea:  {tempo_effettivo_format}")
-        print(f"    ├─ Carico di lavoro teorico totale:      {carico_ore_format}")
-        print(f"    ├─ Capacità giornaliera:         {dati['capacita_giornaliera']} capi/giorno")
-        print(f"    ├─ Tempo di produzione:          {_formatta_tempo_ore(dati['ore_totali'])}")
-        print(f"    └─ Giorni necessari:             {dati['giorni_necessari']:.2f} giorni")
-    
-    
-    # Capacità complessiva
-    print(f"\n  [ CAPACITÀ GIORNALIERA COMPLESSIVA ]")
-    print(f"  - Totale impianto: {risultati['capacita_giornaliera_complessiva']} capi/giorno")
-    print(f"    (somma delle capacità di tutte le linee)")
-    
-    # Tabella dettagliata
-    _stampa_tabella_dettaglio(risultati)
-    
-    # Riepilogo complessivo
-    tempo_ore_formattato = _formatta_tempo_ore(risultati['durata_lotto_ore'])
-    tempo_giorni_formattato = _formatta_tempo_giorni(risultati['durata_lotto_ore'], ore_per_giorno)
-    
-    print("\n" + "-" * larghezza)
-    print(f" {' RIEPILOGO COMPLESSIVO ':^{larghezza}}")
-    print("\n" + "-" * larghezza)
-    print(f"\n   Durata totale del lotto:")
-    print(f"      - In ore:    {tempo_ore_formattato}")
-    print(f"      - In giorni: {tempo_giorni_formattato}")
 
+        yield f"\n  {prodotto.nome}:"
+        yield f"    ├─ Linea assegnata:              {linea.nome} (efficienza: {linea.coefficiente_efficienza:.2f})"
+        yield f"    ├─ Tempo teorico per unità:      {tempo_teorico_format}"
+        yield f"    ├─ Tempo effettivo sulla linea:  {tempo_effettivo_format}"
+        yield f"    ├─ Carico di lavoro teorico totale:      {carico_ore_format}"
+        yield f"    ├─ Capacità giornaliera:         {dati['capacita_giornaliera']} capi/giorno"
+        yield f"    ├─ Tempo di produzione:          {_formatta_tempo_ore(dati['ore_totali'])}"
+        yield f"    └─ Giorni necessari:             {dati['giorni_necessari']:.2f} giorni"
+
+        # Quote per linea quando il prodotto è ripartito su più linee
+        for quota in dati.get('ripartizione', []):
+            yield f"       · Linea {quota['linea'].nome}: {quota['quantita']} capi in {_formatta_tempo_ore(quota['ore_totali'])}"
+
+
+def _righe_tabella_dettaglio(risultati: dict) -> Iterator[str]:
+    """Righe della tabella riassuntiva dei dettagli per prodotto"""
+
+    yield "\n [ TABELLA RIASSUNTIVA ] "
 
-def _stampa_tabella_dettaglio(risultati: dict) -> None:
-    """Stampa una tabella riassuntiva dei dettagli per prodotto"""
-    
-    print("\n [ TABELLA RIASSUNTIVA ] ")
-    
     # Header
     header = (
         f"  {'Prodotto':^25} | "
@@ -133,22 +205,24 @@ def _stampa_tabella_dettaglio(risultati: dict) -> None:
         f"{'Tempo tot.':^20}"
     )
     sep = "  " + "-" * (len(header) - 2)
-    
-    print(header)
-    print(sep)
-    
-    # Righe
-    for prodotto in risultati['quantita'].keys():
-        qta = risultati['quantita'][prodotto]
-        tempo_base = risultati['tempo_per_unita'][prodotto]
-        linea = risultati['assegnazioni_linee'][prodotto]
-        tempo_effettivo = tempo_base / linea.coefficiente_efficienza
-        dati = risultati['risultati_per_prodotto'][prodotto]
-        
+
+    yield header
+    yield sep
+
+    # Righe: il tempo effettivo è quello già calcolato nei risultati
+    tempo_per_unita = risultati['tempo_per_unita']
+    assegnazioni_linee = risultati['assegnazioni_linee']
+    risultati_per_prodotto = risultati['risultati_per_prodotto']
+
+    for prodotto, qta in risultati['quantita'].items():
+        tempo_base = tempo_per_unita[prodotto]
+        linea = assegnazioni_linee[prodotto]
+        dati = risultati_per_prodotto[prodotto]
+
         tempo_base_format = _formatta_tempo_unitario(tempo_base)
-        tempo_effettivo_format = _formatta_tempo_unitario(tempo_effettivo)
-        
-        riga = (
+        tempo_effettivo_format = _formatta_tempo_unitario(dati['tempo_effettivo'])
+
+        yield (
             f"  {prodotto.nome:<25} | "
             f"{qta:^10d} | "
             f"{tempo_base_format:^18} | "
@@ -158,10 +232,25 @@ def _stampa_tabella_dettaglio(risultati: dict) -> None:
             f"{dati['capacita_giornaliera']:^9d} | "
             f"{_formatta_tempo_ore(dati['ore_totali']):^20}"
         )
-        print(riga)
-    
-    print("\n  Legenda:")
-    print("    - Tempo base: tempo teorico per produrre un capo")
-    print("    - Effic.: coefficiente di efficienza della linea")
-    print("    - Tempo effettivo: tempo reale sulla linea = Tempo base / Efficienza")
-    print("    - Cap./gg: capacità giornaliera = 24 ore / Tempo effettivo di produzione")
+
+    yield "\n  Legenda:"
+    yield "    - Tempo base: tempo teorico per produrre un capo"
+    yield "    - Effic.: coefficiente di efficienza della linea"
+    yield "    - Tempo effettivo: tempo reale sulla linea = Tempo base / Efficienza"
+    yield "    - Cap./gg: capacità giornaliera = 24 ore / Tempo effettivo di produzione"
+
+
+def _righe_riepilogo(risultati: Dict[str, object], larghezza: int) -> Iterator[str]:
+
+    ore_per_giorno = risultati['ore_per_giorno']
+
+    # Riepilogo complessivo
+    tempo_ore_formattato = _formatta_tempo_ore(risultati['durata_lotto_ore'])
+    tempo_giorni_formattato = _formatta_tempo_giorni(risultati['durata_lotto_ore'], ore_per_giorno)
+
+    yield "\n" + "-" * larghezza
+    yield f" {' RIEPILOGO COMPLESSIVO ':^{larghezza}}"
+    yield "\n" + "-" * larghezza
+    yield f"\n   Durata totale del lotto:"
+    yield f"      - In ore:    {tempo_ore_formattato}"
+    yield f"      - In giorni: {tempo_giorni_formattato}"
@@ -0,0 +1,141 @@
+import os
+import random
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from compatto import ScenarioCompatto
+from models import Prodotto
+from produzione import (
+    genera_quantita_produzione,
+    genera_parametri_configurabili,
+    calcola_tempo_produzione_lotto,
+)
+
+
+# Aggregatore incrementale delle durate: conserva solo contatori, mai i singoli risultati.
+# Le durate sono arrotondate al centesimo di ora, quindi sono sommate come interi
+# e i percentili calcolati sull'istogramma sono esatti e indipendenti dall'ordine di arrivo
+class AggregatoreDurate:
+
+    def __init__(self):
+        self.n_scenari = 0
+        self.somma_centesimi = 0
+        self.istogramma: Counter = Counter()
+
+    def aggiungi(self, durata_ore: float) -> None:
+        centesimi = round(durata_ore * 100)
+        self.n_scenari += 1
+        self.somma_centesimi += centesimi
+        self.istogramma[centesimi] += 1
+
+    def unisci(self, altro: "AggregatoreDurate") -> None:
+        self.n_scenari += altro.n_scenari
+        self.somma_centesimi += altro.somma_centesimi
+        self.istogramma.update(altro.istogramma)
+
+    def percentile(self, p: float) -> float:
+        if not self.n_scenari:
+            raise ValueError("Nessuno scenario aggregato")
+
+        # Percentile per rango (nearest-rank) sull'istogramma ordinato
+        rango = max(1, -(-self.n_scenari * p // 100))
+        cumulato = 0
+        for centesimi in sorted(self.istogramma):
+            cumulato += self.istogramma[centesimi]
+            if cumulato >= rango:
+                return centesimi / 100
+        return max(self.istogramma) / 100
+
+    def riepilogo(self, percentili: Sequence[float] = (50, 90, 99)) -> Dict[str, object]:
+        return {
+            'n_scenari': self.n_scenari,
+            'media_ore': round(self.somma_centesimi / self.n_scenari / 100, 2),
+            'minimo_ore': min(self.istogramma) / 100,
+            'massimo_ore': max(self.istogramma) / 100,
+            'percentili_ore': {f"P{p:g}": self.percentile(p) for p in percentili}
+        }
+
+    def __repr__(self) -> str:
+        return f"<AggregatoreDurate: {self.n_scenari} scenari>"
+
+
+# Seme dello scenario: dipende solo dal seme base e dall'indice,
+# quindi i risultati non cambiano con il numero di worker o la dimensione dei chunk
+def seme_scenario(seed: int, indice: int) -> str:
+    return f"{seed}-{indice}"
+
+
+# Simula gli scenari [inizio, fine) e restituisce il loro aggregato parziale. Serve solo la durata:
+# scenario e risultati sono in forma compatta, allocati una volta e riscritti a ogni scenario,
+# invece di un dizionario di risultati per prodotto a ogni scenario
+def _simula_chunk(prodotti: List[Prodotto], inizio: int, fine: int, seed: int) -> AggregatoreDurate:
+
+    aggregatore = AggregatoreDurate()
+    scenario = risultati = None
+
+    for indice in range(inizio, fine):
+        rng = random.Random(seme_scenario(seed, indice))
+
+        quantita = genera_quantita_produzione(prodotti, rng)
+        tempo_per_unita, impianto = genera_parametri_configurabili(prodotti, rng)
+        scenario = ScenarioCompatto.da_dizionari(quantita, tempo_per_unita, impianto, scenario)
+        risultati = calcola_tempo_produzione_lotto(scenario, None, None, risultati_compatti=risultati)
+
+        aggregatore.aggiungi(risultati.durata_lotto_ore)
+
+    return aggregatore
+
+
+def _chunk(n_scenari: int, dimensione_chunk: int) -> Iterator[Tuple[int, int]]:
+    for inizio in range(0, n_scenari, dimensione_chunk):
+        yield inizio, min(inizio + dimensione_chunk, n_scenari)
+
+
+# Funzione per simulare molti scenari distribuendoli su un pool di processi.
+# La funzione avanzamento, se indicata, riceve l'aggregato parziale dopo ogni chunk completato
+def esegui_scenari_paralleli(
+    prodotti: List[Prodotto],
+    n_scenari: int,
+    seed: int = 0,
+    n_worker: Optional[int] = None,
+    dimensione_chunk: int = 1000,
+    avanzamento: Optional[Callable[[AggregatoreDurate], None]] = None
+) -> AggregatoreDurate:
+
+    if n_scenari <= 0:
+        raise ValueError("Il numero di scenari deve essere maggiore di 0")
+    if dimensione_chunk <= 0:
+        raise ValueError("La dimensione dei chunk deve essere maggiore di 0")
+
+    n_worker = n_worker or os.cpu_count() or 1
+    totale = AggregatoreDurate()
+
+    # Con un solo worker la simulazione avviene nel processo corrente
+    if n_worker == 1:
+        for inizio, fine in _chunk(n_scenari, dimensione_chunk):
+            totale.unisci(_simula_chunk(prodotti, inizio, fine, seed))
+            if avanzamento is not None:
+                avanzamento(totale)
+        return totale
+
+    chunk = _chunk(n_scenari, dimensione_chunk)
+
+    with ProcessPoolExecutor(max_workers=n_worker) as executor:
+        # Sottomissione a finestra: al massimo due chunk in attesa per worker
+        in_corso = set()
+        for inizio, fine in chunk:
+            in_corso.add(executor.submit(_simula_chunk, prodotti, inizio, fine, seed))
+            if len(in_corso) >= 2 * n_worker:
+                completati, in_corso = wait(in_corso, return_when=FIRST_COMPLETED)
+                for futuro in completati:
+                    totale.unisci(futuro.result())
+                if avanzamento is not None:
+                    avanzamento(totale)
+
+        for futuro in as_completed(in_corso):
+            totale.unisci(futuro.result())
+            if avanzamento is not None:
+                avanzamento(totale)
+
+    return totale
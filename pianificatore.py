@@ -0,0 +1,282 @@
+import itertools
+from typing import Dict, List, Optional
+
+from models import Prodotto, LineaProduttiva, Impianto
+from produzione import assegna_linee_a_prodotti, calcola_tempo_produzione_lotto
+from tabelle import TabellaTempi
+
+
+# Lotto della coda: piano (assegnazioni e carico per linea) e posizione nel calendario
+class Lotto:
+
+    __slots__ = (
+        'id', 'quantita', 'assegnazioni', 'risultati', 'prodotti_per_linea', 'carico_linee',
+        'inizio_linee', 'fine_linee', 'inizio', 'fine', 'da_ottimizzare'
+    )
+
+    def __init__(self, id: str, quantita: Dict[Prodotto, int]):
+        self.id = id
+        self.quantita = quantita
+        self.assegnazioni: Dict[Prodotto, LineaProduttiva] = {}
+        self.risultati: Dict[str, object] = {}
+        self.prodotti_per_linea: Dict[str, List[Prodotto]] = {}
+        self.carico_linee: Dict[str, float] = {}
+        self.inizio_linee: Dict[str, float] = {}
+        self.fine_linee: Dict[str, float] = {}
+        self.inizio = 0.0
+        self.fine = 0.0
+        self.da_ottimizzare = False
+
+    def __repr__(self) -> str:
+        return f"<Lotto {self.id}: {self.inizio:.2f}-{self.fine:.2f} ore>"
+
+
+# Pianificatore a orizzonte mobile di una coda di lotti eseguiti uno dopo l'altro.
+# Su ogni linea un lotto inizia quando la linea ha terminato il lotto precedente.
+# Il piano di ogni lotto è conservato: aggiunte, annullamenti e variazioni dei coefficienti
+# ricalcolano solo i lotti interessati e il calendario a partire dal primo lotto modificato
+class PianificatoreLotti:
+
+    def __init__(
+        self,
+        prodotti: List[Prodotto],
+        tempo_per_unita: Dict[Prodotto, float],
+        impianto: Impianto,
+        ore_per_giorno: int = 24,
+        metodo: str = 'greedy',
+        orizzonte: int = 5,
+        max_lotti: Optional[int] = None
+    ):
+        if orizzonte <= 0:
+            raise ValueError("L'orizzonte deve contenere almeno un lotto")
+
+        self.prodotti = prodotti
+        self.tempo_per_unita = tempo_per_unita
+        self.impianto = impianto
+        self.ore_per_giorno = ore_per_giorno
+        self.metodo = metodo
+        self.orizzonte = orizzonte
+        self.max_lotti = max_lotti
+        self.tempo_corrente = 0.0
+        self.lotti: List[Lotto] = []
+        self._linee_per_nome = {linea.nome: linea for linea in impianto.linee}
+        self.tabella = TabellaTempi(prodotti, tempo_per_unita, impianto, ore_per_giorno)
+        self._contatore = itertools.count(1)
+        self._lotti_congelati = 0
+        self._id_lotti = set()
+        self.ultimo_aggiornamento = {'lotti_ripianificati': 0, 'lotti_ricalendarizzati': 0}
+
+    # Assegnazione completa delle linee e calcolo del lotto
+    def _ottimizza(self, lotto: Lotto) -> None:
+        lotto.assegnazioni = assegna_linee_a_prodotti(
+            self.prodotti, lotto.quantita, self.tempo_per_unita, self.impianto, self.metodo
+        )
+        lotto.da_ottimizzare = False
+        self._ricalcola(lotto)
+
+    # Ricalcolo delle ore con le assegnazioni già decise
+    def _ricalcola(self, lotto: Lotto) -> None:
+        lotto.risultati = calcola_tempo_produzione_lotto(
+            lotto.quantita, self.tempo_per_unita, lotto.assegnazioni, self.ore_per_giorno, self.tabella
+        )
+        carico: Dict[str, float] = {}
+        prodotti_per_linea: Dict[str, List[Prodotto]] = {}
+        for prodotto, dati in lotto.risultati['risultati_per_prodotto'].items():
+            nome = dati['linea_assegnata'].nome
+            carico[nome] = carico.get(nome, 0) + dati['ore_totali']
+            prodotti_per_linea.setdefault(nome, []).append(prodotto)
+        lotto.carico_linee = carico
+        lotto.prodotti_per_linea = prodotti_per_linea
+
+    # Ricalcolo dei soli prodotti assegnati a una linea dopo la variazione del suo coefficiente
+    def _ricalcola_linea(self, lotto: Lotto, nome_linea: str) -> None:
+        linea = self._linee_per_nome[nome_linea]
+        risultati_per_prodotto = lotto.risultati['risultati_per_prodotto']
+
+        carico = 0
+        for prodotto in lotto.prodotti_per_linea[nome_linea]:
+            dati = {'linea_assegnata': linea, **self.tabella.risultato_prodotto(
+                lotto.quantita[prodotto], prodotto, linea.coefficiente_efficienza
+            )}
+            risultati_per_prodotto[prodotto] = dati
+            carico += dati['ore_totali']
+        lotto.carico_linee[nome_linea] = carico
+
+        durata_ore = max(lotto.carico_linee.values())
+        lotto.risultati['capacita_giornaliera_complessiva'] = sum(
+            dati['capacita_giornaliera'] for dati in risultati_per_prodotto.values()
+        )
+        lotto.risultati['durata_lotto_ore'] = round(durata_ore, 2)
+        lotto.risultati['durata_lotto_giorni'] = round(durata_ore / self.ore_per_giorno, 3)
+
+    # Ricalcola il calendario dal lotto in posizione indice in poi: la disponibilità
+    # delle linee prima di quel lotto è letta dai lotti precedenti, che restano invariati.
+    # Nessun lotto ricalendarizzato può iniziare prima del tempo corrente
+    def _calendarizza(self, indice: int) -> int:
+        disponibilita: Dict[str, float] = {}
+        for precedente in range(indice - 1, -1, -1):
+            for nome, fine in self.lotti[precedente].fine_linee.items():
+                disponibilita.setdefault(nome, fine)
+            if len(disponibilita) == len(self._linee_per_nome):
+                break
+
+        for lotto in self.lotti[indice:]:
+            lotto.inizio_linee = {
+                nome: max(disponibilita.get(nome, 0.0), self.tempo_corrente) for nome in lotto.carico_linee
+            }
+            lotto.fine_linee = {
+                nome: round(inizio + lotto.carico_linee[nome], 2) for nome, inizio in lotto.inizio_linee.items()
+            }
+            disponibilita.update(lotto.fine_linee)
+            lotto.inizio = min(lotto.inizio_linee.values(), default=0.0)
+            lotto.fine = max(lotto.fine_linee.values(), default=0.0)
+
+        # Il nuovo calendario può spostare l'inizio dei lotti non ancora congelati
+        self._aggiorna_congelati()
+        return len(self.lotti) - indice
+
+    def _indice(self, id: str) -> int:
+        if id not in self._id_lotti:
+            raise KeyError(id)
+        for indice, lotto in enumerate(self.lotti):
+            if lotto.id == id:
+                return indice
+        raise KeyError(id)
+
+    def _aggiorna_congelati(self) -> None:
+        # I lotti fino all'ultimo già iniziato non vengono più ripianificati
+        self._lotti_congelati = 0
+        for indice, lotto in enumerate(self.lotti):
+            if lotto.inizio < self.tempo_corrente:
+                self._lotti_congelati = indice + 1
+
+    # Aggiunge un lotto in coda (o nella posizione indicata) e restituisce il suo id
+    def aggiungi_lotto(
+        self,
+        quantita: Dict[Prodotto, int],
+        id: Optional[str] = None,
+        posizione: Optional[int] = None
+    ) -> str:
+        if self.max_lotti is not None and len(self.lotti) >= self.max_lotti:
+            raise ValueError(f"Il piano contiene già il numero massimo di lotti ({self.max_lotti})")
+        id = id or f"L{next(self._contatore)}"
+        if id in self._id_lotti:
+            raise ValueError(f"Il lotto {id} è già in coda")
+
+        posizione = len(self.lotti) if posizione is None else posizione
+        if not self._lotti_congelati <= posizione <= len(self.lotti):
+            raise ValueError("Un lotto non può essere inserito prima dei lotti già in produzione")
+
+        lotto = Lotto(id, dict(quantita))
+        self._ottimizza(lotto)
+        self.lotti.insert(posizione, lotto)
+        self._id_lotti.add(id)
+
+        self.ultimo_aggiornamento = {
+            'lotti_ripianificati': 1,
+            'lotti_ricalendarizzati': self._calendarizza(posizione)
+        }
+        return id
+
+    def annulla_lotto(self, id: str) -> None:
+        indice = self._indice(id)
+        if indice < self._lotti_congelati:
+            raise ValueError(f"Il lotto {id} è già in produzione")
+
+        del self.lotti[indice]
+        self._id_lotti.discard(id)
+        self.ultimo_aggiornamento = {
+            'lotti_ripianificati': 0,
+            'lotti_ricalendarizzati': self._calendarizza(indice)
+        }
+
+    # Variazione del coefficiente di una linea: i lotti nell'orizzonte sono riassegnati,
+    # quelli successivi che usano la linea sono solo ricalcolati con le assegnazioni correnti
+    # e verranno riottimizzati quando entrano nell'orizzonte
+    def aggiorna_coefficiente(self, nome_linea: str, coefficiente_efficienza: float) -> None:
+        if coefficiente_efficienza <= 0:
+            raise ValueError("Il coefficiente di efficienza deve essere maggiore di 0")
+
+        linea = self._linee_per_nome[nome_linea]
+        linea.coefficiente_efficienza = coefficiente_efficienza
+        self.tabella.aggiorna_linea(linea)
+
+        inizio_orizzonte = self._lotti_congelati
+        fine_orizzonte = inizio_orizzonte + self.orizzonte
+        primo_modificato = None
+        ripianificati = 0
+
+        for indice in range(inizio_orizzonte, len(self.lotti)):
+            lotto = self.lotti[indice]
+            if indice < fine_orizzonte:
+                self._ottimizza(lotto)
+            elif nome_linea in lotto.carico_linee:
+                self._ricalcola_linea(lotto, nome_linea)
+                lotto.da_ottimizzare = True
+            else:
+                lotto.da_ottimizzare = True
+                continue
+
+            ripianificati += 1
+            if primo_modificato is None:
+                primo_modificato = indice
+
+        self.ultimo_aggiornamento = {
+            'lotti_ripianificati': ripianificati,
+            'lotti_ricalendarizzati': 0 if primo_modificato is None else self._calendarizza(primo_modificato)
+        }
+
+    # Avanza il tempo corrente: i lotti iniziati sono congelati e quelli che entrano
+    # nell'orizzonte dopo una variazione dei coefficienti vengono riottimizzati
+    def avanza(self, tempo_ore: float) -> None:
+        if tempo_ore < self.tempo_corrente:
+            raise ValueError("Il tempo corrente non può tornare indietro")
+
+        self.tempo_corrente = tempo_ore
+        self._aggiorna_congelati()
+
+        primo_modificato = None
+        ripianificati = 0
+        fine_orizzonte = min(self._lotti_congelati + self.orizzonte, len(self.lotti))
+        for indice in range(self._lotti_congelati, fine_orizzonte):
+            if self.lotti[indice].da_ottimizzare:
+                self._ottimizza(self.lotti[indice])
+                ripianificati += 1
+                if primo_modificato is None:
+                    primo_modificato = indice
+
+        self.ultimo_aggiornamento = {
+            'lotti_ripianificati': ripianificati,
+            'lotti_ricalendarizzati': 0 if primo_modificato is None else self._calendarizza(primo_modificato)
+        }
+
+    @property
+    def durata_totale_ore(self) -> float:
+        return max((lotto.fine for lotto in self.lotti), default=0.0)
+
+    # Calendario in forma serializzabile
+    def piano(self) -> Dict[str, object]:
+        return {
+            'tempo_corrente': self.tempo_corrente,
+            'durata_totale_ore': self.durata_totale_ore,
+            'durata_totale_giorni': round(self.durata_totale_ore / self.ore_per_giorno, 3),
+            'lotti': [
+                {
+                    'id': lotto.id,
+                    'inizio_ore': lotto.inizio,
+                    'fine_ore': lotto.fine,
+                    'in_produzione': indice < self._lotti_congelati,
+                    'linee': {
+                        nome: [lotto.inizio_linee[nome], lotto.fine_linee[nome]] for nome in lotto.carico_linee
+                    },
+                    'assegnazioni': {
+                        prodotto.nome: linea.nome for prodotto, linea in lotto.assegnazioni.items()
+                    }
+                }
+                for indice, lotto in enumerate(self.lotti)
+            ],
+            'ultimo_aggiornamento': self.ultimo_aggiornamento
+        }
+
+    def __repr__(self) -> str:
+        return f"<PianificatoreLotti: {len(self.lotti)} lotti, {self.durata_totale_ore} ore>"
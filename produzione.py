@@ -1,34 +1,49 @@
 import random
-from typing import Dict, List, Tuple
-from models import Prodotto, LineaProduttiva, Impianto
+from typing import Dict, List, Optional, Tuple
+from models import Prodotto, LineaProduttiva, Impianto, capacita_giornaliera
+from catalogo import Catalogo, catalogo_predefinito
+from validazione import schema_modalita
+
+
+# Generatore da usare: un'istanza random.Random, un seme, oppure il modulo random globale se None
+def crea_rng(seed: Optional[object] = None):
+    if seed is None or seed is random:
+        return random
+    if isinstance(seed, random.Random):
+        return seed
+    return random.Random(seed)
 
 
 # Funzione per generare le quantità da produrre per ciascuna tipologia
-def genera_quantita_produzione(prodotti: List[Prodotto]) -> Dict[Prodotto, int]:
-    return {prodotto: random.randint(*prodotto.range_quantita_produzione) for prodotto in prodotti}
+def genera_quantita_produzione(
+    prodotti: List[Prodotto],
+    rng: Optional[random.Random] = None
+) -> Dict[Prodotto, int]:
+    rng = crea_rng(rng)
+    return {prodotto: rng.randint(*prodotto.range_quantita_produzione) for prodotto in prodotti}
 
 # Funzione per generare i parametri configurabili
 def genera_parametri_configurabili(
-    prodotti: List[Prodotto]
+    prodotti: List[Prodotto],
+    rng: Optional[random.Random] = None,
+    catalogo: Optional[Catalogo] = None
 ) -> Tuple[Dict[Prodotto, float], Impianto]:
     
+    rng = crea_rng(rng)
+    catalogo = catalogo or catalogo_predefinito()
+    
     # Genera tempi di produzione per unità (in ore)
     tempo_per_unita = {
-        prodotto: round(random.uniform(*prodotto.range_tempo_produzione), 2) 
+        prodotto: round(rng.uniform(*prodotto.range_tempo_produzione), 2) 
         for prodotto in prodotti
     }
     
-    # Crea 4 linee produttive con coefficienti di efficienza diversi
-    coefficienti = [
-        round(random.uniform(0.7, 1.0), 2),
-        round(random.uniform(0.8, 1.1), 2),
-        round(random.uniform(0.9, 1.2), 2),
-        round(random.uniform(1.0, 1.3), 2)
+    # Crea le linee produttive del catalogo, ciascuna con un coefficiente di efficienza nel proprio range
+    linee = [
+        specifica.crea_linea(round(rng.uniform(*specifica.range_coefficiente), 2))
+        for specifica in catalogo.linee
     ]
     
-    nomi_linee = ['A', 'B', 'C', 'D']
-    linee = [LineaProduttiva(nomi_linee[i], coefficienti[i]) for i in range(4)]
-    
     impianto = Impianto(linee)
     
     return tempo_per_unita, impianto
@@ -38,9 +53,15 @@ def assegna_linee_a_prodotti(
     prodotti: List[Prodotto],
     quantita: Dict[Prodotto, int],
     tempo_per_unita: Dict[Prodotto, float],
-    impianto: Impianto
+    impianto: Impianto,
+    metodo: str = 'greedy'
 ) -> Dict[Prodotto, LineaProduttiva]:
 
+    # Metodi alternativi (esatto, euristico) nel motore di assegnazione
+    if metodo != 'greedy':
+        from assegnazione import assegna_linee
+        return assegna_linee(prodotti, quantita, tempo_per_unita, impianto, metodo)
+
     # Calcola il carico di lavoro totale per ogni prodotto (in ore)
     carico_lavoro = {prodotto: quantita[prodotto] * tempo_per_unita[prodotto] for prodotto in prodotti}
     
@@ -57,60 +78,15 @@ def assegna_linee_a_prodotti(
     
     return assegnazioni
 
-def valida_input_utente(data: dict, prodotti: list, modalita: str = 'automatico') -> list:
-    errori = []
-    
-    # Validazione quantità (obbligatoria in entrambe le modalità)
-    campi_quantita = ['quantita_giacche', 'quantita_tshirt', 'quantita_felpe', 'quantita_pantaloni']
-    for campo in campi_quantita:
-        if campo not in data or data[campo] is None or data[campo] == '':
-            errori.append(f"Il campo {campo} è obbligatorio")
-            continue
-        
-        try:
-            valore = int(data[campo])
-            if valore <= 0:
-                errori.append(f"{campo} deve essere maggiore di 0")
-            elif valore > 1000:
-                errori.append(f"{campo} non può superare 1000")
-        except (ValueError, TypeError):
-            errori.append(f"{campo} deve essere un numero intero valido")
-    
-    # Validazione parametri manuali
-    if modalita == 'manuale':
-        # Valida tempi di produzione
-        campi_tempo = ['tempo_giacche', 'tempo_tshirt', 'tempo_felpe', 'tempo_pantaloni']
-        for campo in campi_tempo:
-            if campo not in data or data[campo] is None or data[campo] == '':
-                errori.append(f"Il campo {campo} è obbligatorio in modalità manuale")
-                continue
-            
-            try:
-                valore = float(data[campo])
-                if valore <= 0:
-                    errori.append(f"{campo} deve essere maggiore di 0")
-                elif valore > 24:
-                    errori.append(f"{campo} non può superare 24 ore")
-            except (ValueError, TypeError):
-                errori.append(f"{campo} deve essere un numero valido")
-        
-        # Valida coefficienti linee
-        campi_coeff = ['coeff_linea_a', 'coeff_linea_b', 'coeff_linea_c', 'coeff_linea_d']
-        for campo in campi_coeff:
-            if campo not in data or data[campo] is None or data[campo] == '':
-                errori.append(f"Il campo {campo} è obbligatorio in modalità manuale")
-                continue
-            
-            try:
-                valore = float(data[campo])
-                if valore <= 0:
-                    errori.append(f"{campo} deve essere maggiore di 0")
-                elif valore > 2:
-                    errori.append(f"{campo} non può superare 2.0")
-            except (ValueError, TypeError):
-                errori.append(f"{campo} deve essere un numero valido")
-    
-    return errori
+def valida_input_utente(
+    data: dict,
+    prodotti: list,
+    modalita: str = 'automatico',
+    catalogo: Optional[Catalogo] = None
+) -> list:
+    # Schema compilato dal catalogo una sola volta, condiviso con app.py
+    _, errori = schema_modalita(modalita, catalogo).valida(data)
+    return [errore.messaggio for errore in errori]
 
 
 def _arrotonda_tempo_in_minuti(ore_decimali: float) -> float:
@@ -121,41 +97,99 @@ def _arrotonda_tempo_in_minuti(ore_decimali: float) -> float:
     return ore_intere + minuti_arrotondati / 60
 
 
-# Funzione per calcolare le tempistiche di produzione
+# Tempistiche di un singolo prodotto su una linea con il coefficiente dato:
+# (tempo effettivo, capacità giornaliera, ore totali, giorni necessari)
+def _tempi_prodotto(
+    quantita: int,
+    tempo_teorico: float,
+    coefficiente_efficienza: float,
+    ore_per_giorno: int = 24
+) -> Tuple[float, int, float, float]:
+    
+    # Calcola tempo effettivo sulla linea
+    tempo_effettivo_preciso = tempo_teorico / coefficiente_efficienza
+    tempo_effettivo = _arrotonda_tempo_in_minuti(tempo_effettivo_preciso)
+    
+    # Ore totali necessarie usando il tempo effettivo
+    ore_totali = quantita * tempo_effettivo
+    
+    # Giorni necessari
+    giorni_necessari = ore_totali / ore_per_giorno
+    
+    return (
+        tempo_effettivo,
+        capacita_giornaliera(tempo_teorico, coefficiente_efficienza, ore_per_giorno),
+        round(ore_totali, 2),
+        round(giorni_necessari, 3)
+    )
+
+
+def _calcola_risultato_prodotto(
+    quantita: int,
+    tempo_teorico: float,
+    coefficiente_efficienza: float,
+    ore_per_giorno: int = 24
+) -> Dict[str, float]:
+    
+    tempo_effettivo, capacita, ore_totali, giorni_necessari = _tempi_prodotto(
+        quantita, tempo_teorico, coefficiente_efficienza, ore_per_giorno
+    )
+    return {
+        'tempo_effettivo': tempo_effettivo,
+        'capacita_giornaliera': capacita,
+        'ore_totali': ore_totali,
+        'giorni_necessari': giorni_necessari
+    }
+
+
+# Durata del lotto: le linee lavorano in parallelo,
+# i prodotti assegnati alla stessa linea vengono lavorati in sequenza
+def _durata_lotto_ore(risultati_prodotti) -> float:
+    
+    carico_linee = {}
+    for risultato in risultati_prodotti:
+        linea = risultato['linea_assegnata']
+        carico_linee[linea] = carico_linee.get(linea, 0) + risultato['ore_totali']
+    return max(carico_linee.values())
+
+
+# Funzione per calcolare le tempistiche di produzione.
+# Con uno compatto.ScenarioCompatto al posto delle quantità tempi e coefficienti sono letti dallo
+# scenario, assegnazioni_linee è un array di indici di linea (None: greedy) e il risultato è un
+# RisultatiCompatti; passando risultati_compatti i suoi array vengono riutilizzati
 def calcola_tempo_produzione_lotto(
     quantita: Dict[Prodotto, int],
     tempo_per_unita: Dict[Prodotto, float],
     assegnazioni_linee: Dict[Prodotto, LineaProduttiva],
-    ore_per_giorno: int = 24
+    ore_per_giorno: int = 24,
+    tabella=None,
+    risultati_compatti=None
 ) -> Dict[str, object]:
     
+    if not isinstance(quantita, dict):
+        from compatto import calcola_tempo_produzione_lotto_compatto
+        return calcola_tempo_produzione_lotto_compatto(quantita, assegnazioni_linee, ore_per_giorno, risultati_compatti)
+    
     risultati_per_prodotto = {}
     
-    for prodotto, linea in assegnazioni_linee.items():
-        # Calcola tempo effettivo sulla linea
-        tempo_teorico = tempo_per_unita[prodotto]
-        tempo_effettivo_preciso = tempo_teorico / linea.coefficiente_efficienza
-        tempo_effettivo = _arrotonda_tempo_in_minuti(tempo_effettivo_preciso)
-        
-        # Calcola capacità giornaliera usando il tempo effettivo arrotondato
-        capacita_giornaliera = int((ore_per_giorno * linea.coefficiente_efficienza) / tempo_teorico)
-        
-        # Ore totali necessarie usando il tempo effettivo
-        ore_totali = quantita[prodotto] * tempo_effettivo
-        
-        # Giorni necessari
-        giorni_necessari = ore_totali / ore_per_giorno
-        
-        risultati_per_prodotto[prodotto] = {
-            'linea_assegnata': linea,
-            'tempo_effettivo': tempo_effettivo,
-            'capacita_giornaliera': capacita_giornaliera,
-            'ore_totali': round(ore_totali, 2),
-            'giorni_necessari': round(giorni_necessari, 3)
-        }
+    # Con una tabelle.TabellaTempi dell'impianto, tempi effettivi e capacità sono letti dalla tabella
+    if tabella is not None:
+        for prodotto, linea in assegnazioni_linee.items():
+            risultati_per_prodotto[prodotto] = {
+                'linea_assegnata': linea,
+                **tabella.risultato_prodotto(quantita[prodotto], prodotto, linea.coefficiente_efficienza)
+            }
+    else:
+        for prodotto, linea in assegnazioni_linee.items():
+            risultati_per_prodotto[prodotto] = {
+                'linea_assegnata': linea,
+                **_calcola_risultato_prodotto(
+                    quantita[prodotto], tempo_per_unita[prodotto], linea.coefficiente_efficienza, ore_per_giorno
+                )
+            }
     
     # Durata complessiva del lotto
-    durata_ore = max(r['ore_totali'] for r in risultati_per_prodotto.values())
+    durata_ore = _durata_lotto_ore(risultati_per_prodotto.values())
     durata_giorni = durata_ore / ore_per_giorno
     
     # Capacità giornaliera complessiva
@@ -173,3 +207,124 @@ def calcola_tempo_produzione_lotto(
         'durata_lotto_giorni': round(durata_giorni, 3),
         'ore_per_giorno': ore_per_giorno
     }
+
+
+# Ripartisce la quantità di un prodotto sulle linee (unità intere) minimizzando l'istante di fine,
+# dati i carichi già presenti sulle linee. Tempi e carichi sono espressi in minuti interi
+def _ripartisci_quantita(quantita: int, minuti_per_unita: List[int], carico_linee: List[int]) -> List[int]:
+
+    if quantita <= 0:
+        return [0] * len(carico_linee)
+
+    def unita_entro(fine: int) -> int:
+        return sum(max(0, (fine - carico) // minuti) for carico, minuti in zip(carico_linee, minuti_per_unita))
+
+    # Ricerca binaria dell'istante minimo entro cui tutte le unità possono essere completate
+    basso = min(carico_linee)
+    alto = min(carico + quantita * minuti for carico, minuti in zip(carico_linee, minuti_per_unita))
+    while basso < alto:
+        medio = (basso + alto) // 2
+        if unita_entro(medio) >= quantita:
+            alto = medio
+        else:
+            basso = medio + 1
+
+    unita = [max(0, (alto - carico) // minuti) for carico, minuti in zip(carico_linee, minuti_per_unita)]
+
+    # Toglie le unità in eccesso dalle linee che terminano per ultime
+    eccesso = sum(unita) - quantita
+    while eccesso > 0:
+        l = max(
+            (l for l in range(len(unita)) if unita[l] > 0),
+            key=lambda l: carico_linee[l] + unita[l] * minuti_per_unita[l]
+        )
+        unita[l] -= 1
+        eccesso -= 1
+
+    return unita
+
+
+# Funzione per calcolare le tempistiche con i prodotti ripartiti su più linee in parallelo
+def calcola_tempo_produzione_lotto_frazionato(
+    quantita: Dict[Prodotto, int],
+    tempo_per_unita: Dict[Prodotto, float],
+    impianto: Impianto,
+    ore_per_giorno: int = 24
+) -> Dict[str, object]:
+
+    linee = impianto.linee
+
+    # Tempo effettivo arrotondato di ogni prodotto su ogni linea, in minuti interi
+    minuti_per_unita = {
+        prodotto: [
+            round(_arrotonda_tempo_in_minuti(tempo_per_unita[prodotto] / linea.coefficiente_efficienza) * 60)
+            for linea in linee
+        ]
+        for prodotto in quantita
+    }
+
+    # Prodotti con carico maggiore ripartiti per primi
+    prodotti_ordinati = sorted(
+        quantita, key=lambda prodotto: quantita[prodotto] * min(minuti_per_unita[prodotto]), reverse=True
+    )
+
+    carico_linee = [0] * len(linee)
+    unita_per_linea = {}
+    for prodotto in prodotti_ordinati:
+        unita = _ripartisci_quantita(quantita[prodotto], minuti_per_unita[prodotto], carico_linee)
+        for l, n in enumerate(unita):
+            carico_linee[l] += n * minuti_per_unita[prodotto][l]
+        unita_per_linea[prodotto] = unita
+
+    risultati_per_prodotto = {}
+    assegnazioni_linee = {}
+
+    for prodotto in quantita:
+        unita = unita_per_linea[prodotto]
+        tempo_teorico = tempo_per_unita[prodotto]
+
+        ripartizione = [
+            {
+                'linea': linee[l],
+                'quantita': n,
+                'ore_totali': round(n * minuti_per_unita[prodotto][l] / 60, 2)
+            }
+            for l, n in enumerate(unita) if n > 0
+        ]
+
+        # Linea principale: quella che produce la quota maggiore
+        linea = max(ripartizione, key=lambda quota: quota['quantita'])['linea'] if ripartizione else linee[0]
+        assegnazioni_linee[prodotto] = linea
+
+        # Il prodotto è completato quando termina la sua quota più lunga
+        ore_totali = max((quota['ore_totali'] for quota in ripartizione), default=0)
+
+        risultati_per_prodotto[prodotto] = {
+            'linea_assegnata': linea,
+            'tempo_effettivo': _arrotonda_tempo_in_minuti(tempo_teorico / linea.coefficiente_efficienza),
+            'capacita_giornaliera': sum(
+                int((ore_per_giorno * quota['linea'].coefficiente_efficienza) / tempo_teorico)
+                for quota in ripartizione
+            ),
+            'ore_totali': ore_totali,
+            'giorni_necessari': round(ore_totali / ore_per_giorno, 3),
+            'ripartizione': ripartizione
+        }
+
+    durata_ore = max(carico_linee) / 60
+    durata_giorni = durata_ore / ore_per_giorno
+
+    capacita_giornaliera_complessiva = sum(
+        risultato['capacita_giornaliera'] for risultato in risultati_per_prodotto.values()
+    )
+
+    return {
+        'quantita': quantita,
+        'tempo_per_unita': tempo_per_unita,
+        'assegnazioni_linee': assegnazioni_linee,
+        'risultati_per_prodotto': risultati_per_prodotto,
+        'capacita_giornaliera_complessiva': capacita_giornaliera_complessiva,
+        'durata_lotto_ore': round(durata_ore, 2),
+        'durata_lotto_giorni': round(durata_giorni, 3),
+        'ore_per_giorno': ore_per_giorno
+    }
@@ -0,0 +1,127 @@
+import json
+from typing import Iterable, Iterator, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# hashlib, gzip e zlib sono importati nelle funzioni che li usano: il batch da riga
+# di comando usa solo formattazione e serializzazione e non ne paga l'importazione
+
+
+# Sotto questa dimensione (in byte) le risposte non vengono compresse
+SOGLIA_COMPRESSIONE = 1024
+
+# Decimali conservati dalla codifica compatta
+DECIMALI_COMPATTO = 4
+
+# Byte di NDJSON accumulati prima di svuotare il flusso compresso
+BLOCCO_FLUSSO = 64 * 1024
+
+
+# Codifica compatta: numeri arrotondati e liste di oggetti con le stesse chiavi
+# trasformate in colonne {"colonne": [...], "righe": [[...], ...]}
+def compatta(dati, decimali: int = DECIMALI_COMPATTO):
+    if isinstance(dati, float):
+        arrotondato = round(dati, decimali)
+        return int(arrotondato) if arrotondato.is_integer() else arrotondato
+    if isinstance(dati, dict):
+        return {chiave: compatta(valore, decimali) for chiave, valore in dati.items()}
+    if isinstance(dati, (list, tuple)):
+        if len(dati) > 1 and all(isinstance(elemento, dict) for elemento in dati):
+            chiavi = list(dati[0])
+            if all(list(elemento) == chiavi for elemento in dati):
+                return {
+                    'colonne': chiavi,
+                    'righe': [[compatta(elemento[chiave], decimali) for chiave in chiavi] for elemento in dati]
+                }
+        return [compatta(elemento, decimali) for elemento in dati]
+    return dati
+
+
+# Risultati di una simulazione nel formato JSON delle API (e del batch da riga di comando)
+def formatta_risultati_json(risultati):
+    output = {
+        'risultati_prodotti': [],
+        'capacita_complessiva': risultati['capacita_giornaliera_complessiva'],
+        'durata_lotto_ore': risultati['durata_lotto_ore'],
+        'durata_lotto_giorni': risultati['durata_lotto_giorni']
+    }
+    
+    for prodotto, qta in risultati['quantita'].items():
+        linea = risultati['assegnazioni_linee'][prodotto]
+        dati = risultati['risultati_per_prodotto'][prodotto]
+        
+        risultato_prodotto = {
+            'prodotto': prodotto.nome,
+            'quantita': qta,
+            'tempo_teorico': risultati['tempo_per_unita'][prodotto],
+            'linea': linea.nome,
+            'efficienza': linea.coefficiente_efficienza,
+            'tempo_effettivo': dati['tempo_effettivo'],
+            'capacita_giornaliera': dati['capacita_giornaliera'],
+            'ore_totali': dati['ore_totali'],
+            'giorni_necessari': dati['giorni_necessari']
+        }
+        
+        # Quote per linea quando il prodotto è ripartito su più linee
+        if 'ripartizione' in dati:
+            risultato_prodotto['ripartizione'] = [
+                {
+                    'linea': quota['linea'].nome,
+                    'quantita': quota['quantita'],
+                    'ore_totali': quota['ore_totali']
+                }
+                for quota in dati['ripartizione']
+            ]
+        
+        output['risultati_prodotti'].append(risultato_prodotto)
+    
+    return output
+
+
+def serializza(dati) -> bytes:
+    return json.dumps(dati, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+# ETag forte del corpo non compresso; le rappresentazioni compresse hanno un suffisso
+# con la codifica, perché a codifiche diverse corrispondono byte diversi
+def calcola_etag(corpo: bytes, codifica: Optional[str] = None) -> str:
+    import hashlib
+    impronta = hashlib.blake2b(corpo, digest_size=16).hexdigest()
+    return f"{impronta}-{codifica}" if codifica else impronta
+
+
+# Codifica da usare tra quelle accettate dal client: br (se disponibile) oppure gzip
+def scegli_codifica(accettate) -> Optional[str]:
+    if brotli is not None and accettate['br']:
+        return 'br'
+    if accettate['gzip']:
+        return 'gzip'
+    return None
+
+
+def comprimi(corpo: bytes, codifica: str) -> bytes:
+    if codifica == 'br':
+        return brotli.compress(corpo, quality=5)
+    import gzip
+    return gzip.compress(corpo, compresslevel=5, mtime=0)
+
+
+# Compressione gzip incrementale di un flusso di righe: il flusso compresso viene svuotato
+# ogni blocco_flusso byte, così il client riceve i risultati man mano che sono calcolati
+def comprimi_flusso(righe: Iterable[str], blocco_flusso: int = BLOCCO_FLUSSO) -> Iterator[bytes]:
+    import zlib
+    compressore = zlib.compressobj(5, zlib.DEFLATED, 31)
+    in_attesa = 0
+    for riga in righe:
+        dati = riga.encode('utf-8')
+        in_attesa += len(dati)
+        parziale = compressore.compress(dati)
+        if in_attesa >= blocco_flusso:
+            parziale += compressore.flush(zlib.Z_SYNC_FLUSH)
+            in_attesa = 0
+        if parziale:
+            yield parziale
+    yield compressore.flush()
@@ -0,0 +1,226 @@
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+
+# Variabili d'ambiente con cui il processo principale passa a se stesso, nel riavvio
+# con SIGHUP, il socket in ascolto e i worker della generazione precedente
+VARIABILE_SOCKET = 'SERVER_SOCKET_FD'
+VARIABILE_WORKER_PRECEDENTI = 'SERVER_WORKER_PRECEDENTI'
+
+# Secondi concessi ai worker per completare le richieste in corso durante l'arresto
+TIMEOUT_ARRESTO = 30
+
+# Secondi di inattività dopo cui una connessione keep-alive viene chiusa: all'arresto il worker
+# attende i thread delle connessioni, che altrimenti resterebbero in attesa della richiesta successiva
+TIMEOUT_KEEPALIVE = 2
+
+
+# Gestore delle richieste senza il log di ogni richiesta su stderr
+class _GestoreSilenzioso(WSGIRequestHandler):
+
+    timeout = TIMEOUT_KEEPALIVE
+
+    def log_request(self, *args, **kwargs) -> None:
+        pass
+
+    # Le connessioni keep-alive chiuse per inattività non sono errori
+    def log_error(self, format: str, *args) -> None:
+        if not format.startswith('Request timed out'):
+            super().log_error(format, *args)
+
+
+# Socket in ascolto: ereditato dalla generazione precedente oppure creato da zero
+def _apri_socket(host: str, porta: int, backlog: int) -> socket.socket:
+    fd = os.environ.pop(VARIABILE_SOCKET, None)
+    if fd is not None:
+        sock = socket.socket(fileno=int(fd))
+    else:
+        sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, porta))
+        sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+# Carica una sola volta nel processo principale catalogo, schemi, template e moduli,
+# ed esegue una simulazione di prova: i worker ereditano tutto già pronto in copy-on-write
+def precarica():
+    import app as modulo_app
+    from validazione import schema_modalita
+
+    for modalita in ('automatico', 'manuale'):
+        schema_modalita(modalita, modulo_app.CATALOGO)
+    modulo_app.app.jinja_env.get_template('index.html')
+
+    client = modulo_app.app.test_client()
+    scenario = {prodotto.campo_quantita: prodotto.range_quantita_produzione[0] for prodotto in modulo_app.PRODOTTI}
+    scenario.update({linea.campo_coefficiente: 1.0 for linea in modulo_app.CATALOGO.linee})
+    risposta = client.post('/api/simula', json=dict(scenario, seed=0))
+    if risposta.status_code != 200:
+        raise RuntimeError(f"Simulazione di prova non riuscita: {risposta.get_data(as_text=True)}")
+
+    # Gli oggetti precaricati escono dalle generazioni del garbage collector,
+    # che altrimenti toccherebbe le loro pagine nei worker annullando il copy-on-write
+    gc.collect()
+    gc.freeze()
+    return modulo_app
+
+
+# Ciclo di un worker: serve le richieste sul socket condiviso fino a SIGTERM,
+# poi smette di accettare connessioni e attende la fine delle richieste in corso
+def _esegui_worker(modulo_app, sock: socket.socket, thread: bool) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+    # La connessione SQLite non può attraversare fork(): ogni worker apre la propria
+    if modulo_app.ARCHIVIO is not None:
+        from archivio import ArchivioScenari
+        modulo_app.ARCHIVIO = ArchivioScenari(modulo_app.ARCHIVIO.percorso)
+    modulo_app.STATO_PROCESSO.update(pronto=True, avviato=time.time())
+
+    host, porta = sock.getsockname()[:2]
+    server = make_server(host, porta, modulo_app.app, threaded=thread, request_handler=_GestoreSilenzioso, fd=sock.fileno())
+    server.daemon_threads = False
+    # Più worker attendono sullo stesso socket: chi si sveglia dopo che un altro ha già accettato
+    # la connessione resterebbe bloccato in accept() e non vedrebbe più la richiesta di arresto
+    server.socket.setblocking(False)
+
+    def arresta(*_):
+        modulo_app.STATO_PROCESSO['pronto'] = False
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, arresta)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        modulo_app.CODA_LAVORI.chiudi()
+
+
+def _avvia_worker(modulo_app, sock: socket.socket, thread: bool) -> int:
+    pid = os.fork()
+    if pid == 0:
+        codice = 0
+        try:
+            _esegui_worker(modulo_app, sock, thread)
+        except BaseException:
+            # Il traceback va su stderr prima di os._exit, che non lo stamperebbe
+            traceback.print_exc()
+            sys.stderr.flush()
+            codice = 1
+        finally:
+            os._exit(codice)
+    return pid
+
+
+# Processo principale: precarica, avvia i worker e li sostituisce se terminano.
+# SIGTERM/SIGINT arrestano il server attendendo le richieste in corso; SIGHUP lo riavvia
+# senza interruzioni: il processo si riesegue mantenendo il socket, precarica il codice
+# aggiornato, avvia i nuovi worker e solo allora arresta quelli della generazione precedente
+def servi(host: str = '127.0.0.1', porta: int = 8000, n_worker: Optional[int] = None, thread: bool = True, backlog: int = 1024) -> None:
+    n_worker = n_worker or os.cpu_count() or 1
+    sock = _apri_socket(host, porta, backlog)
+    precedenti = [int(pid) for pid in os.environ.pop(VARIABILE_WORKER_PRECEDENTI, '').split(',') if pid]
+
+    # I segnali ricevuti durante il precaricamento vengono gestiti subito dopo
+    segnali: List[int] = []
+    for tipo in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+        signal.signal(tipo, lambda numero, _: segnali.append(numero))
+
+    inizio = time.perf_counter()
+    modulo_app = precarica()
+    print(f" Precaricamento completato in {time.perf_counter() - inizio:.2f} s", flush=True)
+
+    # I worker non condividono piani, lavori, cache e metriche: con più worker le route con stato sono disattivate
+    modulo_app.STATO_PROCESSO['worker'] = n_worker
+    worker: Dict[int, bool] = {}
+
+    for _ in range(n_worker):
+        worker[_avvia_worker(modulo_app, sock, thread)] = True
+    print(f" In ascolto su http://{host}:{sock.getsockname()[1]} con {n_worker} worker (pid {os.getpid()})", flush=True)
+
+    # La generazione precedente termina solo quando quella nuova è già in ascolto
+    for pid in precedenti:
+        _segnala(pid, signal.SIGTERM)
+
+    in_arresto = False
+    scadenza = float('inf')
+    while True:
+        # Raccolta dei processi terminati: i worker correnti vengono sostituiti
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if not pid:
+                break
+            if pid in precedenti:
+                precedenti.remove(pid)
+            elif worker.pop(pid, None) and not in_arresto:
+                worker[_avvia_worker(modulo_app, sock, thread)] = True
+
+        if in_arresto and not worker and not precedenti:
+            break
+
+        while segnali:
+            numero = segnali.pop(0)
+            if numero == signal.SIGHUP and not in_arresto:
+                _riesegui(sock, list(worker) + precedenti)
+            elif numero in (signal.SIGTERM, signal.SIGINT) and not in_arresto:
+                in_arresto = True
+                scadenza = time.monotonic() + TIMEOUT_ARRESTO
+                for pid in list(worker) + precedenti:
+                    _segnala(pid, signal.SIGTERM)
+
+        if in_arresto and time.monotonic() > scadenza:
+            for pid in list(worker) + precedenti:
+                _segnala(pid, signal.SIGKILL)
+            scadenza = float('inf')
+
+        time.sleep(0.1)
+
+    sock.close()
+    print(" Server arrestato", flush=True)
+
+
+def _segnala(pid: int, numero: int) -> None:
+    try:
+        os.kill(pid, numero)
+    except ProcessLookupError:
+        pass
+
+
+# Riavvio a caldo: stesso pid (i worker restano figli del processo), stesso socket
+def _riesegui(sock: socket.socket, worker_attivi: List[int]) -> None:
+    print(" Riavvio: caricamento della nuova generazione di worker", flush=True)
+    os.environ[VARIABILE_SOCKET] = str(sock.fileno())
+    os.environ[VARIABILE_WORKER_PRECEDENTI] = ','.join(str(pid) for pid in worker_attivi)
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+
+def _leggi_argomenti():
+    parser = argparse.ArgumentParser(description="Server WSGI di produzione con worker preforkati")
+    parser.add_argument('comando', nargs='?', choices=['serve'], default='serve')
+    parser.add_argument('--host', default='127.0.0.1', help="indirizzo di ascolto")
+    parser.add_argument('--porta', type=int, default=8000, help="porta di ascolto")
+    parser.add_argument('--worker', type=int, default=None, help="processi worker (default: numero di CPU)")
+    parser.add_argument('--senza-thread', action='store_true', help="una richiesta alla volta per worker")
+    parser.add_argument('--backlog', type=int, default=1024, help="connessioni in attesa sul socket")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    argomenti = _leggi_argomenti()
+    servi(argomenti.host, argomenti.porta, argomenti.worker, not argomenti.senza_thread, argomenti.backlog)
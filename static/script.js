@@ -1,3 +1,6 @@
+// Ultima risposta visualizzata: con lo stesso ETag il server risponde 304 e l'HTML viene riusato
+let ultimoRisultato = { etag: null, html: null };
+
 document.getElementById('form-simulazione').addEventListener('submit', async (e) => {
     e.preventDefault();
     
@@ -11,18 +14,27 @@ document.getElementById('form-simulazione').addEventListener('submit', async (e)
     });
     
     try {
+        const headers = { 'Content-Type': 'application/json' };
+        if (ultimoRisultato.etag) {
+            headers['If-None-Match'] = ultimoRisultato.etag;
+        }
+        
         const response = await fetch('/api/simula', {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
+            headers: headers,
             body: JSON.stringify(data)
         });
         
+        if (response.status === 304) {
+            visualizzaRisultati(ultimoRisultato.html);
+            return;
+        }
+        
         const result = await response.json();
         
         if (response.ok) {
-            mostraRisultati(result);
+            ultimoRisultato = { etag: response.headers.get('ETag'), html: generaHtmlRisultati(result) };
+            visualizzaRisultati(ultimoRisultato.html);
         } else {
             mostraErrori(result.errore);
         }
@@ -31,9 +43,7 @@ document.getElementById('form-simulazione').addEventListener('submit', async (e)
     }
 });
 
-function mostraRisultati(data) {
-    const container = document.getElementById('risultati-content');
-    
+function generaHtmlRisultati(data) {
     let html = '';
     
     data.risultati_prodotti.forEach(prod => {
@@ -68,6 +78,11 @@ function mostraRisultati(data) {
                     <span class="data-label">Giorni necessari</span>
                     <span class="data-value">${prod.giorni_necessari.toFixed(2)} giorni</span>
                 </div>
+                ${(prod.ripartizione || []).map(quota => `
+                <div class="data-row">
+                    <span class="data-label">Quota Linea ${quota.linea}</span>
+                    <span class="data-value">${quota.quantita} capi in ${formatTempoOreMinuti(quota.ore_totali)}</span>
+                </div>`).join('')}
             </div>
         `;
     });
@@ -86,7 +101,11 @@ function mostraRisultati(data) {
         </div>
     `;
     
-    container.innerHTML = html;
+    return html;
+}
+
+function visualizzaRisultati(html) {
+    document.getElementById('risultati-content').innerHTML = html;
     document.getElementById('risultati').classList.remove('hidden');
     document.getElementById('risultati').scrollIntoView({ behavior: 'smooth', block: 'start' });
 }
@@ -0,0 +1,187 @@
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models import Prodotto, LineaProduttiva, Impianto
+from produzione import assegna_linee_a_prodotti
+
+
+# Oltre questo numero di prodotti su una linea la somma di uniformi è approssimata con una
+# normale: la formula esatta ha 2^n termini e perde precisione per cancellazione
+MAX_TERMINI_ESATTI = 8
+
+# Tolleranza (in ore) della bisezione sui quantili, ben sotto l'arrotondamento al centesimo
+TOLLERANZA_ORE = 1e-4
+
+# Nodi e pesi di Gauss-Legendre a 5 punti su [-1, 1]
+_NODI_GAUSS = (-0.9061798459386640, -0.5384693101056831, 0.0, 0.5384693101056831, 0.9061798459386640)
+_PESI_GAUSS = (0.2369268850561891, 0.4786286704993665, 0.5688888888888889, 0.4786286704993665, 0.2369268850561891)
+
+
+# Distribuzione del carico di una linea: somma di contributi uniformi indipendenti, uno per
+# prodotto assegnato, X = minimo + ampiezza * U. La funzione di ripartizione della somma è
+# la convoluzione delle uniformi, in forma chiusa (polinomio a tratti di grado n):
+# F(s) = sum_A (-1)^|A| (s - minimo - sum_{i in A} ampiezza_i)_+^n / (n! prod ampiezza_i)
+class DistribuzioneLinea:
+
+    def __init__(self, nome: str, contributi: Sequence[Tuple[float, float]]):
+        self.nome = nome
+        self.minimo = sum(minimo for minimo, _ in contributi)
+        self.massimo = sum(massimo for _, massimo in contributi)
+        self.media = sum(minimo + massimo for minimo, massimo in contributi) / 2
+        self.varianza = sum((massimo - minimo) ** 2 for minimo, massimo in contributi) / 12
+
+        # I contributi senza variabilità spostano solo la distribuzione
+        ampiezze = [massimo - minimo for minimo, massimo in contributi if massimo - minimo > 0]
+        self.esatta = len(ampiezze) <= MAX_TERMINI_ESATTI
+        self._grado = len(ampiezze)
+        self._vertici: List[Tuple[float, float]] = []
+        if self.esatta and ampiezze:
+            # Vertici dell'ipercubo: (scostamento dal minimo, segno), normalizzati una sola volta
+            scala = math.factorial(len(ampiezze)) * math.prod(ampiezze)
+            vertici = [(0.0, 1.0)]
+            for ampiezza in ampiezze:
+                vertici += [(scostamento + ampiezza, -segno) for scostamento, segno in vertici]
+            self._vertici = [(scostamento, segno / scala) for scostamento, segno in vertici]
+
+    def cdf(self, t: float) -> float:
+        if t <= self.minimo:
+            return 1.0 if self.massimo <= self.minimo else 0.0
+        if t >= self.massimo:
+            return 1.0
+        if not self.esatta:
+            return 0.5 * (1 + math.erf((t - self.media) / math.sqrt(2 * self.varianza)))
+
+        x = t - self.minimo
+        n = self._grado
+        valore = sum(segno * (x - scostamento) ** n for scostamento, segno in self._vertici if x > scostamento)
+        return min(1.0, max(0.0, valore))
+
+    # Estremi dei tratti polinomiali della funzione di ripartizione
+    def punti_di_rottura(self) -> List[float]:
+        return [self.minimo + scostamento for scostamento, _ in self._vertici] or [self.minimo]
+
+    def quantile(self, p: float) -> float:
+        return _bisezione(self.cdf, self.minimo, self.massimo, p)
+
+    def riepilogo(self, percentili: Sequence[float] = (50, 90, 99)) -> Dict[str, object]:
+        return {
+            'linea': self.nome,
+            'media_ore': round(self.media, 2),
+            'deviazione_standard_ore': round(math.sqrt(self.varianza), 2),
+            'minimo_ore': round(self.minimo, 2),
+            'massimo_ore': round(self.massimo, 2),
+            'percentili_ore': {f"P{p:g}": round(self.quantile(p / 100), 2) for p in percentili}
+        }
+
+
+# Distribuzione della durata del lotto, il massimo dei carichi delle linee. Le linee sono
+# indipendenti (ogni prodotto è su una sola linea), quindi F(t) = prod_l F_l(t); media e
+# varianza sono integrate numericamente con Gauss-Legendre tra i punti di rottura
+class DistribuzioneLotto:
+
+    def __init__(self, linee: List[DistribuzioneLinea]):
+        if not linee:
+            raise ValueError("Il lotto deve avere almeno una linea con prodotti assegnati")
+        self.linee = linee
+        self.minimo = max(linea.minimo for linea in linee)
+        self.massimo = max(linea.massimo for linea in linee)
+
+    def cdf(self, t: float) -> float:
+        return math.prod(linea.cdf(t) for linea in self.linee)
+
+    # Probabilità di completare il lotto entro la scadenza indicata
+    def probabilita_entro(self, scadenza_ore: float) -> float:
+        return self.cdf(scadenza_ore)
+
+    # Le linee che terminano comunque prima del minimo del lotto hanno F = 1 su tutto l'intervallo
+    def quantile(self, p: float) -> float:
+        critiche = [linea for linea in self.linee if linea.massimo > self.minimo]
+        return _bisezione(lambda t: math.prod(linea.cdf(t) for linea in critiche), self.minimo, self.massimo, p)
+
+    # E[D] = minimo + int (1 - F), E[D^2] = minimo^2 + int 2t (1 - F), sull'intervallo [minimo, massimo]
+    def _momenti(self) -> Tuple[float, float]:
+        punti = {self.minimo, self.massimo}
+        for linea in self.linee:
+            if linea.esatta:
+                punti.update(linea.punti_di_rottura())
+            else:
+                # Con l'approssimazione normale l'intervallo della linea è diviso in 16 tratti
+                punti.update(linea.minimo + (linea.massimo - linea.minimo) * k / 16 for k in range(16))
+        punti = sorted(punto for punto in punti if self.minimo <= punto <= self.massimo)
+
+        primo, secondo = self.minimo, self.minimo ** 2
+        for inizio, fine in zip(punti, punti[1:]):
+            meta, centro = (fine - inizio) / 2, (fine + inizio) / 2
+            for nodo, peso in zip(_NODI_GAUSS, _PESI_GAUSS):
+                t = centro + meta * nodo
+                coda = 1 - self.cdf(t)
+                primo += peso * meta * coda
+                secondo += peso * meta * 2 * t * coda
+        return primo, max(0.0, secondo - primo ** 2)
+
+    def riepilogo(self, percentili: Sequence[float] = (50, 90, 99)) -> Dict[str, object]:
+        media, varianza = self._momenti()
+        return {
+            'media_ore': round(media, 2),
+            'deviazione_standard_ore': round(math.sqrt(varianza), 2),
+            'minimo_ore': round(self.minimo, 2),
+            'massimo_ore': round(self.massimo, 2),
+            'percentili_ore': {f"P{p:g}": round(self.quantile(p / 100), 2) for p in percentili},
+            'linee': [linea.riepilogo(percentili) for linea in self.linee]
+        }
+
+
+# Bisezione su una funzione di ripartizione non decrescente: primo t con F(t) >= p
+def _bisezione(cdf, minimo: float, massimo: float, p: float) -> float:
+    if not 0 <= p <= 1:
+        raise ValueError("La probabilità deve essere compresa tra 0 e 1")
+    while massimo - minimo > TOLLERANZA_ORE:
+        centro = (minimo + massimo) / 2
+        if cdf(centro) >= p:
+            massimo = centro
+        else:
+            minimo = centro
+    return massimo
+
+
+# Tempi unitari medi, al centro di range_tempo_produzione
+def tempi_medi(prodotti: List[Prodotto]) -> Dict[Prodotto, float]:
+    return {prodotto: sum(prodotto.range_tempo_produzione) / 2 for prodotto in prodotti}
+
+
+# Funzione per calcolare la distribuzione della durata del lotto con tempi unitari incerti.
+# Il tempo unitario di ogni prodotto è uniforme su range_tempo_produzione (come in
+# genera_parametri_configurabili); le ore sulla linea sono quantita * tempo / coefficiente.
+# Senza assegnazioni esplicite le linee sono assegnate sui tempi medi. L'arrotondamento
+# al minuto del tempo effettivo è trascurato: il modello è continuo
+def distribuzione_durata_lotto(
+    prodotti: List[Prodotto],
+    quantita: Dict[Prodotto, int],
+    impianto: Impianto,
+    assegnazioni_linee: Optional[Dict[Prodotto, LineaProduttiva]] = None,
+    metodo: str = 'greedy'
+) -> DistribuzioneLotto:
+
+    if assegnazioni_linee is None:
+        assegnazioni_linee = assegna_linee_a_prodotti(prodotti, quantita, tempi_medi(prodotti), impianto, metodo)
+
+    contributi: Dict[str, List[Tuple[float, float]]] = {}
+    for prodotto in prodotti:
+        linea = assegnazioni_linee[prodotto]
+        minimo, massimo = prodotto.range_tempo_produzione
+        fattore = quantita[prodotto] / linea.coefficiente_efficienza
+        contributi.setdefault(linea.nome, []).append((minimo * fattore, massimo * fattore))
+
+    return DistribuzioneLotto([DistribuzioneLinea(nome, valori) for nome, valori in contributi.items()])
+
+
+# Stima rapida di un percentile (default P90) della durata del lotto, in ore
+def percentile_durata_lotto(
+    prodotti: List[Prodotto],
+    quantita: Dict[Prodotto, int],
+    impianto: Impianto,
+    percentile: float = 90,
+    assegnazioni_linee: Optional[Dict[Prodotto, LineaProduttiva]] = None
+) -> float:
+    distribuzione = distribuzione_durata_lotto(prodotti, quantita, impianto, assegnazioni_linee)
+    return round(distribuzione.quantile(percentile / 100), 2)
@@ -0,0 +1,129 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Tuple
+
+
+# Campioni recenti conservati per span, su cui sono calcolati i quantili
+DIMENSIONE_FINESTRA = 4096
+
+QUANTILI = (0.5, 0.95, 0.99)
+
+# Span nullo condiviso, restituito quando la strumentazione è disabilitata
+_SPAN_NULLO = nullcontext()
+
+
+# Durate di uno span: conteggio e somma cumulativi, quantili sugli ultimi campioni
+class IstogrammaDurate:
+
+    __slots__ = ('conteggio', 'somma', 'campioni')
+
+    def __init__(self, dimensione_finestra: int = DIMENSIONE_FINESTRA):
+        self.conteggio = 0
+        self.somma = 0.0
+        self.campioni = deque(maxlen=dimensione_finestra)
+
+    def aggiungi(self, secondi: float) -> None:
+        self.conteggio += 1
+        self.somma += secondi
+        self.campioni.append(secondi)
+
+    def riepilogo(self) -> Dict[str, float]:
+        ordinati = sorted(self.campioni)
+        riepilogo = {'conteggio': self.conteggio, 'somma_secondi': self.somma}
+        for q in QUANTILI:
+            riepilogo[f"p{q * 100:g}"] = _quantile(ordinati, q)
+        return riepilogo
+
+
+def _quantile(ordinati: List[float], q: float) -> float:
+    if not ordinati:
+        return 0.0
+    return ordinati[min(len(ordinati) - 1, int(q * len(ordinati)))]
+
+
+class _Span:
+
+    __slots__ = ('registro', 'nome', 'inizio')
+
+    def __init__(self, registro: "RegistroMetriche", nome: str):
+        self.registro = registro
+        self.nome = nome
+
+    def __enter__(self) -> "_Span":
+        self.inizio = time.perf_counter()
+        return self
+
+    def __exit__(self, *eccezione) -> None:
+        self.registro.registra(self.nome, time.perf_counter() - self.inizio)
+
+
+# Registro degli span: da disabilitato span() restituisce un contesto nullo condiviso,
+# quindi il costo si riduce a un controllo e a una chiamata
+class RegistroMetriche:
+
+    def __init__(self, abilitato: bool = False, dimensione_finestra: int = DIMENSIONE_FINESTRA):
+        self.abilitato = abilitato
+        self.dimensione_finestra = dimensione_finestra
+        self._istogrammi: Dict[str, IstogrammaDurate] = {}
+        self._lock = threading.Lock()
+
+    def span(self, nome: str):
+        if not self.abilitato:
+            return _SPAN_NULLO
+        return _Span(self, nome)
+
+    def registra(self, nome: str, secondi: float) -> None:
+        with self._lock:
+            istogramma = self._istogrammi.get(nome)
+            if istogramma is None:
+                istogramma = self._istogrammi[nome] = IstogrammaDurate(self.dimensione_finestra)
+            istogramma.aggiungi(secondi)
+
+    def riepilogo(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {nome: istogramma.riepilogo() for nome, istogramma in sorted(self._istogrammi.items())}
+
+    def svuota(self) -> None:
+        with self._lock:
+            self._istogrammi.clear()
+
+    # Esposizione nel formato testuale di Prometheus, come metrica di tipo summary
+    def formato_prometheus(self, nome_metrica: str = 'simulazione_span_secondi') -> str:
+        righe = [
+            f"# HELP {nome_metrica} Durata degli span della pipeline di simulazione in secondi",
+            f"# TYPE {nome_metrica} summary"
+        ]
+        for nome, riepilogo in self.riepilogo().items():
+            for q in QUANTILI:
+                righe.append(f'{nome_metrica}{{span="{nome}",quantile="{q:g}"}} {riepilogo[f"p{q * 100:g}"]:.9g}')
+            righe.append(f'{nome_metrica}_sum{{span="{nome}"}} {riepilogo["somma_secondi"]:.9g}')
+            righe.append(f'{nome_metrica}_count{{span="{nome}"}} {riepilogo["conteggio"]}')
+        return '\n'.join(righe) + '\n'
+
+    def __repr__(self) -> str:
+        stato = 'abilitato' if self.abilitato else 'disabilitato'
+        return f"<RegistroMetriche {stato}: {len(self._istogrammi)} span>"
+
+
+# Registro globale, abilitato con la variabile d'ambiente STRUMENTAZIONE=1
+REGISTRO = RegistroMetriche(abilitato=os.environ.get('STRUMENTAZIONE') == '1')
+
+
+def span(nome: str):
+    return REGISTRO.span(nome)
+
+
+# Esegue la funzione sotto cProfile e restituisce il risultato con le funzioni più costose
+def profila(funzione: Callable[[], object], righe: int = 30, ordinamento: str = 'cumulative') -> Tuple[object, str]:
+    profilo = cProfile.Profile()
+    risultato = profilo.runcall(funzione)
+
+    testo = io.StringIO()
+    pstats.Stats(profilo, stream=testo).strip_dirs().sort_stats(ordinamento).print_stats(righe)
+    return risultato, testo.getvalue()
@@ -0,0 +1,134 @@
+import itertools
+import random
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from models import Prodotto, LineaProduttiva, Impianto
+from produzione import assegna_linee_a_prodotti, _durata_lotto_ore
+from tabelle import TabellaTempi
+
+
+# Una dimensione dello sweep: il prodotto di cui variare la quantità
+# oppure la linea di cui variare il coefficiente, con i valori da esplorare
+Dimensione = Tuple[Union[Prodotto, LineaProduttiva], Sequence[float]]
+
+# Ogni quanti punti viene notificato l'avanzamento dello sweep
+PASSO_AVANZAMENTO = 1000
+
+
+# Punti della griglia completa: l'ultima dimensione varia più velocemente,
+# quindi tra due punti consecutivi cambia di solito un solo parametro
+def _punti_griglia(dimensioni: Dict[str, Dimensione]) -> List[Tuple[float, ...]]:
+
+    return list(itertools.product(*(valori for _, valori in dimensioni.values())))
+
+
+# Campionamento Latin hypercube: ogni dimensione è divisa in n strati, campionati una volta ciascuno
+def _punti_latin_hypercube(
+    dimensioni: Dict[str, Dimensione],
+    n_campioni: int,
+    rng: random.Random
+) -> List[Tuple[float, ...]]:
+
+    colonne = []
+    for oggetto, valori in dimensioni.values():
+        minimo, massimo = min(valori), max(valori)
+        strati = list(range(n_campioni))
+        rng.shuffle(strati)
+        campioni = [minimo + (strato + rng.random()) / n_campioni * (massimo - minimo) for strato in strati]
+
+        # Quantità intere, coefficienti quantizzati al centesimo
+        if isinstance(oggetto, Prodotto):
+            colonne.append([int(round(c)) for c in campioni])
+        else:
+            colonne.append([round(c, 2) for c in campioni])
+
+    return list(zip(*colonne))
+
+
+# Funzione per valutare la durata del lotto su una griglia o un campione di parametri
+def esegui_sweep(
+    prodotti: List[Prodotto],
+    quantita: Dict[Prodotto, int],
+    tempo_per_unita: Dict[Prodotto, float],
+    impianto: Impianto,
+    dimensioni: Dict[str, Dimensione],
+    metodo: str = 'griglia',
+    n_campioni: int = 100,
+    seed: Optional[int] = None,
+    ore_per_giorno: int = 24,
+    avanzamento: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, object]:
+
+    if metodo == 'griglia':
+        punti = _punti_griglia(dimensioni)
+    elif metodo == 'lhs':
+        punti = _punti_latin_hypercube(dimensioni, n_campioni, random.Random(seed))
+    else:
+        raise ValueError(f"Metodo di sweep sconosciuto: {metodo}")
+
+    nomi = list(dimensioni)
+    indici_linee = {linea: i for i, linea in enumerate(impianto.linee)}
+
+    # Tempi effettivi e capacità per prodotto e coefficiente, precalcolati per i coefficienti dello sweep
+    tabella = TabellaTempi(prodotti, tempo_per_unita, impianto, ore_per_giorno)
+    for oggetto, valori in dimensioni.values():
+        if isinstance(oggetto, LineaProduttiva):
+            tabella.precalcola(sorted({float(valore) for valore in valori}))
+
+    # Risultati per prodotto già calcolati, per (prodotto, quantità, coefficiente):
+    # quando cambia un solo parametro viene ricalcolato solo il prodotto interessato
+    memo = {}
+    ricalcoli = 0
+
+    colonne = {nome: [] for nome in nomi}
+    colonne.update({'durata_lotto_ore': [], 'durata_lotto_giorni': [], 'capacita_giornaliera_complessiva': []})
+
+    for indice, punto in enumerate(punti):
+        # Notifica dei punti valutati, per i lavori eseguiti in background
+        if avanzamento is not None and indice % PASSO_AVANZAMENTO == 0:
+            avanzamento(indice, len(punti))
+
+        quantita_punto = dict(quantita)
+        coefficienti = [linea.coefficiente_efficienza for linea in impianto.linee]
+
+        for nome, valore in zip(nomi, punto):
+            oggetto = dimensioni[nome][0]
+            if isinstance(oggetto, Prodotto):
+                quantita_punto[oggetto] = int(valore)
+            else:
+                coefficienti[indici_linee[oggetto]] = float(valore)
+            colonne[nome].append(valore)
+
+        impianto_punto = Impianto([
+            LineaProduttiva(linea.nome, coeff) for linea, coeff in zip(impianto.linee, coefficienti)
+        ])
+        assegnazioni = assegna_linee_a_prodotti(prodotti, quantita_punto, tempo_per_unita, impianto_punto)
+
+        risultati_prodotti = []
+        for prodotto, linea in assegnazioni.items():
+            chiave = (prodotto, quantita_punto[prodotto], linea.coefficiente_efficienza)
+            risultato = memo.get(chiave)
+            if risultato is None:
+                risultato = tabella.risultato_prodotto(quantita_punto[prodotto], prodotto, linea.coefficiente_efficienza)
+                memo[chiave] = risultato
+                ricalcoli += 1
+            risultati_prodotti.append({'linea_assegnata': linea.nome, **risultato})
+
+        durata_ore = _durata_lotto_ore(risultati_prodotti)
+        colonne['durata_lotto_ore'].append(round(durata_ore, 2))
+        colonne['durata_lotto_giorni'].append(round(durata_ore / ore_per_giorno, 3))
+        colonne['capacita_giornaliera_complessiva'].append(
+            sum(risultato['capacita_giornaliera'] for risultato in risultati_prodotti)
+        )
+
+    if avanzamento is not None:
+        avanzamento(len(punti), len(punti))
+
+    return {
+        'metodo': metodo,
+        'dimensioni': nomi,
+        'n_punti': len(punti),
+        'colonne': colonne,
+        'ricalcoli_prodotto': ricalcoli,
+        'riutilizzi_prodotto': len(punti) * len(prodotti) - ricalcoli
+    }
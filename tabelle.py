@@ -0,0 +1,94 @@
+from typing import Dict, Iterable, List, Tuple
+
+from models import Prodotto, LineaProduttiva, Impianto, capacita_giornaliera
+from produzione import _arrotonda_tempo_in_minuti
+
+
+# Voce della tabella: tempo effettivo preciso, tempo effettivo arrotondato al minuto, capacità giornaliera
+Voce = Tuple[float, float, int]
+
+
+# Tabella prodotto x linea dei tempi effettivi e delle capacità, calcolata una sola volta per impianto.
+# Le voci dipendono solo dal tempo unitario del prodotto e dal coefficiente della linea, quindi sono
+# indicizzate per (prodotto, coefficiente): un coefficiente nuovo non trova mai una voce vecchia e
+# viene calcolato al primo uso. aggiorna_linea() scarta le voci del coefficiente precedente
+class TabellaTempi:
+
+    def __init__(
+        self,
+        prodotti: List[Prodotto],
+        tempo_per_unita: Dict[Prodotto, float],
+        impianto: Impianto,
+        ore_per_giorno: int = 24
+    ):
+        self.prodotti = prodotti
+        self.tempo_per_unita = tempo_per_unita
+        self.ore_per_giorno = ore_per_giorno
+        self._voci: Dict[Tuple[Prodotto, float], Voce] = {}
+        self._coefficienti_linee: Dict[str, float] = {}
+        self.voci_calcolate = 0
+
+        for linea in impianto.linee:
+            self.aggiorna_linea(linea)
+
+    def _calcola_voce(self, prodotto: Prodotto, coefficiente: float) -> Voce:
+        tempo_teorico = self.tempo_per_unita[prodotto]
+        preciso = tempo_teorico / coefficiente
+        voce = (
+            preciso,
+            _arrotonda_tempo_in_minuti(preciso),
+            capacita_giornaliera(tempo_teorico, coefficiente, self.ore_per_giorno)
+        )
+        self._voci[(prodotto, coefficiente)] = voce
+        self.voci_calcolate += 1
+        return voce
+
+    def voce(self, prodotto: Prodotto, coefficiente: float) -> Voce:
+        voce = self._voci.get((prodotto, coefficiente))
+        if voce is None:
+            voce = self._calcola_voce(prodotto, coefficiente)
+        return voce
+
+    def tempo_effettivo(self, prodotto: Prodotto, linea: LineaProduttiva) -> float:
+        return self.voce(prodotto, linea.coefficiente_efficienza)[1]
+
+    # Colonna di una linea (nuova o con il coefficiente cambiato): le voci del coefficiente
+    # precedente sono scartate se nessun'altra linea lo usa, quelle del nuovo precalcolate
+    def aggiorna_linea(self, linea: LineaProduttiva) -> None:
+        precedente = self._coefficienti_linee.get(linea.nome)
+        coefficiente = linea.coefficiente_efficienza
+        self._coefficienti_linee[linea.nome] = coefficiente
+
+        if precedente is not None and precedente != coefficiente and precedente not in self._coefficienti_linee.values():
+            for prodotto in self.prodotti:
+                self._voci.pop((prodotto, precedente), None)
+
+        for prodotto in self.prodotti:
+            if (prodotto, coefficiente) not in self._voci:
+                self._calcola_voce(prodotto, coefficiente)
+
+    # Precalcolo di coefficienti aggiuntivi, ad esempio i valori di uno sweep
+    def precalcola(self, coefficienti: Iterable[float]) -> None:
+        for coefficiente in coefficienti:
+            for prodotto in self.prodotti:
+                if (prodotto, coefficiente) not in self._voci:
+                    self._calcola_voce(prodotto, coefficiente)
+
+    # Stesso risultato di produzione._calcola_risultato_prodotto, letto dalla tabella
+    def risultato_prodotto(self, quantita: int, prodotto: Prodotto, coefficiente: float) -> Dict[str, float]:
+        voce = self._voci.get((prodotto, coefficiente))
+        if voce is None:
+            voce = self._calcola_voce(prodotto, coefficiente)
+        ore_totali = quantita * voce[1]
+        return {
+            'tempo_effettivo': voce[1],
+            'capacita_giornaliera': voce[2],
+            'ore_totali': round(ore_totali, 2),
+            'giorni_necessari': round(ore_totali / self.ore_per_giorno, 3)
+        }
+
+    def __len__(self) -> int:
+        return len(self._voci)
+
+    def __repr__(self) -> str:
+        return f"<TabellaTempi: {len(self.prodotti)} prodotti, {len(self._voci)} voci>"
@@ -1,5 +1,14 @@
+import gzip
+import json
+import os
+import sqlite3
+import time
 import unittest
+import app as modulo_app
+import eventi
 from app import app, valida_input_utente, PRODOTTI
+from archivio import ArchivioScenari
+from strumentazione import REGISTRO
 
 
 class TestValidazioneInput(unittest.TestCase):
@@ -79,5 +88,490 @@ class TestValidazioneInput(unittest.TestCase):
         self.assertGreater(len(errori), 0)
 
 
+
+class TestSimulaSeed(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = app.test_client()
+        self.data = {
+            'quantita_giacche': '50',
+            'quantita_tshirt': '150',
+            'quantita_felpe': '100',
+            'quantita_pantaloni': '80',
+            'coeff_linea_a': '0.95',
+            'coeff_linea_b': '1.10',
+            'coeff_linea_c': '1.05',
+            'coeff_linea_d': '1.25',
+            'seed': 1234
+        }
+    
+    def test_simulazione_riproducibile(self):
+        prima = self.client.post('/api/simula', json=self.data).get_json()
+        seconda = self.client.post('/api/simula', json=self.data).get_json()
+        self.assertEqual(prima, seconda)
+    
+    def test_valori_convertiti_dallo_schema(self):
+        # Quantità e coefficienti in forme diverse accettate dallo schema danno la stessa simulazione
+        equivalente = dict(self.data, quantita_giacche=50.0, quantita_tshirt=' +150 ', coeff_linea_b='1.1e0', coeff_linea_d=1.25)
+        prima = self.client.post('/api/simula', json=self.data).get_json()
+        seconda = self.client.post('/api/simula', json=equivalente).get_json()
+        self.assertEqual(prima, seconda)
+    
+    def test_metriche_e_profilo(self):
+        REGISTRO.abilitato = True
+        app.config['PROFILAZIONE'] = True
+        try:
+            risposta = self.client.post('/api/simula?profilo=1', json=dict(self.data, seed=99)).get_json()
+            metriche = self.client.get('/metrics').get_data(as_text=True)
+        finally:
+            REGISTRO.abilitato = False
+            app.config['PROFILAZIONE'] = False
+            REGISTRO.svuota()
+        
+        self.assertIn('function calls', risposta['profilo'])
+        for nome in ('validazione', 'generazione_parametri', 'assegnazione', 'calcolo_lotto', 'formattazione_json'):
+            self.assertIn(f'span="{nome}"', metriche)
+    
+    def test_seed_non_valido(self):
+        errori = valida_input_utente(dict(self.data, seed='abc'))
+        self.assertTrue(any('seed' in e for e in errori))
+    
+    def test_simulazione_a_eventi(self):
+        eventi = {'turni': [[6, 14], [14, 22]], 'setup_ore': 0.5, 'mtbf_ore': 200, 'mttr_ore': 4}
+        risultato = self.client.post('/api/simula', json=dict(self.data, eventi=eventi)).get_json()
+        
+        self.assertIn('eventi', risultato)
+        self.assertGreater(risultato['eventi']['durata_lotto_ore'], risultato['durata_lotto_ore'])
+        self.assertEqual(len(risultato['eventi']['linee']), len(set(p['linea'] for p in risultato['risultati_prodotti'])))
+    
+    def test_eventi_non_validi(self):
+        errori = valida_input_utente(dict(self.data, eventi={'turni': [[22, 6]], 'mtbf_ore': 100}))
+        self.assertEqual(len(errori), 2)
+    
+    def test_eventi_fuori_limite(self):
+        casi = [
+            ({'mtbf_ore': 0.001, 'mttr_ore': 0.001}, {}),
+            ({'turni': [[6, 14]], 'setup_ore': 1e6}, {'frazionato': True}),
+            ({'setup_ore': 0.5, 'mtbf_ore': 200, 'mttr_ore': 1e6}, {})
+        ]
+        for eventi, altri in casi:
+            risposta = self.client.post('/api/simula', json=dict(self.data, eventi=eventi, **altri))
+            self.assertEqual(risposta.status_code, 400, eventi)
+        
+        # json.loads accetta Infinity e NaN, che non devono arrivare al motore né alla risposta
+        for valore in ('Infinity', 'NaN'):
+            corpo = json.dumps(dict(self.data, eventi={'turni': [[6, 14]]}))[:-2] + f', "setup_ore": {valore}}}}}'
+            risposta = self.client.post('/api/simula', data=corpo, content_type='application/json')
+            self.assertEqual(risposta.status_code, 400, corpo)
+    
+    def test_eventi_oltre_il_limite_di_eventi(self):
+        limite = eventi.MAX_EVENTI
+        eventi.MAX_EVENTI = 10
+        try:
+            risposta = self.client.post('/api/simula', json=dict(self.data, eventi={'turni': [[6, 14]]}))
+        finally:
+            eventi.MAX_EVENTI = limite
+        self.assertEqual(risposta.status_code, 400)
+        self.assertIn('eventi', risposta.get_json()['errore'][0])
+
+
+class TestSimulaBatch(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = app.test_client()
+        self.scenario = {
+            'quantita_giacche': '50',
+            'quantita_tshirt': '150',
+            'quantita_felpe': '100',
+            'quantita_pantaloni': '80',
+            'coeff_linea_a': '0.95',
+            'coeff_linea_b': '1.10',
+            'coeff_linea_c': '1.05',
+            'coeff_linea_d': '1.25'
+        }
+    
+    def test_batch_json(self):
+        # Uno scenario valido e uno con errori di validazione
+        non_valido = dict(self.scenario, quantita_giacche='500')
+        risposta = self.client.post('/api/simula/batch', json={'scenari': [self.scenario, non_valido]})
+        righe = [json.loads(riga) for riga in risposta.get_data(as_text=True).splitlines()]
+        
+        self.assertEqual(risposta.status_code, 200)
+        self.assertEqual(risposta.mimetype, 'application/x-ndjson')
+        self.assertEqual([riga['indice'] for riga in righe], [0, 1])
+        self.assertIn('durata_lotto_ore', righe[0])
+        self.assertIn('errore', righe[1])
+    
+    def test_batch_ndjson(self):
+        corpo = '\n'.join(json.dumps(self.scenario) for _ in range(3))
+        risposta = self.client.post('/api/simula/batch', data=corpo, content_type='application/x-ndjson')
+        righe = risposta.get_data(as_text=True).splitlines()
+        
+        self.assertEqual(len(righe), 3)
+        self.assertTrue(all('risultati_prodotti' in json.loads(riga) for riga in righe))
+    
+    def test_batch_senza_scenari(self):
+        risposta = self.client.post('/api/simula/batch', json={})
+        self.assertEqual(risposta.status_code, 400)
+
+
+
+class TestPianiApi(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = app.test_client()
+        self.coefficienti = {
+            'coeff_linea_a': '0.95',
+            'coeff_linea_b': '1.10',
+            'coeff_linea_c': '1.05',
+            'coeff_linea_d': '1.25'
+        }
+        self.lotto = {
+            'quantita_giacche': '50',
+            'quantita_tshirt': '150',
+            'quantita_felpe': '100',
+            'quantita_pantaloni': '80'
+        }
+    
+    def test_piano_incrementale(self):
+        risposta = self.client.post('/api/piani', json=dict(self.coefficienti, seed=1))
+        self.assertEqual(risposta.status_code, 201)
+        id_piano = risposta.get_json()['id']
+        
+        for _ in range(3):
+            piano = self.client.post(f'/api/piani/{id_piano}/lotti', json=self.lotto).get_json()
+        self.assertEqual([lotto['id'] for lotto in piano['lotti']], ['L1', 'L2', 'L3'])
+        
+        piano = self.client.delete(f'/api/piani/{id_piano}/lotti/L2').get_json()
+        self.assertEqual(piano['ultimo_aggiornamento']['lotti_ricalendarizzati'], 1)
+        
+        piano = self.client.put(f'/api/piani/{id_piano}/linee/a', json={'coefficiente': 1.5}).get_json()
+        self.assertEqual(len(piano['lotti']), 2)
+    
+    def test_piano_oltre_il_limite_di_lotti(self):
+        limite = modulo_app.MAX_LOTTI_PIANO
+        modulo_app.MAX_LOTTI_PIANO = 2
+        try:
+            id_piano = self.client.post('/api/piani', json=dict(self.coefficienti, seed=1)).get_json()['id']
+        finally:
+            modulo_app.MAX_LOTTI_PIANO = limite
+        
+        for _ in range(2):
+            self.assertEqual(self.client.post(f'/api/piani/{id_piano}/lotti', json=self.lotto).status_code, 200)
+        risposta = self.client.post(f'/api/piani/{id_piano}/lotti', json=self.lotto)
+        self.assertEqual(risposta.status_code, 409)
+        self.assertIn('massimo', risposta.get_json()['errore'])
+        
+        # Un lotto annullato libera posto
+        self.client.delete(f'/api/piani/{id_piano}/lotti/L1')
+        self.assertEqual(self.client.post(f'/api/piani/{id_piano}/lotti', json=self.lotto).status_code, 200)
+    
+    def test_piano_inesistente(self):
+        risposta = self.client.post('/api/piani/sconosciuto/lotti', json=self.lotto)
+        self.assertEqual(risposta.status_code, 404)
+
+
+class TestLavoriApi(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = app.test_client()
+    
+    def _attendi(self, id_lavoro):
+        for _ in range(500):
+            stato = self.client.get(f'/api/jobs/{id_lavoro}').get_json()
+            if stato['stato'] in ('completato', 'annullato', 'errore'):
+                return stato
+            time.sleep(0.01)
+        self.fail(f"Il lavoro {id_lavoro} non è terminato")
+    
+    def test_lavoro_scenari(self):
+        risposta = self.client.post('/api/jobs', json={'tipo': 'scenari', 'n_scenari': 300, 'seed': 3, 'dimensione_chunk': 100})
+        self.assertEqual(risposta.status_code, 202)
+        
+        stato = self._attendi(risposta.get_json()['id'])
+        self.assertEqual(stato['stato'], 'completato')
+        self.assertEqual(stato['avanzamento'], 1.0)
+        self.assertEqual(stato['risultato']['n_scenari'], 300)
+    
+    def test_lavoro_non_valido(self):
+        risposta = self.client.post('/api/jobs', json={'tipo': 'scenari', 'n_scenari': 0})
+        self.assertEqual(risposta.status_code, 400)
+        for campo, valore in (('worker', modulo_app.MAX_WORKER_LAVORO + 1), ('dimensione_chunk', 10 ** 9)):
+            risposta = self.client.post('/api/jobs', json={'tipo': 'scenari', 'n_scenari': 10, campo: valore})
+            self.assertEqual(risposta.status_code, 400)
+        self.assertEqual(self.client.delete('/api/jobs/inesistente').status_code, 404)
+
+
+class TestSweepApi(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = app.test_client()
+        self.base = {
+            'quantita_giacche': '50',
+            'quantita_tshirt': '150',
+            'quantita_felpe': '100',
+            'quantita_pantaloni': '80',
+            'coeff_linea_a': '0.95',
+            'coeff_linea_b': '1.10',
+            'coeff_linea_c': '1.05',
+            'coeff_linea_d': '1.25'
+        }
+    
+    def test_sweep_griglia(self):
+        risposta = self.client.post('/api/sweep', json={
+            'base': self.base,
+            'dimensioni': {'coeff_linea_a': [0.8, 0.9, 1.0], 'quantita_tshirt': [100, 200]}
+        })
+        risultato = risposta.get_json()
+        
+        self.assertEqual(risposta.status_code, 200)
+        self.assertEqual(risultato['n_punti'], 6)
+        self.assertEqual(len(risultato['colonne']['durata_lotto_ore']), 6)
+    
+    def test_sweep_parametro_non_valido(self):
+        risposta = self.client.post('/api/sweep', json={'base': self.base, 'dimensioni': {'ore': [1, 2]}})
+        self.assertEqual(risposta.status_code, 400)
+
+
+class TestCapacitaApi(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = app.test_client()
+        self.richiesta = {
+            'coeff_linea_a': '0.95',
+            'coeff_linea_b': '1.10',
+            'coeff_linea_c': '1.05',
+            'coeff_linea_d': '1.25',
+            'seed': 3,
+            'scadenza_giorni': 10,
+            'mix': {'giacche': 1, 'tshirt': 3, 'felpe': 2, 'pantaloni': 2},
+            'minimi': {'giacche': 20}
+        }
+    
+    def test_quantita_massime(self):
+        risposta = self.client.post('/api/capacita', json=self.richiesta)
+        self.assertEqual(risposta.status_code, 200)
+        
+        dati = risposta.get_json()
+        self.assertTrue(dati['fattibile'])
+        self.assertEqual(dati['scadenza_ore'], 240)
+        self.assertLessEqual(dati['durata_lotto_ore'], 240)
+        self.assertGreaterEqual(dati['quantita']['giacche'], 20)
+        self.assertEqual(sum(dati['quantita'].values()), dati['totale_capi'])
+    
+    def test_coefficienti_convertiti_dallo_schema(self):
+        # I coefficienti testuali sono convertiti dallo schema come quelli numerici
+        numerici = dict(self.richiesta, coeff_linea_a=0.95, coeff_linea_b=1.1, coeff_linea_c=1.05, coeff_linea_d=1.25)
+        testuali = dict(self.richiesta, coeff_linea_a=' 0.95 ', coeff_linea_b='+1.1', coeff_linea_c='1.05', coeff_linea_d='1.25')
+        
+        atteso = self.client.post('/api/capacita', json=numerici).get_json()
+        self.assertEqual(self.client.post('/api/capacita', json=testuali).get_json(), atteso)
+    
+    def test_richiesta_non_valida(self):
+        richiesta = dict(self.richiesta, scadenza_ore=100, mix={'cappotti': 1})
+        risposta = self.client.post('/api/capacita', json=richiesta)
+        self.assertEqual(risposta.status_code, 400)
+        self.assertEqual(len(risposta.get_json()['errore']), 2)
+    
+    def test_scadenza_e_mix_fuori_limite(self):
+        fuori_limite = [
+            {'scadenza_giorni': 1e308},
+            {'scadenza_giorni': 10 ** 6},
+            {'mix': {'giacche': 1e308, 'tshirt': 1e308}},
+            {'minimi': {'felpe': 10 ** 400}}
+        ]
+        for modifiche in fuori_limite:
+            risposta = self.client.post('/api/capacita', json=dict(self.richiesta, **modifiche))
+            self.assertEqual(risposta.status_code, 400)
+            self.assertIn('errore', risposta.get_json())
+
+
+class TestArchivioApi(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = app.test_client()
+        self.archivio_precedente = modulo_app.ARCHIVIO
+        modulo_app.ARCHIVIO = ArchivioScenari(':memory:')
+        self.scenario = {
+            'quantita_giacche': '100',
+            'quantita_tshirt': '200',
+            'quantita_felpe': '150',
+            'quantita_pantaloni': '120',
+            'coeff_linea_a': '1.2',
+            'coeff_linea_b': '1.1',
+            'coeff_linea_c': '1.0',
+            'coeff_linea_d': '0.8',
+            'seed': 7
+        }
+    
+    def tearDown(self):
+        modulo_app.ARCHIVIO.chiudi()
+        modulo_app.ARCHIVIO = self.archivio_precedente
+    
+    def test_simulazione_archiviata_e_riusata(self):
+        prima = self.client.post('/api/simula', json=self.scenario).get_json()
+        seconda = self.client.post('/api/simula', json=self.scenario).get_json()
+        self.assertEqual(prima, seconda)
+        self.assertEqual(len(modulo_app.ARCHIVIO), 1)
+        
+        risposta = self.client.get('/api/scenari?linea=d&coefficiente_massimo=0.89&durata_minima_ore=1')
+        self.assertEqual(risposta.status_code, 200)
+        self.assertEqual(risposta.get_json()['n_scenari'], 1)
+        self.assertEqual(risposta.get_json()['scenari'][0]['seed'], 7)
+    
+    def test_nessuna_scrittura_con_304(self):
+        # Con gli eventi la simulazione è sempre ricalcolata e archiviata, ma non se la risposta è un 304
+        scritture = []
+        inserisci_molti = modulo_app.ARCHIVIO.inserisci_molti
+        modulo_app.ARCHIVIO.inserisci_molti = lambda record: scritture.append(len(record)) or inserisci_molti(record)
+        scenario = dict(self.scenario, eventi={'turni': [[6, 14]]})
+        
+        risposta = self.client.post('/api/simula', json=scenario)
+        self.assertEqual(scritture, [1])
+        ripetuta = self.client.post('/api/simula', json=scenario, headers={'If-None-Match': risposta.headers['ETag']})
+        self.assertEqual(ripetuta.status_code, 304)
+        self.assertEqual(scritture, [1])
+        self.assertEqual(len(modulo_app.ARCHIVIO), 1)
+    
+    def test_batch_archiviato(self):
+        scenari = [dict(self.scenario, seed=seed) for seed in range(5)]
+        risposta = self.client.post('/api/simula/batch', json={'scenari': scenari})
+        self.assertEqual(len(risposta.get_data(as_text=True).splitlines()), 5)
+        self.assertEqual(len(modulo_app.ARCHIVIO), 5)
+    
+    def test_archivio_bloccato_non_fa_fallire_la_simulazione(self):
+        class ArchivioBloccato(ArchivioScenari):
+            def inserisci_molti(self, record, dimensione_transazione=1000):
+                raise sqlite3.OperationalError('database is locked')
+        
+        modulo_app.ARCHIVIO.chiudi()
+        modulo_app.ARCHIVIO = ArchivioBloccato(':memory:')
+        with self.assertLogs(app.logger, 'ERROR'):
+            risposta = self.client.post('/api/simula', json=self.scenario)
+        self.assertEqual(risposta.status_code, 200)
+        self.assertIn('durata_lotto_ore', risposta.get_json())
+    
+    def test_ricerca_non_valida(self):
+        risposta = self.client.get('/api/scenari?linea=z&durata_minima_ore=abc')
+        self.assertEqual(risposta.status_code, 400)
+        self.assertEqual(len(risposta.get_json()['errore']), 2)
+
+
+class TestRisposteApi(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = app.test_client()
+        self.scenario = {
+            'quantita_giacche': '50',
+            'quantita_tshirt': '150',
+            'quantita_felpe': '100',
+            'quantita_pantaloni': '80',
+            'coeff_linea_a': '0.95',
+            'coeff_linea_b': '1.10',
+            'coeff_linea_c': '1.05',
+            'coeff_linea_d': '1.25',
+            'seed': 1
+        }
+    
+    def test_richiesta_ripetuta_304(self):
+        risposta = self.client.post('/api/simula', json=self.scenario)
+        etag = risposta.headers['ETag']
+        
+        ripetuta = self.client.post('/api/simula', json=self.scenario, headers={'If-None-Match': etag})
+        self.assertEqual(ripetuta.status_code, 304)
+        self.assertEqual(ripetuta.data, b'')
+        
+        diversa = self.client.post('/api/simula', json=dict(self.scenario, seed=2), headers={'If-None-Match': etag})
+        self.assertEqual(diversa.status_code, 200)
+    
+    def test_nessun_304_per_le_post_con_effetti(self):
+        id_piano = self.client.post('/api/piani', json=self.scenario).get_json()['id']
+        url = f"/api/piani/{id_piano}/avanza"
+        prima = self.client.post(url, json={'tempo_ore': 0})
+        
+        # L'operazione viene eseguita di nuovo e la risposta è completa anche con lo stesso ETag
+        ripetuta = self.client.post(url, json={'tempo_ore': 0}, headers={'If-None-Match': prima.headers['ETag']})
+        self.assertEqual(ripetuta.status_code, 200)
+        self.assertEqual(ripetuta.get_json(), prima.get_json())
+        
+        # Le letture ripetute ricevono ancora 304
+        stato = self.client.get(f"/api/piani/{id_piano}")
+        ripetuto = self.client.get(f"/api/piani/{id_piano}", headers={'If-None-Match': stato.headers['ETag']})
+        self.assertEqual(ripetuto.status_code, 304)
+    
+    def test_sweep_compresso_e_compatto(self):
+        richiesta = {
+            'base': self.scenario,
+            'seed': 1,
+            'dimensioni': {'quantita_giacche': list(range(30, 120)), 'coeff_linea_a': [0.8, 0.9, 1.0]}
+        }
+        semplice = self.client.post('/api/sweep', json=richiesta)
+        compresso = self.client.post('/api/sweep?formato=compatto', json=richiesta, headers={'Accept-Encoding': 'gzip'})
+        
+        self.assertEqual(compresso.headers['Content-Encoding'], 'gzip')
+        self.assertLess(len(compresso.data), len(semplice.data) / 5)
+        dati = json.loads(gzip.decompress(compresso.data))
+        self.assertEqual(dati['colonne']['durata_lotto_ore'], semplice.get_json()['colonne']['durata_lotto_ore'])
+    
+    def test_batch_compresso(self):
+        scenari = [dict(self.scenario, seed=seed) for seed in range(20)]
+        risposta = self.client.post('/api/simula/batch', json={'scenari': scenari}, headers={'Accept-Encoding': 'gzip'})
+        righe = gzip.decompress(risposta.data).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(riga)['indice'] for riga in righe], list(range(20)))
+
+
+class TestProntezza(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = app.test_client()
+    
+    def tearDown(self):
+        modulo_app.STATO_PROCESSO.update(pronto=True, worker=1)
+    
+    def test_pronto_e_arresto(self):
+        risposta = self.client.get('/pronto')
+        self.assertEqual(risposta.status_code, 200)
+        self.assertTrue(risposta.get_json()['pronto'])
+        
+        modulo_app.STATO_PROCESSO['pronto'] = False
+        self.assertEqual(self.client.get('/pronto').status_code, 503)
+    
+    def test_route_con_stato_disattivate_con_piu_worker(self):
+        modulo_app.STATO_PROCESSO['worker'] = 3
+        self.assertEqual(self.client.post('/api/piani', json={}).status_code, 503)
+        self.assertEqual(self.client.get('/api/jobs').status_code, 503)
+        self.assertEqual(self.client.get('/metrics').headers['X-Worker-Pid'], str(os.getpid()))
+        
+        modulo_app.STATO_PROCESSO['worker'] = 1
+        self.assertEqual(self.client.get('/api/jobs').status_code, 200)
+
+
+class TestStocasticoApi(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = app.test_client()
+        self.scenario = {
+            'quantita_giacche': '50',
+            'quantita_tshirt': '150',
+            'quantita_felpe': '100',
+            'quantita_pantaloni': '80',
+            'coeff_linea_a': '0.95',
+            'coeff_linea_b': '1.10',
+            'coeff_linea_c': '1.05',
+            'coeff_linea_d': '1.25',
+            'seed': 1
+        }
+    
+    def test_distribuzione_durata(self):
+        data = self.client.post('/api/simula', json=dict(self.scenario, stocastico=True)).get_json()
+        percentili = data['stocastico']['percentili_ore']
+        self.assertLess(percentili['P50'], percentili['P90'])
+        self.assertEqual(len(data['stocastico']['linee']), 4)
+        
+        self.assertNotIn('stocastico', self.client.post('/api/simula', json=self.scenario).get_json())
+        frazionato = self.client.post('/api/simula', json=dict(self.scenario, stocastico=True, frazionato=True))
+        self.assertEqual(frazionato.status_code, 400)
+
+
 if __name__ == '__main__':
     unittest.main()
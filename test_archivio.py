@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from catalogo import catalogo_predefinito
+from produzione import assegna_linee_a_prodotti, calcola_tempo_produzione_lotto
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+from archivio import ArchivioScenari, archivia_scenari, crea_record
+
+
+# Un processo che archivia uno scenario per transazione, in concorrenza con gli altri
+def _archivia_in_processo(percorso: str, primo_seed: int, n_scenari: int) -> int:
+    archivio = ArchivioScenari(percorso)
+    prodotti = catalogo_predefinito().prodotti
+    inseriti = sum(archivia_scenari(prodotti, 1, archivio, seed=seed) for seed in range(primo_seed, primo_seed + n_scenari))
+    archivio.chiudi()
+    return inseriti
+
+
+class TestArchivioScenari(unittest.TestCase):
+    
+    def setUp(self):
+        self.archivio = ArchivioScenari(':memory:')
+        self.prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+        self.tempo_per_unita = dict(zip(self.prodotti, (5.0, 1.0, 2.5, 3.0)))
+    
+    def tearDown(self):
+        self.archivio.chiudi()
+    
+    def _risultati(self, quantita, coefficienti):
+        impianto = Impianto([LineaProduttiva(nome, c) for nome, c in zip('ABCD', coefficienti)])
+        quantita = dict(zip(self.prodotti, quantita))
+        assegnazioni = assegna_linee_a_prodotti(self.prodotti, quantita, self.tempo_per_unita, impianto)
+        return calcola_tempo_produzione_lotto(quantita, self.tempo_per_unita, assegnazioni), impianto
+    
+    def test_ricerca_per_linea_coefficiente_e_durata(self):
+        lento, impianto_lento = self._risultati((100, 200, 150, 120), (1.2, 1.1, 1.0, 0.8))
+        veloce, impianto_veloce = self._risultati((30, 100, 65, 50), (1.2, 1.1, 1.0, 1.25))
+        self.archivio.inserisci_molti([crea_record(lento, impianto_lento), crea_record(veloce, impianto_veloce)])
+        
+        trovati = self.archivio.cerca(linea='D', coefficiente_massimo=0.89, durata_minima_ore=120)
+        self.assertEqual(len(trovati), 1)
+        self.assertEqual(trovati[0]['durata_lotto_ore'], lento['durata_lotto_ore'])
+        self.assertEqual({linea['linea']: linea['coefficiente'] for linea in trovati[0]['linee']}['D'], 0.8)
+        
+        self.assertEqual(len(self.archivio.cerca(prodotto='Giacche Invernali', quantita_massima=50)), 1)
+        self.assertEqual(len(self.archivio.cerca()), 2)
+        with self.assertRaises(ValueError):
+            self.archivio.cerca(coefficiente_massimo=0.9)
+    
+    def test_scenari_ripetuti_non_duplicati_e_risposta_riusata(self):
+        risultati, impianto = self._risultati((50, 150, 100, 80), (0.95, 1.1, 1.05, 1.25))
+        self.assertEqual(self.archivio.salva(risultati, impianto, risposta={'durata_lotto_ore': 1.0}), 1)
+        self.assertEqual(self.archivio.salva(risultati, impianto), 0)
+        self.assertEqual(len(self.archivio), 1)
+        
+        salvata = self.archivio.risultato_salvato(risultati['quantita'], self.tempo_per_unita, impianto)
+        self.assertEqual(salvata, {'durata_lotto_ore': 1.0})
+        self.assertIsNone(self.archivio.risultato_salvato(risultati['quantita'], self.tempo_per_unita, impianto, 'frazionato'))
+    
+    def test_archiviazione_massiva(self):
+        prodotti = catalogo_predefinito().prodotti
+        self.assertEqual(archivia_scenari(prodotti, 250, self.archivio, seed=1), 250)
+        self.assertEqual(archivia_scenari(prodotti, 300, self.archivio, seed=1), 50)
+        
+        statistiche = self.archivio.statistiche()
+        self.assertEqual(statistiche['scenari'], 300)
+        lunghi = self.archivio.cerca(durata_minima_ore=statistiche['durata_massima_ore'])
+        self.assertEqual(lunghi[0]['durata_lotto_ore'], statistiche['durata_massima_ore'])
+
+    
+    def test_scritture_concorrenti_da_piu_processi(self):
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, 'scenari.db')
+            ArchivioScenari(percorso).chiudi()
+            with ProcessPoolExecutor(max_workers=4) as executor:
+                inseriti = list(executor.map(_archivia_in_processo, [percorso] * 4, range(0, 400, 100), [100] * 4))
+            
+            archivio = ArchivioScenari(percorso)
+            self.assertEqual(sum(inseriti), len(archivio))
+            self.assertEqual(len(archivio), 400)
+            archivio.chiudi()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import itertools
+import unittest
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+from produzione import assegna_linee_a_prodotti, calcola_tempo_produzione_lotto
+from assegnazione import matrice_costi, calcola_makespan, assegna_linee, confronta_con_greedy, _abbinamento_completo, _assegna_esatta
+
+
+class TestAssegnazioneOttima(unittest.TestCase):
+    
+    def setUp(self):
+        self.prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+        self.quantita = {
+            self.prodotti[0]: 50,
+            self.prodotti[1]: 150,
+            self.prodotti[2]: 100,
+            self.prodotti[3]: 80
+        }
+        self.tempo_per_unita = {
+            self.prodotti[0]: 5.0,
+            self.prodotti[1]: 1.0,
+            self.prodotti[2]: 2.5,
+            self.prodotti[3]: 3.0
+        }
+        linee = [
+            LineaProduttiva('A', 0.8),
+            LineaProduttiva('B', 1.0),
+            LineaProduttiva('C', 1.1),
+            LineaProduttiva('D', 1.3)
+        ]
+        self.impianto = Impianto(linee)
+    
+    def test_esatto_uguale_a_forza_bruta(self):
+        costi = matrice_costi(self.prodotti, self.quantita, self.tempo_per_unita, self.impianto.linee)
+        ottimo = min(calcola_makespan(costi, list(perm)) for perm in itertools.permutations(range(4)))
+        
+        risultato = confronta_con_greedy(self.prodotti, self.quantita, self.tempo_per_unita, self.impianto)
+        self.assertEqual(risultato['durata_lotto_ore'], ottimo)
+        self.assertGreaterEqual(risultato['miglioramento_ore'], 0)
+    
+    def test_metodo_da_produzione(self):
+        # Il metodo esatto è selezionabile da assegna_linee_a_prodotti e produce un lotto coerente
+        assegnazioni = assegna_linee_a_prodotti(
+            self.prodotti, self.quantita, self.tempo_per_unita, self.impianto, metodo='esatto'
+        )
+        risultati = calcola_tempo_produzione_lotto(self.quantita, self.tempo_per_unita, assegnazioni)
+        
+        self.assertEqual(len(set(assegnazioni.values())), 4)
+        self.assertEqual(
+            risultati['durata_lotto_ore'],
+            confronta_con_greedy(self.prodotti, self.quantita, self.tempo_per_unita, self.impianto)['durata_lotto_ore']
+        )
+    
+    def test_euristico_con_piu_prodotti_che_linee(self):
+        # Con due linee i quattro prodotti condividono le linee in sequenza
+        impianto = Impianto([LineaProduttiva('A', 1.0), LineaProduttiva('B', 1.2)])
+        assegnazioni = assegna_linee(self.prodotti, self.quantita, self.tempo_per_unita, impianto, 'euristico')
+        risultati = calcola_tempo_produzione_lotto(self.quantita, self.tempo_per_unita, assegnazioni)
+        
+        carico_totale = sum(r['ore_totali'] for r in risultati['risultati_per_prodotto'].values())
+        self.assertEqual(len(assegnazioni), 4)
+        self.assertLess(risultati['durata_lotto_ore'], carico_totale)
+    
+    def test_esatto_con_piu_prodotti_che_linee(self):
+        # Con due linee più prodotti condividono una linea: il risultato coincide con la forza bruta
+        impianto = Impianto([LineaProduttiva('A', 1.0), LineaProduttiva('B', 1.2)])
+        costi = matrice_costi(self.prodotti, self.quantita, self.tempo_per_unita, impianto.linee)
+        ottimo = min(calcola_makespan(costi, list(indici)) for indici in itertools.product(range(2), repeat=4))
+        
+        risultato = confronta_con_greedy(self.prodotti, self.quantita, self.tempo_per_unita, impianto)
+        self.assertEqual(risultato['durata_lotto_ore'], ottimo)
+        self.assertEqual(risultato['riferimento'], 'euristico')
+        self.assertGreaterEqual(risultato['miglioramento_ore'], 0)
+    
+    def test_esatto_oltre_il_limite_di_nodi(self):
+        prodotti = self.prodotti * 5
+        quantita = {prodotto: self.quantita[prodotto] for prodotto in self.prodotti}
+        impianto = Impianto([LineaProduttiva('A', 1.0), LineaProduttiva('B', 1.2), LineaProduttiva('C', 0.9)])
+        with self.assertRaises(ValueError):
+            _assegna_esatta(prodotti, quantita, self.tempo_per_unita, impianto.linee, max_nodi=5)
+    
+    def test_cammino_aumentante_lungo(self):
+        # Il prodotto p può andare sulle linee p e p + 1 e l'ultimo solo sulla linea 0: ogni prodotto
+        # prende la linea p, e per l'ultimo il cammino aumentante attraversa tutti i precedenti
+        n = 2000
+        costi = [[1.0 if l in (p, p + 1) else 9.0 for l in range(n)] for p in range(n - 1)]
+        costi.append([1.0] + [9.0] * (n - 1))
+        
+        abbinamento = _abbinamento_completo(costi, n, 1.0)
+        self.assertEqual(abbinamento, list(range(1, n)) + [0])
+    
+    def test_metodo_sconosciuto(self):
+        with self.assertRaises(ValueError):
+            assegna_linee(self.prodotti, self.quantita, self.tempo_per_unita, self.impianto, 'casuale')
+
+
+if __name__ == '__main__':
+    unittest.main()
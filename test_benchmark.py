@@ -0,0 +1,20 @@
+import unittest
+from benchmark import confronta_con_baseline, misura
+
+
+class TestBenchmark(unittest.TestCase):
+    
+    def test_regressione_oltre_soglia(self):
+        baseline = {'a': 1.0, 'b': 1.0}
+        risultati = {'a': 1.2, 'b': 1.5, 'nuovo': 3.0}
+        
+        regressioni = confronta_con_baseline(risultati, baseline, soglia=0.25)
+        self.assertEqual(regressioni, [('b', 1.0, 1.5)])
+    
+    def test_misura_positiva(self):
+        secondi = misura(lambda: sum(range(100)), ripetizioni=2, durata_minima=0.001)
+        self.assertGreater(secondi, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import threading
+import unittest
+from models import GiaccaInvernale, TShirt, LineaProduttiva, Impianto
+from cache import CacheLRU, chiave_simulazione
+
+
+class OrologioFinto:
+    
+    def __init__(self):
+        self.adesso = 0.0
+    
+    def __call__(self) -> float:
+        return self.adesso
+
+
+class TestCacheLRU(unittest.TestCase):
+    
+    def setUp(self):
+        self.orologio = OrologioFinto()
+        self.cache = CacheLRU(dimensione_massima=2, ttl_secondi=10, orologio=self.orologio)
+    
+    def test_hit_e_miss(self):
+        self.assertEqual(self.cache.ottieni_o_calcola('a', lambda: 1), 1)
+        self.assertEqual(self.cache.ottieni_o_calcola('a', lambda: 2), 1)
+        
+        statistiche = self.cache.statistiche()
+        self.assertEqual(statistiche['hit'], 1)
+        self.assertEqual(statistiche['miss'], 1)
+    
+    def test_rimozione_meno_recente(self):
+        self.cache.ottieni_o_calcola('a', lambda: 1)
+        self.cache.ottieni_o_calcola('b', lambda: 2)
+        self.cache.ottieni_o_calcola('a', lambda: 1)
+        self.cache.ottieni_o_calcola('c', lambda: 3)
+        
+        # 'b' era il meno recente ed è stato rimosso
+        self.assertEqual(self.cache.ottieni_o_calcola('b', lambda: 20), 20)
+        self.assertEqual(self.cache.statistiche()['rimozioni'], 2)
+    
+    def test_scadenza_ttl(self):
+        self.cache.ottieni_o_calcola('a', lambda: 1)
+        self.orologio.adesso = 11
+        
+        self.assertEqual(self.cache.ottieni_o_calcola('a', lambda: 2), 2)
+        self.assertEqual(self.cache.statistiche()['scadenze'], 1)
+    
+    def test_accesso_concorrente(self):
+        cache = CacheLRU(dimensione_massima=50)
+        
+        def lavora(offset):
+            for i in range(500):
+                cache.ottieni_o_calcola((offset + i) % 80, lambda: i)
+        
+        thread = [threading.Thread(target=lavora, args=(n,)) for n in range(8)]
+        for t in thread:
+            t.start()
+        for t in thread:
+            t.join()
+        
+        statistiche = cache.statistiche()
+        self.assertEqual(statistiche['hit'] + statistiche['miss'], 4000)
+        self.assertLessEqual(len(cache), 50)
+
+
+class TestChiaveSimulazione(unittest.TestCase):
+    
+    def test_chiave_normalizzata(self):
+        giacca, tshirt = GiaccaInvernale(), TShirt()
+        impianto = Impianto([LineaProduttiva('A', 1), LineaProduttiva('B', 1.2)])
+        
+        prima = chiave_simulazione({giacca: 50, tshirt: 100}, {giacca: 4, tshirt: 1.0}, impianto)
+        seconda = chiave_simulazione({giacca: 50, tshirt: 100}, {giacca: 4.0, tshirt: 1}, impianto)
+        self.assertEqual(prima, seconda)
+        self.assertEqual(hash(prima), hash(seconda))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+from produzione import assegna_linee_a_prodotti, calcola_tempo_produzione_lotto
+from capacita import quantita_massime
+
+
+class TestQuantitaMassime(unittest.TestCase):
+    
+    def setUp(self):
+        self.prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+        # Tempi che sulle linee danno tempi effettivi non multipli del minuto
+        self.tempo_per_unita = {
+            self.prodotti[0]: 5.13,
+            self.prodotti[1]: 0.97,
+            self.prodotti[2]: 2.51,
+            self.prodotti[3]: 3.07
+        }
+        self.impianto = Impianto([
+            LineaProduttiva('A', 0.83),
+            LineaProduttiva('B', 1.07),
+            LineaProduttiva('C', 1.19),
+            LineaProduttiva('D', 0.91)
+        ])
+        self.mix = {self.prodotti[0]: 1, self.prodotti[1]: 3, self.prodotti[2]: 2, self.prodotti[3]: 2}
+    
+    def _durata(self, quantita):
+        assegnazioni = assegna_linee_a_prodotti(self.prodotti, quantita, self.tempo_per_unita, self.impianto)
+        return calcola_tempo_produzione_lotto(quantita, self.tempo_per_unita, assegnazioni)['durata_lotto_ore']
+    
+    def test_quantita_massime_nel_mix(self):
+        risultato = quantita_massime(self.prodotti, self.tempo_per_unita, self.impianto, 240, mix=self.mix)
+        
+        self.assertTrue(risultato['fattibile'])
+        self.assertLessEqual(risultato['durata_lotto_ore'], 240)
+        self.assertEqual(risultato['durata_lotto_ore'], self._durata(risultato['quantita']))
+        
+        # Il livello successivo del mix supera la scadenza
+        livello = risultato['livello']
+        successivo = {prodotto: int((livello + 1) * peso / 8) for prodotto, peso in self.mix.items()}
+        if successivo != risultato['quantita']:
+            self.assertGreater(self._durata(successivo), 240)
+        
+        basso, alto = risultato['limiti_livello']
+        self.assertTrue(basso <= livello < alto)
+    
+    def test_minimi_rispettati(self):
+        minimi = {self.prodotti[0]: 30, self.prodotti[2]: 40}
+        risultato = quantita_massime(self.prodotti, self.tempo_per_unita, self.impianto, 300, minimi=minimi)
+        
+        self.assertTrue(risultato['fattibile'])
+        self.assertGreaterEqual(risultato['quantita'][self.prodotti[0]], 30)
+        self.assertGreaterEqual(risultato['quantita'][self.prodotti[2]], 40)
+        self.assertLessEqual(risultato['durata_lotto_ore'], 300)
+    
+    def test_minimi_non_fattibili(self):
+        minimi = {self.prodotti[0]: 500}
+        risultato = quantita_massime(self.prodotti, self.tempo_per_unita, self.impianto, 24, minimi=minimi)
+        
+        self.assertFalse(risultato['fattibile'])
+        self.assertLess(risultato['margine_ore'], 0)
+    
+    def test_parametri_non_validi(self):
+        with self.assertRaises(ValueError):
+            quantita_massime(self.prodotti, self.tempo_per_unita, self.impianto, 0)
+        with self.assertRaises(ValueError):
+            quantita_massime(self.prodotti, self.tempo_per_unita, self.impianto, 100, mix={self.prodotti[0]: 0})
+        for scadenza in (float('inf'), float('nan'), 1e308):
+            with self.assertRaises(ValueError):
+                quantita_massime(self.prodotti, self.tempo_per_unita, self.impianto, scadenza)
+        with self.assertRaises(ValueError):
+            quantita_massime(self.prodotti, self.tempo_per_unita, self.impianto, 100, mix={self.prodotti[0]: float('nan')})
+    
+    def test_pesi_del_mix_molto_grandi(self):
+        # Pesi vicini al massimo dei float danno le stesse quote del mix equivalente
+        enormi = quantita_massime(self.prodotti, self.tempo_per_unita, self.impianto, 100,
+                                  mix={self.prodotti[0]: 1e308, self.prodotti[1]: 1e308})
+        uguali = quantita_massime(self.prodotti, self.tempo_per_unita, self.impianto, 100,
+                                  mix={self.prodotti[0]: 1, self.prodotti[1]: 1})
+        self.assertEqual(enormi['quantita'], uguali['quantita'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import random
+import tempfile
+import unittest
+from catalogo import Catalogo, catalogo_predefinito
+from produzione import (
+    genera_quantita_produzione,
+    genera_parametri_configurabili,
+    assegna_linee_a_prodotti,
+    calcola_tempo_produzione_lotto,
+)
+
+
+class TestCatalogo(unittest.TestCase):
+    
+    def test_catalogo_predefinito(self):
+        catalogo = catalogo_predefinito()
+        
+        self.assertEqual(catalogo.numero_prodotti, 4)
+        self.assertEqual(catalogo.numero_linee, 4)
+        self.assertEqual(catalogo.prodotto('giacche').nome, 'Giacche Invernali')
+        self.assertEqual(catalogo.prodotto('tshirt').range_quantita_produzione, (100, 250))
+        self.assertEqual(catalogo.linea('d').range_coefficiente, (1.0, 1.3))
+        self.assertEqual(catalogo.linea('a').campo_coefficiente, 'coeff_linea_a')
+    
+    def test_id_duplicati(self):
+        dati = {
+            'prodotti': [
+                {'id': 'x', 'nome': 'X', 'range_tempo_produzione': [1, 2], 'range_quantita_produzione': [1, 2]},
+                {'id': 'x', 'nome': 'Y', 'range_tempo_produzione': [1, 2], 'range_quantita_produzione': [1, 2]}
+            ],
+            'linee': [{'id': 'a', 'nome': 'A', 'range_coefficiente': [0.9, 1.1]}]
+        }
+        with self.assertRaises(ValueError):
+            Catalogo.da_dizionario(dati)
+    
+    def test_catalogo_toml_con_molte_linee(self):
+        # Un impianto diverso gira sulla stessa pipeline senza modifiche al codice
+        righe = []
+        for i in range(6):
+            righe += [
+                '[[prodotti]]', f'id = "art{i}"', f'nome = "Articolo {i}"',
+                'range_tempo_produzione = [1.0, 2.0]', 'range_quantita_produzione = [10, 20]'
+            ]
+        for i in range(8):
+            righe += ['[[linee]]', f'id = "l{i}"', f'nome = "L{i}"', 'range_coefficiente = [0.8, 1.2]']
+        
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, 'catalogo.toml')
+            with open(percorso, 'w', encoding='utf-8') as file:
+                file.write('\n'.join(righe))
+            catalogo = Catalogo.da_file(percorso)
+        
+        rng = random.Random(3)
+        quantita = genera_quantita_produzione(catalogo.prodotti, rng)
+        tempo_per_unita, impianto = genera_parametri_configurabili(catalogo.prodotti, rng, catalogo)
+        assegnazioni = assegna_linee_a_prodotti(catalogo.prodotti, quantita, tempo_per_unita, impianto)
+        risultati = calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni)
+        
+        self.assertEqual(impianto.numero_linee, 8)
+        self.assertEqual(len(risultati['risultati_per_prodotto']), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
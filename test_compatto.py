@@ -0,0 +1,108 @@
+import tracemalloc
+import unittest
+from benchmark import _scenario
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+from produzione import assegna_linee_a_prodotti, calcola_tempo_produzione_lotto
+from compatto import ScenarioCompatto, assegna_linee_compatto, calcola_tempo_produzione_lotto_compatto
+
+
+class TestRappresentazioneCompatta(unittest.TestCase):
+    
+    def setUp(self):
+        self.prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+        self.quantita = {
+            self.prodotti[0]: 50,
+            self.prodotti[1]: 150,
+            self.prodotti[2]: 100,
+            self.prodotti[3]: 80
+        }
+        self.tempo_per_unita = {
+            self.prodotti[0]: 5.0,
+            self.prodotti[1]: 1.0,
+            self.prodotti[2]: 2.5,
+            self.prodotti[3]: 3.0
+        }
+        self.impianto = Impianto([
+            LineaProduttiva('A', 0.8),
+            LineaProduttiva('B', 1.0),
+            LineaProduttiva('C', 1.1),
+            LineaProduttiva('D', 1.3)
+        ])
+    
+    def test_conversione_uguale_al_calcolo_a_dizionari(self):
+        assegnazioni = assegna_linee_a_prodotti(
+            self.prodotti, self.quantita, self.tempo_per_unita, self.impianto
+        )
+        atteso = calcola_tempo_produzione_lotto(self.quantita, self.tempo_per_unita, assegnazioni)
+        
+        scenario = ScenarioCompatto.da_dizionari(self.quantita, self.tempo_per_unita, self.impianto)
+        risultati = calcola_tempo_produzione_lotto_compatto(scenario).in_dizionario()
+        
+        self.assertEqual(risultati['assegnazioni_linee'], atteso['assegnazioni_linee'])
+        self.assertEqual(risultati['risultati_per_prodotto'], atteso['risultati_per_prodotto'])
+        self.assertEqual(risultati['durata_lotto_ore'], atteso['durata_lotto_ore'])
+        self.assertEqual(risultati['capacita_giornaliera_complessiva'], atteso['capacita_giornaliera_complessiva'])
+    
+    def test_riutilizzo_array_risultati(self):
+        scenario = ScenarioCompatto.da_dizionari(self.quantita, self.tempo_per_unita, self.impianto)
+        risultati = calcola_tempo_produzione_lotto_compatto(scenario)
+        ore_totali = risultati.ore_totali
+        
+        scenario.quantita[0] = 120
+        secondi = calcola_tempo_produzione_lotto_compatto(scenario, risultati=risultati)
+        
+        self.assertIs(secondi, risultati)
+        self.assertIs(secondi.ore_totali, ore_totali)
+        self.assertEqual(secondi.ore_totali[0], round(120 * secondi.tempo_effettivo[0], 2))
+
+    
+    def test_calcolo_da_produzione(self):
+        # calcola_tempo_produzione_lotto accetta direttamente lo scenario compatto
+        scenario = ScenarioCompatto.da_dizionari(self.quantita, self.tempo_per_unita, self.impianto)
+        risultati = calcola_tempo_produzione_lotto(scenario, None, None)
+        atteso = calcola_tempo_produzione_lotto_compatto(scenario)
+        
+        self.assertEqual(risultati.in_dizionario(), atteso.in_dizionario())
+    
+    def test_piu_prodotti_che_linee(self):
+        impianto = Impianto(self.impianto.linee[:2])
+        scenario = ScenarioCompatto.da_dizionari(self.quantita, self.tempo_per_unita, impianto)
+        with self.assertRaises(ValueError):
+            assegna_linee_compatto(scenario)
+    
+    def test_memoria_per_scenario(self):
+        prodotti, quantita, tempo_per_unita, impianto = _scenario(100, 100)
+        assegnazioni = assegna_linee_a_prodotti(prodotti, quantita, tempo_per_unita, impianto)
+        scenario = ScenarioCompatto.da_dizionari(quantita, tempo_per_unita, impianto)
+        risultati = calcola_tempo_produzione_lotto(scenario, None, None)
+        
+        def memoria(calcolo) -> int:
+            tracemalloc.start()
+            try:
+                trattenuto = calcolo()
+                return tracemalloc.get_traced_memory()[0]
+            finally:
+                del trattenuto
+                tracemalloc.stop()
+        
+        dizionari = memoria(lambda: calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni))
+        compatti = memoria(lambda: calcola_tempo_produzione_lotto(
+            ScenarioCompatto.da_dizionari(quantita, tempo_per_unita, impianto), None, None
+        ))
+        riutilizzati = memoria(lambda: calcola_tempo_produzione_lotto(
+            ScenarioCompatto.da_dizionari(quantita, tempo_per_unita, impianto, scenario), None, None,
+            risultati_compatti=risultati
+        ))
+        
+        # Gli array occupano circa metà dei dizionari per prodotto; riutilizzati non allocano quasi nulla
+        self.assertLess(compatti, 0.6 * dizionari)
+        self.assertLess(riutilizzati, dizionari / 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import csv
+import io
+import os
+import tempfile
+import unittest
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+from produzione import assegna_linee_a_prodotti, calcola_tempo_produzione_lotto
+from esportazione import COLONNE, ScrittoreCSV, esporta_scenari
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class TestEsportazione(unittest.TestCase):
+    
+    def setUp(self):
+        self.prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+        quantita = dict(zip(self.prodotti, [50, 150, 100, 80]))
+        tempo_per_unita = dict(zip(self.prodotti, [5.0, 1.0, 2.5, 3.0]))
+        impianto = Impianto([
+            LineaProduttiva('A', 0.8),
+            LineaProduttiva('B', 1.0),
+            LineaProduttiva('C', 1.2),
+            LineaProduttiva('D', 0.9)
+        ])
+        assegnazioni = assegna_linee_a_prodotti(self.prodotti, quantita, tempo_per_unita, impianto)
+        self.risultati = calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni)
+    
+    def test_csv_una_riga_per_prodotto(self):
+        stream = io.StringIO()
+        with ScrittoreCSV(stream) as scrittore:
+            scrittore.scrivi(self.risultati, 0)
+            scrittore.scrivi(self.risultati, 1)
+        
+        righe = list(csv.DictReader(io.StringIO(stream.getvalue())))
+        self.assertEqual(len(righe), 8)
+        self.assertEqual(tuple(righe[0]), COLONNE)
+        self.assertEqual(righe[5]['scenario'], '1')
+        self.assertEqual(float(righe[0]['durata_lotto_ore']), self.risultati['durata_lotto_ore'])
+    
+    @unittest.skipIf(pyarrow is None, "pyarrow non installato")
+    def test_arrow_e_parquet(self):
+        from esportazione import leggi_arrow
+        import pyarrow.parquet as pq
+        
+        with tempfile.TemporaryDirectory() as cartella:
+            arrow = os.path.join(cartella, 'scenari.arrow')
+            parquet = os.path.join(cartella, 'scenari.parquet')
+            csv_scenari = os.path.join(cartella, 'scenari.csv')
+            
+            self.assertEqual(esporta_scenari(self.prodotti, 50, arrow, seed=2), 200)
+            esporta_scenari(self.prodotti, 50, parquet, seed=2)
+            esporta_scenari(self.prodotti, 50, csv_scenari, seed=2)
+            
+            tabella = leggi_arrow(arrow)
+            self.assertEqual(tabella.num_rows, 200)
+            self.assertEqual(tabella.column_names, list(COLONNE))
+            self.assertEqual(pq.read_table(parquet).to_pylist(), tabella.to_pylist())
+            
+            with open(csv_scenari, encoding='utf-8') as file:
+                ore_csv = [float(riga['ore_totali']) for riga in csv.DictReader(file)]
+            self.assertEqual(ore_csv, tabella.column('ore_totali').to_pylist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import random
+import unittest
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+from produzione import (
+    assegna_linee_a_prodotti,
+    calcola_tempo_produzione_lotto,
+    calcola_tempo_produzione_lotto_frazionato,
+)
+from eventi import CalendarioTurni, SimulazioneEventiNonValida, simula_eventi
+
+
+class TestSimulazioneEventi(unittest.TestCase):
+    
+    def setUp(self):
+        self.prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+        self.quantita = {
+            self.prodotti[0]: 50,
+            self.prodotti[1]: 150,
+            self.prodotti[2]: 100,
+            self.prodotti[3]: 80
+        }
+        self.tempo_per_unita = {
+            self.prodotti[0]: 5.0,
+            self.prodotti[1]: 1.0,
+            self.prodotti[2]: 2.5,
+            self.prodotti[3]: 3.0
+        }
+        self.impianto = Impianto([
+            LineaProduttiva('A', 0.8),
+            LineaProduttiva('B', 1.0),
+            LineaProduttiva('C', 1.2)
+        ])
+        assegnazioni = assegna_linee_a_prodotti(
+            self.prodotti, self.quantita, self.tempo_per_unita, self.impianto, 'euristico'
+        )
+        self.risultati = calcola_tempo_produzione_lotto(self.quantita, self.tempo_per_unita, assegnazioni)
+    
+    def test_turno_continuo_come_calcolo_statico(self):
+        eventi = simula_eventi(self.risultati)
+        self.assertEqual(eventi['durata_lotto_ore'], self.risultati['durata_lotto_ore'])
+        
+        frazionato = calcola_tempo_produzione_lotto_frazionato(self.quantita, self.tempo_per_unita, self.impianto)
+        self.assertAlmostEqual(simula_eventi(frazionato)['durata_lotto_ore'], frazionato['durata_lotto_ore'], delta=0.02)
+    
+    def test_turni_allungano_la_durata(self):
+        # Un solo turno di 8 ore: la produzione avanza solo un terzo del tempo
+        eventi = simula_eventi(self.risultati, turni=[(6, 14)])
+        self.assertGreater(eventi['durata_lotto_ore'], 2.5 * self.risultati['durata_lotto_ore'])
+        
+        notturno = simula_eventi(self.risultati, turni=[(22, 24), (0, 6)])
+        self.assertGreater(notturno['durata_lotto_ore'], 2.5 * self.risultati['durata_lotto_ore'])
+    
+    def test_tempo_di_setup(self):
+        eventi = simula_eventi(self.risultati, tempo_setup=2.0)
+        setup = sum(linea['ore_setup'] for linea in eventi['linee'])
+        
+        # Un attrezzaggio per ogni cambio di prodotto sulla stessa linea
+        cambi = len(self.prodotti) - len(eventi['linee'])
+        self.assertAlmostEqual(setup, 2.0 * cambi)
+        self.assertGreaterEqual(eventi['durata_lotto_ore'], self.risultati['durata_lotto_ore'])
+    
+    def test_guasti_riproducibili(self):
+        prima = simula_eventi(self.risultati, mtbf_ore=50, mttr_ore=5, rng=random.Random(7))
+        seconda = simula_eventi(self.risultati, mtbf_ore=50, mttr_ore=5, rng=random.Random(7))
+        
+        self.assertEqual(prima, seconda)
+        self.assertGreater(sum(linea['guasti'] for linea in prima['linee']), 0)
+        self.assertGreater(prima['durata_lotto_ore'], self.risultati['durata_lotto_ore'])
+    
+    def test_parametri_non_finiti_o_fuori_limite(self):
+        for parametri in ({'tempo_setup': float('inf')}, {'tempo_setup': float('nan')}, {'tempo_setup': 1e6},
+                          {'mtbf_ore': 50, 'mttr_ore': 1e6}, {'mtbf_ore': float('inf'), 'mttr_ore': 5}):
+            with self.assertRaises(SimulazioneEventiNonValida):
+                simula_eventi(self.risultati, turni=[(6, 14)], **parametri)
+    
+    def test_mtbf_minimo_rispetto_alla_durata(self):
+        # Con mtbf di pochi secondi il lotto richiederebbe milioni di guasti
+        with self.assertRaises(SimulazioneEventiNonValida):
+            simula_eventi(self.risultati, mtbf_ore=0.001, mttr_ore=0.001)
+        minimo = self.risultati['durata_lotto_ore'] / 1000
+        simula_eventi(self.risultati, mtbf_ore=minimo * 1.01, mttr_ore=0.001, rng=random.Random(1))
+    
+    def test_limite_di_eventi(self):
+        eventi = simula_eventi(self.risultati, turni=[(6, 14)])
+        with self.assertRaises(SimulazioneEventiNonValida):
+            simula_eventi(self.risultati, turni=[(6, 14)], max_eventi=eventi['eventi_elaborati'] - 1)
+    
+    def test_calendario_non_valido(self):
+        with self.assertRaises(ValueError):
+            CalendarioTurni([(14, 6)])
+
+
+if __name__ == '__main__':
+    unittest.main()
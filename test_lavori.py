@@ -0,0 +1,67 @@
+import threading
+import time
+import unittest
+from lavori import CodaLavori, CodaPiena
+
+
+class TestCodaLavori(unittest.TestCase):
+    
+    def setUp(self):
+        self.coda = CodaLavori(n_worker=1, lunghezza_massima=2)
+        self.sblocca = threading.Event()
+    
+    def tearDown(self):
+        self.sblocca.set()
+        self.coda.chiudi()
+    
+    def _attendi(self, lavoro, secondi=5.0):
+        lavoro.futuro.result(timeout=secondi)
+    
+    def _lavoro_bloccato(self, lavoro):
+        # Aggiorna l'avanzamento finché il test non lo sblocca
+        while not self.sblocca.wait(0.005):
+            lavoro.aggiorna(0.5, {'parziale': True})
+        return 'fatto'
+    
+    def test_completamento_con_risultato(self):
+        lavoro = self.coda.sottometti('prova', lambda lavoro: sum(range(10)))
+        self._attendi(lavoro)
+        
+        self.assertEqual(lavoro.stato, 'completato')
+        self.assertEqual(lavoro.in_dizionario()['risultato'], 45)
+        self.assertEqual(lavoro.avanzamento, 1.0)
+    
+    def test_coda_piena(self):
+        in_esecuzione = self.coda.sottometti('prova', self._lavoro_bloccato)
+        while in_esecuzione.stato != 'in_esecuzione':
+            time.sleep(0.001)
+        self.coda.sottometti('prova', self._lavoro_bloccato)
+        self.coda.sottometti('prova', self._lavoro_bloccato)
+        
+        with self.assertRaises(CodaPiena):
+            self.coda.sottometti('prova', self._lavoro_bloccato)
+        self.assertEqual(self.coda.statistiche()['rifiutati'], 1)
+    
+    def test_annullamento(self):
+        in_esecuzione = self.coda.sottometti('prova', self._lavoro_bloccato)
+        in_coda = self.coda.sottometti('prova', self._lavoro_bloccato)
+        while in_esecuzione.parziale is None:
+            time.sleep(0.001)
+        
+        self.coda.annulla(in_coda.id)
+        self.assertEqual(in_coda.stato, 'annullato')
+        
+        self.coda.annulla(in_esecuzione.id)
+        self._attendi(in_esecuzione)
+        self.assertEqual(in_esecuzione.stato, 'annullato')
+        self.assertEqual(in_esecuzione.in_dizionario()['parziale'], {'parziale': True})
+    
+    def test_errore(self):
+        lavoro = self.coda.sottometti('prova', lambda lavoro: 1 / 0)
+        self._attendi(lavoro)
+        self.assertEqual(lavoro.stato, 'errore')
+        self.assertIn('division', lavoro.errore)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from app import app
+from main import main_batch
+
+
+class TestMainBatch(unittest.TestCase):
+    
+    def setUp(self):
+        self.scenario = {
+            'quantita_giacche': '50',
+            'quantita_tshirt': '150',
+            'quantita_felpe': '100',
+            'quantita_pantaloni': '80',
+            'coeff_linea_a': '0.95',
+            'coeff_linea_b': '1.10',
+            'coeff_linea_c': '1.05',
+            'coeff_linea_d': '1.25',
+            'seed': 7
+        }
+    
+    def test_risultati_come_api(self):
+        scenari = [self.scenario, dict(self.scenario, frazionato=True), self.scenario, {'quantita_giacche': 1}, '{rotto']
+        sorgente = io.StringIO('\n'.join(s if isinstance(s, str) else json.dumps(s) for s in scenari) + '\n')
+        destinazione = io.StringIO()
+        
+        conteggi = main_batch(sorgente, destinazione)
+        righe = [json.loads(riga) for riga in destinazione.getvalue().splitlines()]
+        
+        self.assertEqual(conteggi, {'scenari': 5, 'errori': 2, 'ripetuti': 1})
+        self.assertEqual([riga['indice'] for riga in righe], [0, 1, 2, 3, 4])
+        client = app.test_client()
+        for indice in (0, 1):
+            atteso = client.post('/api/simula', json=scenari[indice]).get_json()
+            self.assertEqual({chiave: valore for chiave, valore in righe[indice].items() if chiave != 'indice'}, atteso)
+        self.assertEqual(righe[2], dict(righe[0], indice=2))
+        self.assertIn('errore', righe[3])
+        self.assertIn('errore', righe[4])
+    
+    def test_cache_limitata(self):
+        # Con una cache di un solo scenario la ripetizione non adiacente viene ricalcolata
+        scenari = [self.scenario, dict(self.scenario, seed=8), self.scenario, self.scenario]
+        destinazione = io.StringIO()
+        conteggi = main_batch(io.StringIO('\n'.join(json.dumps(s) for s in scenari)), destinazione, dimensione_cache=1)
+        righe = [json.loads(riga) for riga in destinazione.getvalue().splitlines()]
+        
+        self.assertEqual(conteggi['ripetuti'], 1)
+        self.assertEqual(righe[3], dict(righe[0], indice=3))
+    
+    def test_distribuzione_stocastica(self):
+        scenari = [dict(self.scenario, stocastico=True), dict(self.scenario, stocastico=True, frazionato=True)]
+        destinazione = io.StringIO()
+        main_batch(io.StringIO('\n'.join(json.dumps(s) for s in scenari)), destinazione)
+        righe = [json.loads(riga) for riga in destinazione.getvalue().splitlines()]
+        
+        atteso = app.test_client().post('/api/simula', json=scenari[0]).get_json()
+        self.assertEqual(righe[0]['stocastico'], atteso['stocastico'])
+        self.assertIn('errore', righe[1])
+    
+    def test_batch_da_stdin_senza_moduli_pesanti(self):
+        cartella = os.path.dirname(os.path.abspath(__file__))
+        codice = (
+            "import runpy, sys; sys.argv = ['main.py', '--batch', '-', '--tempi-import'];"
+            "runpy.run_path('main.py', run_name='__main__');"
+            "assert not {'flask', 'numpy', 'output', 'parallelo'} & set(sys.modules), sorted(sys.modules)"
+        )
+        processo = subprocess.run(
+            [sys.executable, '-c', codice], input=json.dumps(self.scenario) + '\n',
+            capture_output=True, text=True, cwd=cartella, timeout=60
+        )
+        
+        self.assertEqual(processo.returncode, 0, processo.stderr)
+        self.assertEqual(json.loads(processo.stdout)['indice'], 0)
+        self.assertIn('Tempi di importazione', processo.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone
+from produzione import assegna_linee_a_prodotti, calcola_tempo_produzione_lotto
+from assegnazione import assegna_linee
+from montecarlo import genera_scenari, calcola_lotti_vettoriale, scenario_scalare, simula_monte_carlo
+
+
+class TestMonteCarlo(unittest.TestCase):
+    
+    def setUp(self):
+        self.prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+    
+    def test_forma_scenari(self):
+        scenari = genera_scenari(self.prodotti, 10, np.random.default_rng(0))
+        self.assertEqual(scenari['quantita'].shape, (10, 4))
+        self.assertEqual(scenari['tempi'].shape, (10, 4))
+        self.assertEqual(scenari['coefficienti'].shape, (10, 4))
+    
+    def test_coerenza_con_percorso_scalare(self):
+        # Ogni scenario vettoriale deve coincidere con il calcolo scalare
+        scenari = genera_scenari(self.prodotti, 500, np.random.default_rng(42))
+        risultati = calcola_lotti_vettoriale(scenari['quantita'], scenari['tempi'], scenari['coefficienti'])
+        
+        for i in range(500):
+            quantita, tempo_per_unita, impianto = scenario_scalare(self.prodotti, scenari, i)
+            assegnazioni = assegna_linee_a_prodotti(self.prodotti, quantita, tempo_per_unita, impianto)
+            scalare = calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni)
+            
+            self.assertEqual(scalare['durata_lotto_ore'], risultati['durata_lotto_ore'][i])
+            self.assertEqual(scalare['durata_lotto_giorni'], risultati['durata_lotto_giorni'][i])
+            self.assertEqual(
+                scalare['capacita_giornaliera_complessiva'],
+                risultati['capacita_giornaliera_complessiva'][i]
+            )
+    
+    def test_linee_condivise(self):
+        # Con due linee i prodotti condividono le linee: la durata è il carico massimo per linea in entrambi i motori
+        scenari = genera_scenari(self.prodotti, 200, np.random.default_rng(3))
+        scenari['coefficienti'] = scenari['coefficienti'][:, :2]
+        
+        scalari = []
+        assegnazioni = np.empty_like(scenari['quantita'])
+        for i in range(200):
+            quantita, tempo_per_unita, impianto = scenario_scalare(self.prodotti, scenari, i)
+            assegnate = assegna_linee(self.prodotti, quantita, tempo_per_unita, impianto, 'euristico')
+            assegnazioni[i] = [impianto.linee.index(assegnate[prodotto]) for prodotto in self.prodotti]
+            scalari.append(calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnate)['durata_lotto_ore'])
+        
+        risultati = calcola_lotti_vettoriale(
+            scenari['quantita'], scenari['tempi'], scenari['coefficienti'], assegnazioni=assegnazioni
+        )
+        self.assertEqual(risultati['durata_lotto_ore'].tolist(), scalari)
+        self.assertTrue((risultati['durata_lotto_ore'] > risultati['ore_totali'].max(axis=1)).any())
+    
+    def test_percentili_riproducibili(self):
+        primo = simula_monte_carlo(self.prodotti, 1000, seed=7)
+        secondo = simula_monte_carlo(self.prodotti, 1000, seed=7)
+        
+        self.assertEqual(primo['percentili_ore'], secondo['percentili_ore'])
+        self.assertLessEqual(primo['percentili_ore']['P50'], primo['percentili_ore']['P90'])
+        self.assertLessEqual(primo['percentili_ore']['P90'], primo['percentili_ore']['P99'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import io
+import os
+import tempfile
+import unittest
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+from produzione import assegna_linee_a_prodotti, calcola_tempo_produzione_lotto
+from output import genera_report, scrivi_report
+
+
+class TestReport(unittest.TestCase):
+    
+    def setUp(self):
+        prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+        quantita = dict(zip(prodotti, [50, 150, 100, 80]))
+        tempo_per_unita = dict(zip(prodotti, [5.0, 1.0, 2.5, 3.0]))
+        impianto = Impianto([
+            LineaProduttiva('A', 0.8),
+            LineaProduttiva('B', 1.0),
+            LineaProduttiva('C', 1.2),
+            LineaProduttiva('D', 0.9)
+        ])
+        assegnazioni = assegna_linee_a_prodotti(prodotti, quantita, tempo_per_unita, impianto)
+        self.risultati = calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni)
+    
+    def test_scrittura_a_blocchi(self):
+        # Il contenuto non dipende dalla dimensione dei blocchi
+        righe = list(genera_report(self.risultati, 'completo'))
+        stream = io.StringIO()
+        scrivi_report(self.risultati, stream, 'completo', dimensione_buffer=10)
+        
+        self.assertEqual(stream.getvalue(), '\n'.join(righe) + '\n')
+    
+    def test_modalita(self):
+        completo = '\n'.join(genera_report(self.risultati, 'completo'))
+        compatto = '\n'.join(genera_report(self.risultati, 'compatto'))
+        riepilogo = '\n'.join(genera_report(self.risultati, 'riepilogo'))
+        
+        self.assertIn('Giorni necessari', completo)
+        self.assertNotIn('Giorni necessari', compatto)
+        self.assertIn('TABELLA RIASSUNTIVA', compatto)
+        self.assertNotIn('TABELLA RIASSUNTIVA', riepilogo)
+        self.assertIn('Durata totale del lotto', riepilogo)
+        
+        with self.assertRaises(ValueError):
+            list(genera_report(self.risultati, 'sconosciuta'))
+    
+    def test_tempo_effettivo_della_tabella(self):
+        # La tabella usa il tempo effettivo arrotondato al minuto dei risultati, come il blocco del prodotto:
+        # 2,4 h / 0,8 in virgola mobile vale 2,9999... e prima della modifica era mostrato come "2h e 60min/capo"
+        felpa = Felpa()
+        risultati = calcola_tempo_produzione_lotto({felpa: 67}, {felpa: 2.4}, {felpa: LineaProduttiva('B', 0.8)})
+        righe = list(genera_report(risultati, 'completo'))
+        
+        riga_tabella = next(riga for riga in righe if riga.lstrip().startswith(felpa.nome) and '|' in riga)
+        self.assertIn('Tempo effettivo sulla linea:  3h/capo', '\n'.join(righe))
+        self.assertEqual(riga_tabella.split('|')[5].strip(), '3h/capo')
+        self.assertNotIn('60min', '\n'.join(righe))
+    
+    def test_numero_linee_produttive(self):
+        # Con due linee i quattro prodotti le condividono: entrambe le modalità contano le linee distinte
+        prodotti = list(self.risultati['quantita'])
+        impianto = Impianto([LineaProduttiva('A', 1.0), LineaProduttiva('B', 1.2)])
+        assegnazioni = assegna_linee_a_prodotti(
+            prodotti, self.risultati['quantita'], self.risultati['tempo_per_unita'], impianto, 'euristico'
+        )
+        risultati = calcola_tempo_produzione_lotto(self.risultati['quantita'], self.risultati['tempo_per_unita'], assegnazioni)
+        
+        for modalita in ('completo', 'compatto'):
+            self.assertIn('Numero linee produttive: 2\n', '\n'.join(genera_report(risultati, modalita)))
+        self.assertIn('Numero linee produttive: 4\n', '\n'.join(genera_report(self.risultati, 'completo')))
+    
+    def test_report_su_file(self):
+        with tempfile.TemporaryDirectory() as cartella:
+            percorso = os.path.join(cartella, 'report.txt')
+            scrivi_report(self.risultati, percorso, 'riepilogo')
+            with open(percorso, encoding='utf-8') as file:
+                self.assertIn('RIEPILOGO COMPLESSIVO', file.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import random
+import unittest
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone
+from parallelo import AggregatoreDurate, esegui_scenari_paralleli, seme_scenario
+from produzione import (
+    genera_quantita_produzione,
+    genera_parametri_configurabili,
+    assegna_linee_a_prodotti,
+    calcola_tempo_produzione_lotto,
+)
+
+
+class TestAggregatoreDurate(unittest.TestCase):
+    
+    def test_percentili_e_media(self):
+        aggregatore = AggregatoreDurate()
+        for durata in range(1, 101):
+            aggregatore.aggiungi(float(durata))
+        
+        riepilogo = aggregatore.riepilogo()
+        self.assertEqual(riepilogo['n_scenari'], 100)
+        self.assertEqual(riepilogo['media_ore'], 50.5)
+        self.assertEqual(riepilogo['percentili_ore'], {'P50': 50.0, 'P90': 90.0, 'P99': 99.0})
+    
+    def test_unione(self):
+        primo, secondo = AggregatoreDurate(), AggregatoreDurate()
+        primo.aggiungi(10.25)
+        secondo.aggiungi(20.5)
+        primo.unisci(secondo)
+        
+        self.assertEqual(primo.n_scenari, 2)
+        self.assertEqual(primo.riepilogo()['massimo_ore'], 20.5)
+
+
+class TestScenariParalleli(unittest.TestCase):
+    
+    def setUp(self):
+        self.prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+    
+    def test_riproducibile_con_worker_e_chunk_diversi(self):
+        seriale = esegui_scenari_paralleli(self.prodotti, 300, seed=5, n_worker=1, dimensione_chunk=300)
+        parallelo = esegui_scenari_paralleli(self.prodotti, 300, seed=5, n_worker=2, dimensione_chunk=40)
+        
+        self.assertEqual(seriale.riepilogo(), parallelo.riepilogo())
+        self.assertEqual(seriale.istogramma, parallelo.istogramma)
+    
+    def test_uguale_al_calcolo_a_dizionari(self):
+        # I chunk usano la forma compatta: le durate coincidono con il percorso a dizionari
+        atteso = AggregatoreDurate()
+        for indice in range(50):
+            rng = random.Random(seme_scenario(5, indice))
+            quantita = genera_quantita_produzione(self.prodotti, rng)
+            tempo_per_unita, impianto = genera_parametri_configurabili(self.prodotti, rng)
+            assegnazioni = assegna_linee_a_prodotti(self.prodotti, quantita, tempo_per_unita, impianto)
+            atteso.aggiungi(calcola_tempo_produzione_lotto(quantita, tempo_per_unita, assegnazioni)['durata_lotto_ore'])
+        
+        self.assertEqual(esegui_scenari_paralleli(self.prodotti, 50, seed=5, n_worker=1).istogramma, atteso.istogramma)
+    
+    def test_avanzamento_fino_al_completamento(self):
+        avanzamenti = []
+        esegui_scenari_paralleli(self.prodotti, 300, seed=5, n_worker=2, dimensione_chunk=40,
+                                 avanzamento=lambda aggregatore: avanzamenti.append(aggregatore.n_scenari))
+        
+        # Anche i chunk raccolti dopo l'ultima sottomissione aggiornano l'avanzamento
+        self.assertEqual(avanzamenti[-1], 300)
+        self.assertEqual(avanzamenti, sorted(avanzamenti))
+
+
+if __name__ == '__main__':
+    unittest.main()
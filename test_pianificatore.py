@@ -0,0 +1,103 @@
+import unittest
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+from pianificatore import PianificatoreLotti
+
+
+class TestPianificatoreLotti(unittest.TestCase):
+    
+    def setUp(self):
+        self.prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+        self.tempo_per_unita = {
+            self.prodotti[0]: 5.0,
+            self.prodotti[1]: 1.0,
+            self.prodotti[2]: 2.5,
+            self.prodotti[3]: 3.0
+        }
+        self.impianto = Impianto([
+            LineaProduttiva('A', 0.8),
+            LineaProduttiva('B', 1.0),
+            LineaProduttiva('C', 1.2),
+            LineaProduttiva('D', 0.9)
+        ])
+        self.pianificatore = PianificatoreLotti(self.prodotti, self.tempo_per_unita, self.impianto, orizzonte=2)
+        self.lotti = [
+            {prodotto: quantita for prodotto, quantita in zip(self.prodotti, valori)}
+            for valori in [(50, 150, 100, 80), (60, 120, 90, 70), (40, 200, 110, 60), (55, 130, 95, 85)]
+        ]
+    
+    def _da_zero(self) -> PianificatoreLotti:
+        pianificatore = PianificatoreLotti(self.prodotti, self.tempo_per_unita, self.impianto, orizzonte=100)
+        for lotto in self.pianificatore.lotti:
+            pianificatore.aggiungi_lotto(lotto.quantita, lotto.id)
+        return pianificatore
+    
+    def test_lotti_in_sequenza_sulle_linee(self):
+        for quantita in self.lotti:
+            self.pianificatore.aggiungi_lotto(quantita)
+        
+        # Ogni lotto inizia su una linea quando il lotto precedente l'ha liberata
+        precedente = self.pianificatore.lotti[0]
+        for lotto in self.pianificatore.lotti[1:]:
+            for nome, inizio in lotto.inizio_linee.items():
+                self.assertEqual(inizio, precedente.fine_linee[nome])
+            precedente = lotto
+        self.assertEqual(self.pianificatore.ultimo_aggiornamento['lotti_ricalendarizzati'], 1)
+    
+    def test_annullamento_ricalcola_solo_i_successivi(self):
+        id_lotti = [self.pianificatore.aggiungi_lotto(quantita) for quantita in self.lotti]
+        self.pianificatore.annulla_lotto(id_lotti[2])
+        
+        self.assertEqual(self.pianificatore.ultimo_aggiornamento, {'lotti_ripianificati': 0, 'lotti_ricalendarizzati': 1})
+        self.assertEqual(self.pianificatore.durata_totale_ore, self._da_zero().durata_totale_ore)
+        with self.assertRaises(KeyError):
+            self.pianificatore.annulla_lotto(id_lotti[2])
+    
+    def test_limite_di_lotti(self):
+        pianificatore = PianificatoreLotti(self.prodotti, self.tempo_per_unita, self.impianto, max_lotti=3)
+        for quantita in self.lotti[:3]:
+            pianificatore.aggiungi_lotto(quantita)
+        with self.assertRaises(ValueError):
+            pianificatore.aggiungi_lotto(self.lotti[3])
+        self.assertEqual(len(pianificatore.lotti), 3)
+    
+    def test_variazione_coefficiente(self):
+        for quantita in self.lotti:
+            self.pianificatore.aggiungi_lotto(quantita)
+        self.pianificatore.aggiorna_coefficiente('A', 1.3)
+        
+        # I lotti oltre l'orizzonte mantengono le assegnazioni finché non vi entrano
+        da_zero = self._da_zero()
+        for lotto, riferimento in zip(self.pianificatore.lotti[:2], da_zero.lotti):
+            self.assertEqual(lotto.fine, riferimento.fine)
+        self.assertTrue(all(lotto.da_ottimizzare for lotto in self.pianificatore.lotti[2:]))
+    
+    def test_lotti_in_produzione_congelati(self):
+        id_lotti = [self.pianificatore.aggiungi_lotto(quantita) for quantita in self.lotti]
+        self.pianificatore.avanza(self.pianificatore.lotti[1].inizio + 1)
+        
+        with self.assertRaises(ValueError):
+            self.pianificatore.annulla_lotto(id_lotti[0])
+        self.pianificatore.annulla_lotto(id_lotti[3])
+        self.assertEqual(len(self.pianificatore.lotti), 3)
+    
+    def test_lotto_aggiunto_dopo_avanzamento(self):
+        for quantita in self.lotti[:2]:
+            self.pianificatore.aggiungi_lotto(quantita)
+        self.pianificatore.avanza(1000)
+        
+        # La coda è già terminata: il nuovo lotto inizia al tempo corrente e si può ancora annullare
+        id = self.pianificatore.aggiungi_lotto(self.lotti[2])
+        lotto = self.pianificatore.lotti[-1]
+        self.assertEqual(lotto.inizio, 1000)
+        self.assertTrue(all(inizio == 1000 for inizio in lotto.inizio_linee.values()))
+        self.pianificatore.annulla_lotto(id)
+        self.assertEqual(len(self.pianificatore.lotti), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
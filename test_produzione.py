@@ -1,3 +1,4 @@
+import random
 import unittest
 from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
 from produzione import (
@@ -5,6 +6,7 @@ from produzione import (
     genera_parametri_configurabili,
     assegna_linee_a_prodotti,
     calcola_tempo_produzione_lotto,
+    calcola_tempo_produzione_lotto_frazionato,
     _arrotonda_tempo_in_minuti
 )
 
@@ -59,6 +61,21 @@ class TestGeneraParametri(unittest.TestCase):
             self.assertGreaterEqual(tempo, min_val)
             self.assertLessEqual(tempo, max_val)
     
+    def test_generazione_riproducibile(self):
+        # A parità di seme, quantità, tempi e coefficienti coincidono
+        prima = genera_parametri_configurabili(self.prodotti, random.Random(11))
+        seconda = genera_parametri_configurabili(self.prodotti, random.Random(11))
+        
+        self.assertEqual(prima[0], seconda[0])
+        self.assertEqual(
+            [linea.coefficiente_efficienza for linea in prima[1].linee],
+            [linea.coefficiente_efficienza for linea in seconda[1].linee]
+        )
+        self.assertEqual(
+            genera_quantita_produzione(self.prodotti, random.Random(11)),
+            genera_quantita_produzione(self.prodotti, random.Random(11))
+        )
+    
     def test_coefficienti_linee(self):
         # Verifica che i coefficienti siano nel range stabilito
         _, impianto = genera_parametri_configurabili(self.prodotti)
@@ -169,5 +186,41 @@ class TestCalcoloTempo(unittest.TestCase):
         self.assertIn('durata_lotto_ore', risultati)        
 
 
+
+class TestCalcoloFrazionato(unittest.TestCase):
+    # Test per il lotto con prodotti ripartiti su più linee
+    
+    def setUp(self):
+        self.prodotti = [GiaccaInvernale(), TShirt()]
+        self.quantita = {
+            self.prodotti[0]: 50,
+            self.prodotti[1]: 100
+        }
+        self.tempo_per_unita = {
+            self.prodotti[0]: 4.0,
+            self.prodotti[1]: 1.0
+        }
+        self.impianto = Impianto([
+            LineaProduttiva('A', 1.0),
+            LineaProduttiva('B', 1.2)
+        ])
+    
+    def test_quote_coprono_la_quantita(self):
+        risultati = calcola_tempo_produzione_lotto_frazionato(self.quantita, self.tempo_per_unita, self.impianto)
+        
+        for prodotto, qta in self.quantita.items():
+            ripartizione = risultati['risultati_per_prodotto'][prodotto]['ripartizione']
+            self.assertEqual(sum(quota['quantita'] for quota in ripartizione), qta)
+    
+    def test_durata_non_peggiore_del_lotto_intero(self):
+        assegnazioni = assegna_linee_a_prodotti(
+            self.prodotti, self.quantita, self.tempo_per_unita, self.impianto
+        )
+        intero = calcola_tempo_produzione_lotto(self.quantita, self.tempo_per_unita, assegnazioni)
+        frazionato = calcola_tempo_produzione_lotto_frazionato(self.quantita, self.tempo_per_unita, self.impianto)
+        
+        self.assertLessEqual(frazionato['durata_lotto_ore'], intero['durata_lotto_ore'])
+
+
 if __name__ == '__main__':
     unittest.main()
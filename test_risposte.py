@@ -0,0 +1,38 @@
+import gzip
+import json
+import unittest
+from risposte import calcola_etag, compatta, comprimi, comprimi_flusso, serializza
+
+
+class TestRisposte(unittest.TestCase):
+    
+    def test_compatta_arrotonda_e_trasforma_in_colonne(self):
+        dati = {
+            'durata': 2.3833333333333333,
+            'prodotti': [
+                {'prodotto': 'Felpe', 'ore': 195.0},
+                {'prodotto': 'Pantaloni', 'ore': 217.54999999}
+            ],
+            'misti': [{'a': 1}, {'b': 2}]
+        }
+        self.assertEqual(compatta(dati), {
+            'durata': 2.3833,
+            'prodotti': {'colonne': ['prodotto', 'ore'], 'righe': [['Felpe', 195], ['Pantaloni', 217.55]]},
+            'misti': [{'a': 1}, {'b': 2}]
+        })
+    
+    def test_etag_dipende_da_contenuto_e_codifica(self):
+        corpo = serializza({'durata_lotto_ore': 120.5})
+        self.assertEqual(calcola_etag(corpo), calcola_etag(serializza({'durata_lotto_ore': 120.5})))
+        self.assertNotEqual(calcola_etag(corpo), calcola_etag(serializza({'durata_lotto_ore': 120.6})))
+        self.assertEqual(calcola_etag(corpo, 'gzip'), calcola_etag(corpo) + '-gzip')
+        self.assertEqual(gzip.decompress(comprimi(corpo, 'gzip')), corpo)
+    
+    def test_flusso_compresso(self):
+        righe = [json.dumps({'indice': i, 'durata_lotto_ore': i * 1.5}) + '\n' for i in range(2000)]
+        compresso = b''.join(comprimi_flusso(righe, blocco_flusso=4096))
+        self.assertEqual(gzip.decompress(compresso).decode('utf-8'), ''.join(righe))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import unittest
+import urllib.error
+import urllib.request
+
+from carico import esegui_carico, genera_scenari
+
+
+class TestCarico(unittest.TestCase):
+    
+    def test_scenari_riproducibili_e_ripetuti(self):
+        self.assertEqual(genera_scenari(20, seed=3), genera_scenari(20, seed=3))
+        self.assertEqual(len(set(genera_scenari(50, seed=3))), 50)
+        self.assertLess(len(set(genera_scenari(50, seed=3, ripetuti=0.8))), 25)
+
+
+class TestServer(unittest.TestCase):
+    
+    def setUp(self):
+        cartella = os.path.dirname(os.path.abspath(__file__))
+        self.processo = subprocess.Popen(
+            [sys.executable, os.path.join(cartella, 'server.py'), '--porta', '0', '--worker', '2'],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+        )
+        self.porta = self._attendi_avvio()
+    
+    def tearDown(self):
+        if self.processo.poll() is None:
+            self.processo.kill()
+            self.processo.wait()
+        self.processo.stdout.close()
+    
+    def _attendi_avvio(self) -> int:
+        for riga in self.processo.stdout:
+            trovata = re.search(r'In ascolto su http://[^:]+:(\d+)', riga)
+            if trovata:
+                return int(trovata.group(1))
+        self.fail("Il server non si è avviato")
+    
+    def test_carico_riavvio_e_arresto(self):
+        url = f'http://127.0.0.1:{self.porta}'
+        with urllib.request.urlopen(url + '/pronto') as risposta:
+            self.assertTrue(json.loads(risposta.read())['pronto'])
+        
+        # Piani e lavori sono in memoria nel singolo worker: con due worker sono rifiutati
+        richiesta = urllib.request.Request(url + '/api/piani', data=b'{}', headers={'Content-Type': 'application/json'})
+        with self.assertRaises(urllib.error.HTTPError) as errore:
+            urllib.request.urlopen(richiesta)
+        self.assertEqual(errore.exception.code, 503)
+        errore.exception.close()
+        
+        risultato = esegui_carico(url + '/api/simula', concorrenza=4, richieste=100)
+        self.assertEqual(risultato['riuscite'], 100)
+        self.assertGreater(risultato['richieste_al_secondo'], 0)
+        
+        # Riavvio a caldo: stesso socket, nuovi worker, nessuna richiesta persa
+        self.processo.send_signal(signal.SIGHUP)
+        self.assertEqual(self._attendi_avvio(), self.porta)
+        self.assertEqual(esegui_carico(url + '/api/simula', concorrenza=4, richieste=50)['errori'], {})
+        
+        self.processo.send_signal(signal.SIGTERM)
+        self.assertEqual(self.processo.wait(timeout=10), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import random
+import unittest
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+from stocastico import DistribuzioneLinea, distribuzione_durata_lotto, percentile_durata_lotto
+
+
+class TestStocastico(unittest.TestCase):
+    
+    def setUp(self):
+        self.prodotti = [GiaccaInvernale(), TShirt(), Felpa(), Pantalone()]
+        self.quantita = dict(zip(self.prodotti, [60, 200, 100, 80]))
+        self.linee = [LineaProduttiva(nome, coeff) for nome, coeff in [('A', 0.9), ('B', 1.1), ('C', 1.0), ('D', 1.2)]]
+        self.impianto = Impianto(self.linee)
+    
+    def test_somma_di_uniformi_esatta(self):
+        # Una uniforme su [0, 10]: quantili lineari
+        singola = DistribuzioneLinea('A', [(0.0, 10.0)])
+        self.assertAlmostEqual(singola.quantile(0.9), 9.0, places=3)
+        
+        # Due uniformi su [0, 1]: distribuzione triangolare, F(1.5) = 1 - 0.5^2 / 2
+        triangolare = DistribuzioneLinea('A', [(0.0, 1.0), (0.0, 1.0)])
+        self.assertAlmostEqual(triangolare.cdf(1.5), 0.875)
+        self.assertAlmostEqual(triangolare.media, 1.0)
+        
+        # Oltre MAX_TERMINI_ESATTI prodotti: approssimazione normale con la stessa media
+        molti = DistribuzioneLinea('A', [(0.0, 1.0)] * 12)
+        self.assertFalse(molti.esatta)
+        self.assertAlmostEqual(molti.quantile(0.5), 6.0, places=3)
+    
+    def test_coerenza_con_campionamento(self):
+        # Due prodotti sulla stessa linea, per verificare anche la convoluzione
+        assegnazioni = dict(zip(self.prodotti, [self.linee[0], self.linee[0], self.linee[1], self.linee[2]]))
+        distribuzione = distribuzione_durata_lotto(self.prodotti, self.quantita, self.impianto, assegnazioni)
+        riepilogo = distribuzione.riepilogo()
+        
+        rng = random.Random(0)
+        durate = []
+        for _ in range(50_000):
+            carichi = {}
+            for prodotto in self.prodotti:
+                linea = assegnazioni[prodotto]
+                ore = self.quantita[prodotto] * rng.uniform(*prodotto.range_tempo_produzione) / linea.coefficiente_efficienza
+                carichi[linea.nome] = carichi.get(linea.nome, 0) + ore
+            durate.append(max(carichi.values()))
+        durate.sort()
+        
+        self.assertAlmostEqual(riepilogo['media_ore'], sum(durate) / len(durate), delta=2)
+        self.assertAlmostEqual(riepilogo['percentili_ore']['P90'], durate[int(0.9 * len(durate))], delta=3)
+        self.assertAlmostEqual(distribuzione.probabilita_entro(riepilogo['percentili_ore']['P90']), 0.9, places=3)
+    
+    def test_percentile_rapido(self):
+        p50 = percentile_durata_lotto(self.prodotti, self.quantita, self.impianto, 50)
+        p90 = percentile_durata_lotto(self.prodotti, self.quantita, self.impianto)
+        distribuzione = distribuzione_durata_lotto(self.prodotti, self.quantita, self.impianto)
+        
+        self.assertLess(distribuzione.minimo, p50)
+        self.assertLess(p50, p90)
+        self.assertLess(p90, distribuzione.massimo)
+        self.assertEqual(len(distribuzione.linee), 4)
+        with self.assertRaises(ValueError):
+            distribuzione.quantile(1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
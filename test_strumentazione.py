@@ -0,0 +1,40 @@
+import unittest
+from strumentazione import RegistroMetriche, profila
+
+
+class TestStrumentazione(unittest.TestCase):
+    
+    def test_registro_disabilitato(self):
+        registro = RegistroMetriche(abilitato=False)
+        with registro.span('calcolo'):
+            pass
+        self.assertEqual(registro.riepilogo(), {})
+    
+    def test_quantili(self):
+        registro = RegistroMetriche(abilitato=True)
+        for millisecondi in range(1, 101):
+            registro.registra('calcolo', millisecondi / 1000)
+        
+        riepilogo = registro.riepilogo()['calcolo']
+        self.assertEqual(riepilogo['conteggio'], 100)
+        self.assertEqual(riepilogo['p50'], 0.051)
+        self.assertEqual(riepilogo['p99'], 0.1)
+    
+    def test_formato_prometheus(self):
+        registro = RegistroMetriche(abilitato=True)
+        with registro.span('validazione'):
+            pass
+        testo = registro.formato_prometheus()
+        
+        self.assertIn('# TYPE simulazione_span_secondi summary', testo)
+        self.assertIn('simulazione_span_secondi{span="validazione",quantile="0.95"}', testo)
+        self.assertIn('simulazione_span_secondi_count{span="validazione"} 1', testo)
+    
+    def test_profila(self):
+        risultato, testo = profila(lambda: sorted(range(1000), reverse=True))
+        self.assertEqual(risultato[0], 999)
+        self.assertIn('function calls', testo)
+
+
+if __name__ == '__main__':
+    unittest.main()
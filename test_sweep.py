@@ -0,0 +1,78 @@
+import unittest
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+from produzione import assegna_linee_a_prodotti, calcola_tempo_produzione_lotto
+from sweep import esegui_sweep
+
+
+class TestSweep(unittest.TestCase):
+    
+    def setUp(self):
+        self.prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+        self.quantita = {
+            self.prodotti[0]: 50,
+            self.prodotti[1]: 150,
+            self.prodotti[2]: 100,
+            self.prodotti[3]: 80
+        }
+        self.tempo_per_unita = {
+            self.prodotti[0]: 5.0,
+            self.prodotti[1]: 1.0,
+            self.prodotti[2]: 2.5,
+            self.prodotti[3]: 3.0
+        }
+        self.impianto = Impianto([
+            LineaProduttiva('A', 0.8),
+            LineaProduttiva('B', 1.0),
+            LineaProduttiva('C', 1.1),
+            LineaProduttiva('D', 1.3)
+        ])
+        self.dimensioni = {
+            'coeff_linea_d': (self.impianto.linee[3], [1.0, 1.1, 1.2, 1.3]),
+            'quantita_giacche': (self.prodotti[0], [30, 60, 90, 120])
+        }
+    
+    def test_griglia_uguale_al_calcolo_completo(self):
+        risultato = esegui_sweep(
+            self.prodotti, self.quantita, self.tempo_per_unita, self.impianto, self.dimensioni
+        )
+        colonne = risultato['colonne']
+        self.assertEqual(risultato['n_punti'], 16)
+        
+        for i in range(risultato['n_punti']):
+            quantita = dict(self.quantita)
+            quantita[self.prodotti[0]] = colonne['quantita_giacche'][i]
+            linee = [LineaProduttiva(l.nome, l.coefficiente_efficienza) for l in self.impianto.linee]
+            linee[3].coefficiente_efficienza = colonne['coeff_linea_d'][i]
+            impianto = Impianto(linee)
+            
+            assegnazioni = assegna_linee_a_prodotti(self.prodotti, quantita, self.tempo_per_unita, impianto)
+            completo = calcola_tempo_produzione_lotto(quantita, self.tempo_per_unita, assegnazioni)
+            self.assertEqual(colonne['durata_lotto_ore'][i], completo['durata_lotto_ore'])
+    
+    def test_riutilizzo_risultati_prodotto(self):
+        risultato = esegui_sweep(
+            self.prodotti, self.quantita, self.tempo_per_unita, self.impianto, self.dimensioni
+        )
+        self.assertGreater(risultato['riutilizzi_prodotto'], risultato['ricalcoli_prodotto'])
+    
+    def test_latin_hypercube(self):
+        risultato = esegui_sweep(
+            self.prodotti, self.quantita, self.tempo_per_unita, self.impianto, self.dimensioni,
+            metodo='lhs', n_campioni=20, seed=1
+        )
+        quantita = risultato['colonne']['quantita_giacche']
+        
+        self.assertEqual(risultato['n_punti'], 20)
+        self.assertTrue(all(30 <= q <= 120 for q in quantita))
+        # Un campione per strato: i valori sono distribuiti su tutto l'intervallo
+        self.assertLess(min(quantita), 35)
+        self.assertGreater(max(quantita), 115)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from models import GiaccaInvernale, TShirt, Felpa, Pantalone, LineaProduttiva, Impianto
+from produzione import assegna_linee_a_prodotti, calcola_tempo_produzione_lotto, _calcola_risultato_prodotto
+from tabelle import TabellaTempi
+
+
+class TestTabellaTempi(unittest.TestCase):
+    
+    def setUp(self):
+        self.prodotti = [
+            GiaccaInvernale(),
+            TShirt(),
+            Felpa(),
+            Pantalone()
+        ]
+        self.tempo_per_unita = {
+            self.prodotti[0]: 5.13,
+            self.prodotti[1]: 0.97,
+            self.prodotti[2]: 2.51,
+            self.prodotti[3]: 3.07
+        }
+        self.impianto = Impianto([
+            LineaProduttiva('A', 0.83),
+            LineaProduttiva('B', 1.07),
+            LineaProduttiva('C', 1.19),
+            LineaProduttiva('D', 0.91)
+        ])
+        self.quantita = dict(zip(self.prodotti, (50, 150, 100, 80)))
+        self.tabella = TabellaTempi(self.prodotti, self.tempo_per_unita, self.impianto)
+    
+    def test_stessi_risultati_del_calcolo_diretto(self):
+        assegnazioni = assegna_linee_a_prodotti(self.prodotti, self.quantita, self.tempo_per_unita, self.impianto)
+        
+        self.assertEqual(
+            calcola_tempo_produzione_lotto(self.quantita, self.tempo_per_unita, assegnazioni, 24, self.tabella),
+            calcola_tempo_produzione_lotto(self.quantita, self.tempo_per_unita, assegnazioni)
+        )
+        for prodotto in self.prodotti:
+            for linea in self.impianto.linee:
+                self.assertEqual(
+                    self.tabella.voce(prodotto, linea.coefficiente_efficienza)[2],
+                    linea.calcola_capacita_giornaliera(self.tempo_per_unita[prodotto])
+                )
+    
+    def test_tabella_precalcolata_per_impianto(self):
+        self.assertEqual(len(self.tabella), 16)
+        self.assertEqual(self.tabella.voci_calcolate, 16)
+        
+        assegnazioni = assegna_linee_a_prodotti(self.prodotti, self.quantita, self.tempo_per_unita, self.impianto)
+        calcola_tempo_produzione_lotto(self.quantita, self.tempo_per_unita, assegnazioni, 24, self.tabella)
+        self.assertEqual(self.tabella.voci_calcolate, 16)
+    
+    def test_invalidazione_al_cambio_coefficiente(self):
+        linea = self.impianto.linee[0]
+        linea.coefficiente_efficienza = 1.31
+        self.tabella.aggiorna_linea(linea)
+        
+        # Le voci del vecchio coefficiente sono scartate, quelle del nuovo già presenti
+        self.assertEqual(len(self.tabella), 16)
+        for prodotto in self.prodotti:
+            risultato = self.tabella.risultato_prodotto(self.quantita[prodotto], prodotto, 1.31)
+            self.assertEqual(
+                risultato,
+                _calcola_risultato_prodotto(self.quantita[prodotto], self.tempo_per_unita[prodotto], 1.31)
+            )
+        self.assertEqual(self.tabella.voci_calcolate, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from catalogo import catalogo_predefinito
+from produzione import valida_input_utente
+from validazione import FUORI_RANGE, OBBLIGATORIO, TIPO_NON_VALIDO, schema_da_catalogo
+
+
+class TestSchemaValidazione(unittest.TestCase):
+    
+    def setUp(self):
+        self.schema = schema_da_catalogo(catalogo_predefinito())
+        self.data = {
+            'quantita_giacche': '50',
+            'quantita_tshirt': 150,
+            'quantita_felpe': '100',
+            'quantita_pantaloni': 80.0,
+            'coeff_linea_a': '0.95',
+            'coeff_linea_b': 1.1,
+            'coeff_linea_c': '1.05',
+            'coeff_linea_d': 1
+        }
+    
+    def test_conversione(self):
+        valori, errori = self.schema.valida(self.data)
+        
+        self.assertEqual(errori, [])
+        self.assertEqual(valori['quantita_giacche'], 50)
+        self.assertEqual(valori['quantita_pantaloni'], 80)
+        self.assertEqual(valori['coeff_linea_a'], 0.95)
+        self.assertIsInstance(valori['coeff_linea_d'], float)
+    
+    def test_codici_errore(self):
+        data = dict(self.data, quantita_giacche='', quantita_tshirt='abc', quantita_felpe=5000, coeff_linea_a=0, seed=True)
+        _, errori = self.schema.valida(data)
+        codici = {errore.campo: errore.codice for errore in errori}
+        
+        self.assertEqual(codici, {
+            'quantita_giacche': OBBLIGATORIO,
+            'quantita_tshirt': TIPO_NON_VALIDO,
+            'quantita_felpe': FUORI_RANGE,
+            'coeff_linea_a': FUORI_RANGE,
+            'seed': TIPO_NON_VALIDO
+        })
+    
+    def test_batch(self):
+        risultati = self.schema.valida_batch([self.data, dict(self.data, quantita_tshirt=12.5), 'non valido'])
+        self.assertEqual([len(errori) for _, errori in risultati], [0, 1, 1])
+    
+    def test_modalita_produzione(self):
+        quantita = {campo: self.data[campo] for campo in self.data if campo.startswith('quantita_')}
+        self.assertEqual(valida_input_utente(quantita, []), [])
+        
+        # In modalità manuale sono obbligatori anche tempi e coefficienti
+        errori = valida_input_utente(quantita, [], modalita='manuale')
+        self.assertEqual(len(errori), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from catalogo import Catalogo, catalogo_predefinito
+
+
+# Codici degli errori di validazione
+OBBLIGATORIO = 'obbligatorio'
+TIPO_NON_VALIDO = 'tipo_non_valido'
+FUORI_RANGE = 'fuori_range'
+
+_INTERO = re.compile(r'\s*[+-]?\d+\s*')
+_DECIMALE = re.compile(r'\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*')
+
+
+# Errore di validazione strutturato: campo, codice e messaggio per l'utente
+class ErroreValidazione:
+
+    __slots__ = ('campo', 'codice', 'messaggio')
+
+    def __init__(self, campo: str, codice: str, messaggio: str):
+        self.campo = campo
+        self.codice = codice
+        self.messaggio = messaggio
+
+    def in_dizionario(self) -> Dict[str, str]:
+        return {'campo': self.campo, 'codice': self.codice, 'messaggio': self.messaggio}
+
+    def __eq__(self, altro) -> bool:
+        return isinstance(altro, ErroreValidazione) and self.in_dizionario() == altro.in_dizionario()
+
+    def __repr__(self) -> str:
+        return f"<ErroreValidazione {self.campo}: {self.codice}>"
+
+
+# Conversioni senza eccezioni: restituiscono None se il valore non è del tipo atteso
+def converti_intero(valore) -> Optional[int]:
+    tipo = type(valore)
+    if tipo is int:
+        return valore
+    if tipo is str and ((valore.isascii() and valore.isdigit()) or _INTERO.fullmatch(valore)):
+        return int(valore)
+    if tipo is float and valore.is_integer():
+        return int(valore)
+    return None
+
+
+def converti_decimale(valore) -> Optional[float]:
+    tipo = type(valore)
+    if tipo is float or tipo is int:
+        return float(valore)
+    if tipo is str and ((valore.isascii() and valore.replace('.', '', 1).isdigit()) or _DECIMALE.fullmatch(valore)):
+        return float(valore)
+    return None
+
+
+# Campo dello schema, già compilato: conversione, limiti e messaggi di errore
+class Campo:
+
+    __slots__ = (
+        'nome', 'converti', 'minimo', 'massimo', 'minimo_escluso', 'obbligatorio',
+        'messaggio_obbligatorio', 'messaggio_tipo', 'messaggio_range'
+    )
+
+    def __init__(
+        self,
+        nome: str,
+        converti: Callable[[object], Optional[float]],
+        minimo: float,
+        massimo: float,
+        messaggio_obbligatorio: str,
+        messaggio_tipo: str,
+        messaggio_range: str,
+        minimo_escluso: bool = False,
+        obbligatorio: bool = True
+    ):
+        self.nome = nome
+        self.converti = converti
+        self.minimo = minimo
+        self.massimo = massimo
+        self.minimo_escluso = minimo_escluso
+        self.obbligatorio = obbligatorio
+        self.messaggio_obbligatorio = messaggio_obbligatorio
+        self.messaggio_tipo = messaggio_tipo
+        self.messaggio_range = messaggio_range
+
+    def __repr__(self) -> str:
+        return f"<Campo {self.nome}>"
+
+
+# Schema di validazione compilato una sola volta: valida e converte una richiesta in un solo passaggio
+class SchemaValidazione:
+
+    def __init__(self, campi: List[Campo]):
+        self.campi = campi
+        # Attributi dei campi in tuple, per un ciclo di validazione senza accessi agli attributi
+        self._compilati = tuple(
+            (campo.nome, campo.converti, campo.minimo, campo.massimo, campo.minimo_escluso, campo.obbligatorio, campo)
+            for campo in campi
+        )
+
+    # Restituisce i valori convertiti e gli errori; i campi facoltativi assenti non compaiono nei valori
+    def valida(self, data) -> Tuple[Dict[str, float], List[ErroreValidazione]]:
+        if not isinstance(data, dict):
+            return {}, [ErroreValidazione('', TIPO_NON_VALIDO, "La richiesta deve essere un oggetto JSON")]
+
+        valori = {}
+        errori = []
+        get = data.get
+        for nome, converti, minimo, massimo, minimo_escluso, obbligatorio, campo in self._compilati:
+            grezzo = get(nome)
+            if grezzo is None or grezzo == '':
+                if obbligatorio:
+                    errori.append(ErroreValidazione(nome, OBBLIGATORIO, campo.messaggio_obbligatorio))
+                continue
+
+            valore = converti(grezzo)
+            if valore is None:
+                errori.append(ErroreValidazione(nome, TIPO_NON_VALIDO, campo.messaggio_tipo))
+            elif not minimo <= valore <= massimo or (minimo_escluso and valore == minimo):
+                errori.append(ErroreValidazione(nome, FUORI_RANGE, campo.messaggio_range))
+            else:
+                valori[nome] = valore
+
+        return valori, errori
+
+    def valida_batch(self, richieste: Iterable[dict]) -> List[Tuple[Dict[str, float], List[ErroreValidazione]]]:
+        valida = self.valida
+        return [valida(data) for data in richieste]
+
+    def __repr__(self) -> str:
+        return f"<SchemaValidazione: {len(self.campi)} campi>"
+
+
+# Compila lo schema dal catalogo: quantità nel range del prodotto, coefficienti tra 0 e 2,
+# tempi unitari tra 0 e 24 ore e seed intero non negativo facoltativo
+def schema_da_catalogo(
+    catalogo: Catalogo,
+    quantita: bool = True,
+    coefficienti: bool = True,
+    tempi: bool = False,
+    seed: bool = True
+) -> SchemaValidazione:
+
+    campi = []
+
+    if quantita:
+        for prodotto in catalogo.prodotti:
+            minimo, massimo = prodotto.range_quantita_produzione
+            campi.append(Campo(
+                prodotto.campo_quantita, converti_intero, minimo, massimo,
+                f"La quantità di {prodotto.nome} è obbligatoria",
+                f"La quantità di {prodotto.nome} deve essere un numero intero",
+                f"La quantità di {prodotto.nome} deve essere tra {minimo} e {massimo}"
+            ))
+
+    if tempi:
+        for prodotto in catalogo.prodotti:
+            campi.append(Campo(
+                prodotto.campo_tempo, converti_decimale, 0, 24,
+                f"Il tempo unitario di {prodotto.nome} è obbligatorio",
+                f"Il tempo unitario di {prodotto.nome} deve essere un numero valido",
+                f"Il tempo unitario di {prodotto.nome} deve essere maggiore di 0 e al massimo 24 ore",
+                minimo_escluso=True
+            ))
+
+    if coefficienti:
+        for linea in catalogo.linee:
+            campi.append(Campo(
+                linea.campo_coefficiente, converti_decimale, 0, 2,
+                f"Il coefficiente della Linea {linea.nome} è obbligatorio",
+                f"Il coefficiente della Linea {linea.nome} deve essere un numero valido",
+                f"Il coefficiente della Linea {linea.nome} deve essere tra 0.1 e 2.0",
+                minimo_escluso=True
+            ))
+
+    if seed:
+        messaggio = "Il seed deve essere un numero intero non negativo"
+        campi.append(Campo(
+            'seed', lambda valore: valore if type(valore) is int else None, 0, float('inf'),
+            messaggio, messaggio, messaggio, obbligatorio=False
+        ))
+
+    return SchemaValidazione(campi)
+
+
+# Schema della modalità di input, compilato una sola volta per catalogo:
+# 'automatico' richiede le sole quantità, 'manuale' anche tempi e coefficienti
+@lru_cache(maxsize=None)
+def schema_modalita(modalita: str = 'automatico', catalogo: Optional[Catalogo] = None) -> SchemaValidazione:
+    if modalita not in ('automatico', 'manuale'):
+        raise ValueError(f"Modalità di input sconosciuta: {modalita}")
+
+    manuale = modalita == 'manuale'
+    return schema_da_catalogo(catalogo or catalogo_predefinito(), coefficienti=manuale, tempi=manuale, seed=False)